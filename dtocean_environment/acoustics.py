@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Sound pressure levels from hydrophone WAV recordings, for deriving the
+inputs of the UnderwaterNoise logigram. Recordings are memory mapped and
+processed in fixed size blocks of windows, optionally across several
+processes, so whole files are never loaded into memory.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+import struct
+import multiprocessing
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+WavInfo = namedtuple("WavInfo", ["path",
+                                 "dtype",
+                                 "offset",
+                                 "n_channels",
+                                 "sample_rate",
+                                 "n_frames"])
+
+
+def read_wav_info(path):
+
+    '''Read the format and data location of a PCM (16 or 32 bit integer) or
+    IEEE float (32 or 64 bit) WAV file.
+
+    Returns:
+        WavInfo
+
+    '''
+
+    with open(path, "rb") as wav_file:
+
+        riff, _, wave_id = struct.unpack("<4sI4s", wav_file.read(12))
+
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            errStr = "File '{}' is not a WAV file".format(path)
+            raise ValueError(errStr)
+
+        fmt = None
+
+        while True:
+
+            header = wav_file.read(8)
+
+            if len(header) < 8:
+                errStr = "No data chunk found in file '{}'".format(path)
+                raise ValueError(errStr)
+
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+
+                fmt = struct.unpack("<HHIIHH", wav_file.read(16))
+                wav_file.seek(chunk_size - 16 + chunk_size % 2, 1)
+
+            elif chunk_id == b"data":
+
+                offset = wav_file.tell()
+                break
+
+            else:
+
+                wav_file.seek(chunk_size + chunk_size % 2, 1)
+
+    if fmt is None:
+        errStr = "No format chunk found in file '{}'".format(path)
+        raise ValueError(errStr)
+
+    audio_format, n_channels, sample_rate, _, block_align, bits = fmt
+
+    # WAVE_FORMAT_EXTENSIBLE is assumed to hold PCM data
+    if audio_format in (1, 0xFFFE) and bits in (16, 32):
+        dtype = np.dtype("<i{}".format(bits // 8))
+    elif audio_format == 3 and bits in (32, 64):
+        dtype = np.dtype("<f{}".format(bits // 8))
+    else:
+        errStr = ("Unsupported WAV format {} with {} bits per "
+                  "sample").format(audio_format, bits)
+        raise ValueError(errStr)
+
+    n_frames = chunk_size // block_align
+
+    return WavInfo(path, dtype.str, offset, n_channels, sample_rate, n_frames)
+
+
+def get_bands(low=None, high=None, fraction=1):
+
+    '''Limits of the fractional octave bands with centre frequencies (base
+    ten, ANSI S1.11) between low and high.
+
+    Returns:
+        list: (lower, upper) frequency tuples
+
+    '''
+
+    if low is None: low = 10.
+    if high is None: high = 20000.
+
+    bands = []
+    ratio = 10 ** (0.3 / fraction)
+    n_min = int(np.floor(fraction * np.log10(low) / 0.3))
+    n_max = int(np.ceil(fraction * np.log10(high) / 0.3))
+
+    for n in xrange(n_min, n_max + 1):
+
+        centre = 10 ** (0.3 * n / fraction)
+
+        if centre < low or centre > high: continue
+
+        bands.append((centre / np.sqrt(ratio), centre * np.sqrt(ratio)))
+
+    return bands
+
+
+def _get_block_levels(args):
+
+    (info, channel, first_window, n_windows, window_frames, hop_frames,
+     scale, bands) = args
+
+    data = np.memmap(info.path,
+                     dtype=np.dtype(info.dtype),
+                     mode="r",
+                     offset=info.offset,
+                     shape=(info.n_frames, info.n_channels))
+
+    starts = (first_window + np.arange(n_windows)) * hop_frames
+    idx = starts[:, np.newaxis] + np.arange(window_frames)
+    samples = data[idx, channel].astype(float) * scale
+    samples -= samples.mean(axis=1)[:, np.newaxis]
+
+    del data
+
+    levels = np.empty((n_windows, len(bands) + 1))
+
+    with np.errstate(divide='ignore'):
+        levels[:, 0] = 10 * np.log10((samples ** 2).mean(axis=1))
+
+    if not bands: return levels
+
+    taper = np.hanning(window_frames)
+    spectrum = np.abs(np.fft.rfft(samples * taper, axis=1)) ** 2
+    frequencies = np.fft.rfftfreq(window_frames, 1. / info.sample_rate)
+
+    # One sided power spectrum scaled to mean square pressure
+    spectrum *= 2. / (window_frames ** 2 * (taper ** 2).mean())
+
+    for i, (lower, upper) in enumerate(bands):
+
+        in_band = (frequencies >= lower) & (frequencies < upper)
+
+        with np.errstate(divide='ignore'):
+            levels[:, i + 1] = 10 * np.log10(spectrum[:, in_band].sum(axis=1))
+
+    return levels
+
+
+def process_recording(path,
+                      start_time=None,
+                      window=1.,
+                      hop=None,
+                      sensitivity=-180.,
+                      full_scale=1.,
+                      bands=None,
+                      channel=0,
+                      block_windows=256,
+                      processes=1):
+
+    '''Calculate broadband and band sound pressure levels (dB re 1 uPa) over
+    windows of a WAV recording.
+
+    Args:
+        path (str): Path to the WAV file
+        start_time (optional): Time of the first sample
+        window (float, optional): Window length (s)
+        hop (float, optional): Time between window starts (s), defaults to
+          the window length
+        sensitivity (float, optional): Hydrophone and recorder sensitivity
+          (dB re 1 V/uPa)
+        full_scale (float, optional): Voltage of a full scale sample
+        bands (list, optional): (lower, upper) band limits (Hz), see
+          get_bands
+        channel (int, optional): Channel to process
+        block_windows (int, optional): Number of windows per block
+        processes (int, optional): Number of worker processes, or None for
+          the number of cores
+
+    Returns:
+        pandas.DataFrame: levels of each window, with a column for the
+          broadband level and each band
+
+    '''
+
+    info = read_wav_info(path)
+
+    if hop is None: hop = window
+    if bands is None: bands = []
+
+    window_frames = int(round(window * info.sample_rate))
+    hop_frames = int(round(hop * info.sample_rate))
+
+    if window_frames < 2 or hop_frames < 1:
+        errStr = "Window and hop must span at least two and one samples"
+        raise ValueError(errStr)
+
+    if info.n_frames < window_frames:
+        n_windows = 0
+    else:
+        n_windows = (info.n_frames - window_frames) // hop_frames + 1
+
+    # Scale from integer or float samples to pressure in uPa
+    if info.dtype[1] == "i":
+        full_scale_value = 2 ** (8 * np.dtype(info.dtype).itemsize - 1)
+    else:
+        full_scale_value = 1.
+
+    scale = full_scale / full_scale_value / 10 ** (sensitivity / 20.)
+
+    tasks = [(info,
+              channel,
+              first,
+              min(block_windows, n_windows - first),
+              window_frames,
+              hop_frames,
+              scale,
+              bands) for first in xrange(0, n_windows, block_windows)]
+
+    if processes == 1 or len(tasks) < 2:
+
+        blocks = [_get_block_levels(task) for task in tasks]
+
+    else:
+
+        pool = multiprocessing.Pool(processes)
+
+        try:
+            blocks = pool.map(_get_block_levels, tasks)
+            pool.close()
+        except:
+            # Stop the workers rather than waiting for the other blocks
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    columns = ["broadband"] + ["{:g}-{:g} Hz".format(lower, upper)
+                                                for lower, upper in bands]
+
+    if blocks:
+        levels = np.concatenate(blocks)
+    else:
+        levels = np.empty((0, len(columns)))
+
+    offsets = pd.to_timedelta(np.arange(n_windows) * hop, unit="s")
+
+    if start_time is None:
+        index = offsets
+    else:
+        index = pd.Timestamp(start_time) + offsets
+
+    return pd.DataFrame(levels, index=index, columns=columns)
+
+
+def get_level_statistics(levels, percentiles=(5, 50, 95)):
+
+    '''Percentiles of each column of the window levels.
+
+    Returns:
+        pandas.DataFrame: indexed by percentile label (e.g. "p50")
+
+    '''
+
+    stats = levels.quantile([x / 100. for x in percentiles])
+    stats.index = ["p{:g}".format(x) for x in percentiles]
+
+    return stats
+
+
+def get_monthly_statistics(levels, percentiles=(5, 50, 95)):
+
+    '''Percentiles of each column of the window levels for each month of
+    timestamped levels.
+
+    Returns:
+        pandas.DataFrame: indexed by (month period, percentile label)
+
+    '''
+
+    months = levels.index.to_period("M")
+    monthly = {}
+
+    for month, group in levels.groupby(months):
+        monthly[month] = get_level_statistics(group, percentiles)
+
+    return pd.concat(monthly, names=["month", "statistic"])
+
+
+def get_noise_inputs(initial_levels,
+                     measured_levels,
+                     column="broadband",
+                     initial_percentile=50,
+                     measured_percentile=50):
+
+    '''Inputs to the UnderwaterNoise logigram from the window levels of
+    baseline and operational recordings.'''
+
+    initial = np.nanpercentile(initial_levels[column], initial_percentile)
+    measured = np.nanpercentile(measured_levels[column], measured_percentile)
+
+    input_dict = {"Initial Noise dB re 1muPa": initial,
+                  "Measured Noise dB re 1muPa": measured}
+
+    return input_dict
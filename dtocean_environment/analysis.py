@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Analysis of large sets of scenario results: non-dominated (Pareto) sorting
+over several objectives, such as the global EIS columns of
+Stage.get_batch_eis and costs from elsewhere, and top-k selection over
+arrays or streams of batches.
+
+Objectives are minimised unless flagged for maximisation. Missing (NaN)
+values count as the worst possible value of their objective.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _get_objectives(values, maximise=None):
+
+    '''Float array of shape (n_rows, n_objectives) to be minimised.'''
+
+    if isinstance(values, pd.DataFrame): values = values.values
+
+    values = np.array(values, dtype=float)
+    if values.ndim == 1: values = values[:, np.newaxis]
+
+    if maximise is not None:
+
+        maximise = np.asarray(maximise, dtype=bool)
+
+        if maximise.shape != (values.shape[1],):
+            errStr = ("Argument maximise must have a flag for each of the "
+                      "{} objectives").format(values.shape[1])
+            raise ValueError(errStr)
+
+        values[:, maximise] *= -1
+
+    values[np.isnan(values)] = np.inf
+
+    return values
+
+
+def _get_front_mask(values):
+
+    '''Mask of the rows of values which are not dominated by another row.
+    Rows are visited in order of their sum, so that each pass removes the
+    rows dominated by a likely member of the front, and the cost grows with
+    the number of rows times the size of the front.'''
+
+    if not len(values): return np.zeros(0, dtype=bool)
+
+    with np.errstate(invalid="ignore"):
+        order = np.argsort(values.sum(axis=1), kind="mergesort")
+
+    candidates = values[order]
+    positions = order
+    i = 0
+
+    while i < len(candidates):
+
+        point = candidates[i]
+        dominated = ((candidates >= point).all(axis=1) &
+                                        (candidates > point).any(axis=1))
+
+        if dominated.any():
+            n_before = i - dominated[:i].sum()
+            candidates = candidates[~dominated]
+            positions = positions[~dominated]
+            i = n_before
+
+        i += 1
+
+    mask = np.zeros(len(values), dtype=bool)
+    mask[positions] = True
+
+    return mask
+
+
+def _get_ranks_2d(values):
+
+    '''Front number of each row for two objectives, in O(n log n). Rows are
+    visited in lexicographic order, so a row is dominated by a front if and
+    only if the last row added to it is no worse in the second objective
+    and not identical.'''
+
+    order = np.lexsort((values[:, 1], values[:, 0]))
+    ranks = np.empty(len(values), dtype=int)
+    last = []
+
+    def is_dominated(front, point):
+        x, y = last[front]
+        return y < point[1] or (y == point[1] and x < point[0])
+
+    for i in order:
+
+        point = values[i]
+
+        # Fronts dominating the point precede those which do not
+        low = 0
+        high = len(last)
+
+        while low < high:
+
+            mid = (low + high) // 2
+
+            if is_dominated(mid, point):
+                low = mid + 1
+            else:
+                high = mid
+
+        if low == len(last):
+            last.append(point)
+        else:
+            last[low] = point
+
+        ranks[i] = low
+
+    return ranks
+
+
+def get_pareto_mask(values, maximise=None):
+
+    '''Mask of the non-dominated rows of a table of objectives.
+
+    Args:
+        values: Array or DataFrame of shape (n_rows, n_objectives)
+        maximise (optional): Flag for each objective which is maximised
+
+    Returns:
+        numpy.ndarray: boolean mask of the rows of the first front
+
+    '''
+
+    values = _get_objectives(values, maximise)
+
+    return _get_front_mask(values)
+
+
+def non_dominated_sort(values, maximise=None, max_fronts=None):
+
+    '''Front number of each row of a table of objectives, starting from 0
+    for the non-dominated rows. Two objectives are sorted in O(n log n);
+    more objectives are sorted by peeling successive fronts.
+
+    Args:
+        values: Array or DataFrame of shape (n_rows, n_objectives)
+        maximise (optional): Flag for each objective which is maximised
+        max_fronts (int, optional): Number of fronts to find, with the
+          remaining rows ranked max_fronts
+
+    Returns:
+        numpy.ndarray: integer front number of each row
+
+    '''
+
+    values = _get_objectives(values, maximise)
+
+    if values.shape[1] == 2:
+
+        ranks = _get_ranks_2d(values)
+        if max_fronts is not None: ranks = np.minimum(ranks, max_fronts)
+
+        return ranks
+
+    ranks = np.empty(len(values), dtype=int)
+    remaining = np.arange(len(values))
+    front = 0
+
+    while remaining.size:
+
+        if max_fronts is not None and front == max_fronts:
+            ranks[remaining] = front
+            break
+
+        mask = _get_front_mask(values[remaining])
+        ranks[remaining[mask]] = front
+        remaining = remaining[~mask]
+        front += 1
+
+    return ranks
+
+
+def get_top_k(values, k, axis=-1, largest=True):
+
+    '''The k largest, or smallest, values along an axis, ignoring NaN
+    values, which are only returned when fewer than k other values exist.
+
+    Returns:
+        tuple: arrays of the positions along the axis and the values, in
+          order from the best, with k (or fewer) entries along the axis
+
+    '''
+
+    values = np.asarray(values, dtype=float)
+    k = min(k, values.shape[axis])
+
+    if k == 0:
+        shape = list(values.shape)
+        shape[axis] = 0
+        return np.zeros(shape, dtype=int), np.zeros(shape)
+
+    keys = -values if largest else values.copy()
+    keys[np.isnan(keys)] = np.inf
+
+    if k < values.shape[axis]:
+        indices = np.argpartition(keys, k - 1, axis=axis)
+        indices = np.take(indices, np.arange(k), axis=axis)
+    else:
+        indices = np.broadcast_to(
+                    np.arange(k).reshape([-1 if i == axis % values.ndim
+                                        else 1
+                                        for i in range(values.ndim)]),
+                    values.shape)
+
+    order = np.argsort(np.take_along_axis(keys, indices, axis=axis),
+                       axis=axis,
+                       kind="mergesort")
+    indices = np.take_along_axis(indices, order, axis=axis)
+
+    return indices, np.take_along_axis(values, indices, axis=axis)
+
+
+class TopK(object):
+
+    '''Streaming selection of the k largest, or smallest, values seen in a
+    sequence of batches, with a label for each value. Memory is bounded by
+    k and the batch size, and selections from different workers can be
+    merged.'''
+
+    def __init__(self, k, largest=True):
+
+        self.k = k
+        self.largest = largest
+        self._values = np.zeros(0)
+        self._labels = np.zeros(0, dtype=object)
+        self._seen = 0
+
+        return
+
+    def update(self, values, labels=None):
+
+        '''Add a batch of values, labelled by their position in the stream
+        if labels are not given. NaN values are ignored.'''
+
+        values = np.asarray(values, dtype=float).ravel()
+
+        if labels is None:
+            labels = np.arange(self._seen, self._seen + len(values))
+
+        labels = np.asarray(labels, dtype=object).ravel()
+        self._seen += len(values)
+
+        valid = ~np.isnan(values)
+        self._select(np.concatenate([self._values, values[valid]]),
+                     np.concatenate([self._labels, labels[valid]]))
+
+        return
+
+    def _select(self, values, labels):
+
+        indices, _ = get_top_k(values, self.k, largest=self.largest)
+
+        self._values = values[indices]
+        self._labels = labels[indices]
+
+        return
+
+    def merge(self, other):
+
+        '''Combine with the selection of another TopK.'''
+
+        if other.k != self.k or other.largest != self.largest:
+            raise ValueError("Only selections with the same k and order can "
+                             "be merged")
+
+        self._seen += other._seen
+        self._select(np.concatenate([self._values, other._values]),
+                     np.concatenate([self._labels, other._labels]))
+
+        return
+
+    def get(self):
+
+        '''Selected values and labels, from the best.
+
+        Returns:
+            pandas.Series: values indexed by label
+
+        '''
+
+        return pd.Series(self._values, index=self._labels)
+
+
+def get_worst_receptors(cube, stage, k):
+
+    '''The k receptors with the lowest EIS for each scenario and function
+    of a stage in a ResultsCube. For negative impacts these are the most
+    impacted receptors.
+
+    Returns:
+        tuple: arrays of receptor names and their EIS, of shape (scenario,
+          function, k), with None and NaN where fewer than k receptors were
+          scored
+
+    '''
+
+    receptor_eis = cube.select("receptor_eis", stage=stage)
+    indices, values = get_top_k(receptor_eis, k, axis=-1, largest=False)
+
+    names = np.array(cube.receptors, dtype=object)[indices]
+    names[np.isnan(values)] = None
+
+    return names, values
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Non-blocking interface to stages. Assessments are run on an executor and
+return concurrent.futures futures (from the futures backport on Python 2),
+so that event loops can wait on them through add_done_callback, or through
+asyncio.wrap_future on Python 3, without blocking. Calls may be cancelled
+or given a deadline, and identical calls which are in flight at the same
+time, including those of batches, share a single assessment.
+
+A ThreadPoolExecutor is used unless another concurrent.futures executor is
+given. For a ProcessPoolExecutor, the compiled plan of the stage is
+published with shared.publish_stage, and the worker processes attach to it.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import shutil
+import threading
+from concurrent import futures
+
+from .main import _freeze
+from .shared import publish_stage, get_attached_stage
+
+CancelledError = futures.CancelledError
+
+
+class DeadlineError(RuntimeError):
+
+    '''Raised when a call passes its deadline.'''
+
+    pass
+
+
+def get_call_key(input_dict, target_level=None):
+
+    '''Hashable key of a call, or None if the inputs can not be hashed.'''
+
+    frozen = _freeze(input_dict)
+    if frozen is None: return None
+
+    return (frozen, target_level)
+
+
+def _settle(future, result=None, exception=None):
+
+    '''Finish a future given to a caller, unless it has been cancelled or
+    finished already. The future is claimed by marking it running, which
+    is atomic, so it is finished only once if several threads try.
+
+    Returns:
+        bool: True if the future was finished
+
+    '''
+
+    if future.done() or future.running(): return False
+
+    try:
+        if not future.set_running_or_notify_cancel(): return False
+    except RuntimeError:
+        # Claimed by another thread since the check above
+        return False
+
+    if exception is None:
+        future.set_result(result)
+    else:
+        future.set_exception(exception)
+
+    return True
+
+
+def _assess(stage, input_dicts, target_level):
+
+    return stage.get_batch_results(input_dicts, target_level)
+
+
+def _assess_attached(dir_path, input_dicts, target_level):
+
+    return get_attached_stage(dir_path).get_batch_results(input_dicts,
+                                                          target_level)
+
+
+def _set_deadline(future, timeout):
+
+    '''Fail the future with DeadlineError if it is not done within timeout
+    seconds.'''
+
+    error = DeadlineError("The deadline of the call has passed")
+    timer = threading.Timer(timeout, _settle, (future, None, error))
+    timer.daemon = True
+    timer.start()
+
+    future.add_done_callback(lambda x: timer.cancel())
+
+    return
+
+
+class _SharedCall(object):
+
+    '''Assessment of one input dictionary and the futures waiting for
+    it.'''
+
+    def __init__(self, key, input_dict):
+
+        self.key = key
+        self.input_dict = input_dict
+        self.waiters = []
+        self.work = None
+
+        return
+
+    def is_live(self):
+
+        return any(not x.done() for x in self.waiters)
+
+
+class _Work(object):
+
+    '''Calls assessed together by one task of the executor.'''
+
+    def __init__(self, calls):
+
+        self.calls = calls
+        self.future = None
+
+        return
+
+
+class AsyncStage(object):
+
+    '''Non-blocking wrapper of a stage.
+
+    Args:
+        stage (Stage): A constructed stage
+        executor (optional): A concurrent.futures executor, used to run the
+          assessments. If not given a ThreadPoolExecutor with max_workers
+          threads is created and owned by the wrapper. The stage of a
+          ProcessPoolExecutor must be a Stage, which is published with
+          shared.publish_stage.
+        max_workers (int, optional): Threads of the default executor
+
+    '''
+
+    def __init__(self, stage, executor=None, max_workers=4):
+
+        if executor is None:
+            executor = futures.ThreadPoolExecutor(max_workers)
+            self._owns_executor = True
+        else:
+            self._owns_executor = False
+
+        # Worker processes attach to the published plan of the stage
+        if isinstance(executor, futures.ProcessPoolExecutor):
+            self._published = publish_stage(stage)
+            self._task = (_assess_attached, self._published)
+        else:
+            self._published = None
+            self._task = (_assess, stage)
+
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+        return
+
+    def assess(self, input_dict, target_level=None, timeout=None):
+
+        '''Assess the stage without blocking. An identical call which is
+        already in flight is shared rather than repeated.
+
+        Args:
+            input_dict (dict): As for Stage.__call__
+            target_level (int, optional): As for Stage.__call__
+            timeout (float, optional): Seconds until the deadline of the
+              call, after which it fails with DeadlineError
+
+        Returns:
+            concurrent.futures.Future: of the tuple returned by
+              Stage.__call__. Cancelling the future detaches it from the
+              shared assessment, which is cancelled if it has not started
+              and no callers remain.
+
+        '''
+
+        waiter = self._get_waiters([input_dict], target_level)[0]
+        if timeout is not None: _set_deadline(waiter, timeout)
+
+        return waiter
+
+    def assess_batch(self, input_dicts, target_level=None, timeout=None):
+
+        '''Assess a sequence of input dictionaries without blocking. Calls
+        which are already in flight are shared, and the others are assessed
+        together by Stage.get_batch_results.
+
+        Returns:
+            concurrent.futures.Future: of a list of tuples as returned by
+              Stage.__call__. If any call fails the future fails with its
+              exception.
+
+        '''
+
+        future = futures.Future()
+        waiters = self._get_waiters(input_dicts, target_level)
+
+        def gather(_):
+
+            if not all(x.done() for x in waiters): return
+
+            try:
+                results = [x.result() for x in waiters]
+            except Exception as e:
+                _settle(future, exception=e)
+            else:
+                _settle(future, results)
+
+        def detach(_):
+
+            # Cancel the calls of a batch which was cancelled or expired
+            for waiter in waiters: waiter.cancel()
+
+        for waiter in waiters: waiter.add_done_callback(gather)
+        if not waiters: _settle(future, [])
+
+        future.add_done_callback(detach)
+        if timeout is not None: _set_deadline(future, timeout)
+
+        return future
+
+    def _get_waiters(self, input_dicts, target_level):
+
+        '''A future for each input dictionary, joining the calls in flight
+        and submitting the others as a single task.'''
+
+        waiters = []
+        new_calls = []
+
+        with self._lock:
+
+            for input_dict in input_dicts:
+
+                key = get_call_key(input_dict, target_level)
+
+                if key is not None and key in self._in_flight:
+                    call = self._in_flight[key]
+                else:
+                    call = _SharedCall(key, input_dict)
+                    new_calls.append(call)
+                    if key is not None: self._in_flight[key] = call
+
+                waiter = futures.Future()
+                call.waiters.append(waiter)
+                waiters.append((waiter, call))
+
+            if new_calls:
+                work = _Work(new_calls)
+                for call in new_calls: call.work = work
+
+        if new_calls:
+
+            function, stage = self._task
+            input_dicts = [x.input_dict for x in new_calls]
+            work.future = self._executor.submit(function,
+                                                stage,
+                                                input_dicts,
+                                                target_level)
+            work.future.add_done_callback(
+                                lambda x: self._finish_work(work, x))
+
+        for waiter, call in waiters:
+            waiter.add_done_callback(
+                                lambda x, call=call: self._check_call(call))
+
+        return [waiter for waiter, _ in waiters]
+
+    def _finish_work(self, work, future):
+
+        with self._lock:
+
+            waiters = {}
+
+            for call in work.calls:
+                if self._in_flight.get(call.key) is call:
+                    del self._in_flight[call.key]
+                waiters[call] = list(call.waiters)
+
+        if future.cancelled():
+            for call in work.calls:
+                for waiter in waiters[call]: waiter.cancel()
+            return
+
+        exception = future.exception()
+
+        if exception is not None:
+            for call in work.calls:
+                for waiter in waiters[call]:
+                    _settle(waiter, exception=exception)
+            return
+
+        for call, result in zip(work.calls, future.result()):
+            for waiter in waiters[call]: _settle(waiter, result)
+
+        return
+
+    def _check_call(self, call):
+
+        # Cancel work which no caller is waiting for
+        with self._lock:
+
+            if call.is_live(): return
+
+            if self._in_flight.get(call.key) is call:
+                del self._in_flight[call.key]
+
+            work = call.work
+
+            if work is None or work.future is None: return
+            if any(x.is_live() for x in work.calls): return
+
+        work.future.cancel()
+
+        return
+
+    def get_in_flight(self):
+
+        '''Number of distinct calls in flight.'''
+
+        with self._lock:
+            return len(self._in_flight)
+
+    def close(self, wait=True):
+
+        '''Shut down the default executor, if it is owned, and remove the
+        published plan of the stage, if any.'''
+
+        if self._owns_executor: self._executor.shutdown(wait)
+
+        if self._published is not None:
+            shutil.rmtree(self._published, ignore_errors=True)
+            self._published = None
+
+        return
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Command line batch runner, evaluating a table of scenarios for one or all
+stages across a pool of worker processes.
+
+The scenario table is a CSV file with the scenario name in the first column
+and a column for each scalar input of the stages. Inputs without a column,
+or with an empty value, are not given, so functions needing them are not
+assessed. The protected and receptor observation tables have the formats of
+test_data/species_protected.csv and test_data/species_receptors.csv and the
+optional weighting table has "function" and "weighting parameter" columns.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import argparse
+import multiprocessing
+from collections import OrderedDict
+
+import pandas as pd
+
+from .main import (HydroStage,
+                   ElectricalStage,
+                   MooringStage,
+                   InstallationStage,
+                   OperationMaintenanceStage)
+from .observations import Observations
+from .shared import publish_stage, get_attached_stage
+
+STAGES = OrderedDict([("hydrodynamics", HydroStage),
+                      ("electrical", ElectricalStage),
+                      ("moorings", MooringStage),
+                      ("installation", InstallationStage),
+                      ("maintenance", OperationMaintenanceStage)])
+
+
+def read_table(path):
+
+    '''Read a CSV table indexed by its first column.'''
+
+    return pd.read_csv(path, index_col=0)
+
+
+def read_weighting(path):
+
+    '''Read a weighting table into a dict of weighting parameters keyed by
+    function name.'''
+
+    table = pd.read_csv(path)
+    table = table.where(pd.notnull(table), None)
+
+    return dict(zip(table["function"], table["weighting parameter"]))
+
+
+def get_stage(stage_class,
+              protected_observations=None,
+              receptor_observations=None,
+              weighting=None,
+              score_tables=None,
+              observations=None):
+
+    '''Construct a stage, with no weighting parameter for functions missing
+    from the given weighting dict. Score tables from Stage.get_score_tables
+    may be given to avoid reading the data tables, and compiled Observations
+    to share them with other stages.'''
+
+    constraint_observations = {
+                        Logigram.get_function_name(): None
+                            for Logigram in stage_class.get_logigram_classes()}
+
+    if weighting is not None:
+
+        for name in constraint_observations:
+            constraint_observations[name] = weighting.get(name)
+
+    stage = stage_class(protected_observations,
+                        receptor_observations,
+                        constraint_observations,
+                        score_tables,
+                        observations)
+
+    return stage
+
+
+def get_input_dicts(scenarios, input_names):
+
+    '''Input dictionaries for each row of the scenario table.'''
+
+    inputs_df = pd.DataFrame(index=scenarios.index,
+                             columns=sorted(set(input_names)),
+                             dtype=object)
+
+    for column in inputs_df.columns:
+
+        if column not in scenarios: continue
+        inputs_df[column] = scenarios[column]
+
+    inputs_df = inputs_df.astype(object).where(pd.notnull(inputs_df), None)
+
+    return inputs_df.to_dict("records")
+
+
+def _score_chunk(stage, input_dicts):
+
+    eis_df, global_df = stage.get_batch_eis(input_dicts)
+
+    return pd.concat([eis_df, global_df], axis=1)
+
+
+def _score_attached_chunk(args):
+
+    dir_path, input_dicts = args
+    stage = get_attached_stage(dir_path)
+
+    return _score_chunk(stage, input_dicts)
+
+
+def run_batch(stage,
+              scenarios,
+              processes=1,
+              chunksize=1000,
+              progress=None):
+
+    '''Evaluate a table of scenarios with a stage.
+
+    Args:
+        stage (Stage): A constructed stage
+        scenarios (pandas.DataFrame): Inputs of each scenario
+        processes (int, optional): Number of worker processes, or None for
+          the number of cores
+        chunksize (int, optional): Number of scenarios per task
+        progress (optional): Function called with the number of scenarios
+          completed and the total after each task
+
+    Returns:
+        pandas.DataFrame: EIS of each function followed by the global EIS,
+          indexed as the scenarios
+
+    '''
+
+    input_dicts = get_input_dicts(scenarios, stage.get_inputs())
+    chunks = [input_dicts[i:i + chunksize]
+                            for i in xrange(0, len(input_dicts), chunksize)]
+
+    results = []
+    done = 0
+
+    if processes == 1 or len(chunks) < 2:
+
+        for chunk in chunks:
+
+            results.append(_score_chunk(stage, chunk))
+            done += len(chunk)
+            if progress is not None: progress(done, len(input_dicts))
+
+    else:
+
+        # Workers attach to the published plan rather than rebuild tables
+        dir_path = publish_stage(stage)
+        pool = multiprocessing.Pool(processes)
+
+        try:
+
+            tasks = [(dir_path, chunk) for chunk in chunks]
+
+            for chunk, result in zip(chunks,
+                                     pool.imap(_score_attached_chunk, tasks)):
+
+                results.append(result)
+                done += len(chunk)
+                if progress is not None: progress(done, len(input_dicts))
+
+            pool.close()
+
+        except:
+
+            # Stop the workers rather than waiting for the other chunks
+            pool.terminate()
+            raise
+
+        finally:
+
+            pool.join()
+            shutil.rmtree(dir_path, ignore_errors=True)
+
+    if results:
+        result_df = pd.concat(results, ignore_index=True)
+    else:
+        result_df = _score_chunk(stage, [])
+
+    result_df.index = scenarios.index
+
+    return result_df
+
+
+def write_results(result_df, path, output_format="csv"):
+
+    '''Write a results table as CSV or, if pyarrow or fastparquet is
+    installed, Parquet.'''
+
+    if output_format == "csv":
+        result_df.to_csv(path)
+    elif output_format == "parquet":
+        result_df.to_parquet(path)
+    else:
+        errStr = "Unknown output format '{}'".format(output_format)
+        raise ValueError(errStr)
+
+    return
+
+
+def get_parser():
+
+    parser = argparse.ArgumentParser(
+        description="Evaluate the environmental impact of a table of "
+                    "scenarios")
+
+    parser.add_argument("stage",
+                        choices=list(STAGES.keys()) + ["all"],
+                        help="stage to evaluate, or all stages")
+    parser.add_argument("scenarios",
+                        help="CSV table of scenario inputs")
+    parser.add_argument("-p", "--protected",
+                        help="CSV table of protected species observations")
+    parser.add_argument("-r", "--receptors",
+                        help="CSV table of receptor observations")
+    parser.add_argument("-w", "--weighting",
+                        help="CSV table of function weighting parameters")
+    parser.add_argument("-o", "--output",
+                        default=".",
+                        help="output directory (default: current directory)")
+    parser.add_argument("-f", "--format",
+                        choices=["csv", "parquet"],
+                        default="csv",
+                        help="output file format (default: csv)")
+    parser.add_argument("-n", "--processes",
+                        type=int,
+                        default=1,
+                        help="number of worker processes, 0 for the number "
+                             "of cores (default: 1)")
+    parser.add_argument("-c", "--chunksize",
+                        type=int,
+                        default=1000,
+                        help="scenarios per task (default: 1000)")
+    parser.add_argument("-q", "--quiet",
+                        action="store_true",
+                        help="do not report progress")
+
+    return parser
+
+
+def main(argv=None):
+
+    '''Entry point of the dtocean-environment command.'''
+
+    args = get_parser().parse_args(argv)
+
+    protected = None
+    receptors = None
+    weighting = None
+
+    if args.protected is not None: protected = read_table(args.protected)
+    if args.receptors is not None: receptors = read_table(args.receptors)
+    if args.weighting is not None: weighting = read_weighting(args.weighting)
+
+    scenarios = read_table(args.scenarios)
+
+    if args.stage == "all":
+        stage_names = list(STAGES.keys())
+    else:
+        stage_names = [args.stage]
+
+    processes = args.processes
+    if processes == 0: processes = None
+
+    if not os.path.isdir(args.output): os.makedirs(args.output)
+
+    observations = Observations(protected, receptors)
+
+    for stage_name in stage_names:
+
+        stage = get_stage(STAGES[stage_name],
+                          weighting=weighting,
+                          observations=observations)
+
+        if args.quiet:
+            progress = None
+        else:
+            def progress(done, total, stage_name=stage_name):
+                print("{}: {} of {} scenarios".format(stage_name,
+                                                      done,
+                                                      total),
+                      file=sys.stderr)
+
+        result_df = run_batch(stage,
+                              scenarios,
+                              processes,
+                              args.chunksize,
+                              progress)
+
+        file_name = "{}.{}".format(stage_name, args.format)
+        write_results(result_df,
+                      os.path.join(args.output, file_name),
+                      args.format)
+
+    return 0
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Time-resolved scoring of installation and maintenance campaigns, given as a
+schedule of dated operations.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Campaign(object):
+
+    '''Score a schedule of dated operations through the logigrams of a stage
+    (typically InstallationStage or OperationMaintenanceStage) and combine
+    the results with the monthly receptor seasons into EIS timelines.
+
+    The schedule is a DataFrame (or an iterable of DataFrame chunks, such as
+    returned by pandas.read_csv with the chunksize argument) sorted by date,
+    containing a date column and a column for each input of the stage.
+    Missing (NaN) inputs disable the corresponding functions for that
+    operation.
+
+    Args:
+        stage (Stage): A constructed Stage object
+        date_column (str, optional): Name of the date column
+        chunksize (int, optional): Number of operations scored per batch
+
+    '''
+
+    def __init__(self, stage, date_column="date", chunksize=10000):
+
+        self._stage = stage
+        self._date_column = date_column
+        self._chunksize = chunksize
+        self._signs = {step.name: step.sign for step in stage.get_plan()}
+
+        return
+
+    def get_function_names(self):
+
+        return sorted(self._signs.keys())
+
+    def _iter_chunks(self, schedule):
+
+        if isinstance(schedule, pd.DataFrame):
+
+            for start in xrange(0, len(schedule), self._chunksize):
+                yield schedule.iloc[start:start + self._chunksize]
+
+        else:
+
+            for chunk in schedule:
+                for start in xrange(0, len(chunk), self._chunksize):
+                    yield chunk.iloc[start:start + self._chunksize]
+
+    def _get_input_dicts(self, chunk):
+
+        input_names = self._stage.get_inputs()
+        missing = set(input_names) - set(chunk.columns)
+
+        if missing:
+
+            missing_str = ", ".join(sorted(missing))
+            errStr = ("The schedule must contain a column for every input "
+                      "of the stage. Missing are: {}").format(missing_str)
+            raise KeyError(errStr)
+
+        inputs_df = chunk[list(set(input_names))]
+        inputs_df = inputs_df.astype(object).where(pd.notnull(inputs_df),
+                                                   None)
+
+        return inputs_df.to_dict("records")
+
+    def score_operations(self, chunk):
+
+        '''Score each operation in a chunk of the schedule, accounting for
+        the receptor seasons in the month of the operation.
+
+        Returns:
+            pandas.DataFrame: EIS for each function, indexed as the chunk
+
+        '''
+
+        dates = pd.to_datetime(chunk[self._date_column])
+        months = dates.dt.month.values - 1
+
+        input_dicts = self._get_input_dicts(chunk)
+        core_dict = self._stage.get_batch_core(input_dicts)
+        plan = self._stage.get_plan()
+
+        scores = {}
+
+        for name, (rows, result) in core_dict.iteritems():
+
+            values = np.full(len(input_dicts), np.nan)
+            if rows.size: values[rows] = _get_monthly_eis(plan[name],
+                                                          result,
+                                                          months[rows])
+
+            scores[name] = values
+
+        scores_df = pd.DataFrame(scores,
+                                 index=chunk.index,
+                                 columns=self.get_function_names())
+
+        return scores_df
+
+    def _reduce_worst(self, grouped):
+
+        reduced = {}
+
+        for name in self.get_function_names():
+
+            if self._signs[name] < 0:
+                reduced[name] = grouped[name].min()
+            else:
+                reduced[name] = grouped[name].max()
+
+        reduced["Operations"] = grouped["Operations"].sum()
+        reduced_df = pd.DataFrame(reduced,
+                                  columns=self.get_function_names() +
+                                                              ["Operations"])
+
+        return reduced_df
+
+    def _add_global_eis(self, timeline_df):
+
+        names = self.get_function_names()
+        global_list = [self._stage.get_global_eis(row[names].to_dict())
+                                    for _, row in timeline_df.iterrows()]
+        global_df = pd.DataFrame(global_list, index=timeline_df.index)
+
+        return pd.concat([timeline_df, global_df], axis=1)
+
+    def _iter_worst(self, frames, freq):
+
+        '''Combine a date ordered stream of timeline frames into the worst
+        scores per period, yielding each period once it is complete.'''
+
+        pending = None
+
+        for frame in frames:
+
+            if frame.empty: continue
+
+            periods = frame.index.to_timestamp().to_period(freq)
+            frame = self._reduce_worst(frame.groupby(periods))
+
+            if pending is not None:
+
+                if frame.index[0] < pending.index[0]:
+                    errStr = "The schedule must be sorted by date"
+                    raise ValueError(errStr)
+
+                combined = pd.concat([pending, frame])
+                frame = self._reduce_worst(combined.groupby(level=0))
+
+            pending = frame.iloc[-1:]
+            complete = frame.iloc[:-1]
+
+            if not complete.empty:
+                yield complete
+
+        if pending is not None:
+            yield pending
+
+    def _iter_filled(self, frames, freq):
+
+        last = None
+
+        for frame in frames:
+
+            if last is not None:
+                start = last + 1
+            else:
+                start = frame.index[0]
+
+            full_index = pd.period_range(start, frame.index[-1], freq=freq)
+            frame = frame.reindex(full_index)
+            frame["Operations"] = frame["Operations"].fillna(0).astype(int)
+            last = frame.index[-1]
+
+            yield self._add_global_eis(frame)
+
+    def _iter_operation_frames(self, schedule):
+
+        for chunk in self._iter_chunks(schedule):
+
+            if chunk.empty: continue
+
+            scores_df = self.score_operations(chunk)
+            dates = pd.to_datetime(chunk[self._date_column])
+            scores_df["Operations"] = 1
+            scores_df.index = pd.PeriodIndex(dates, freq="M")
+
+            yield scores_df
+
+    def _iter_yearly(self, monthly_frames):
+
+        columns = self.get_function_names() + ["Operations"]
+        frames = (frame[columns] for frame in monthly_frames)
+        worst = self._iter_worst(frames, "A")
+
+        for frame in self._iter_filled(worst, "A"):
+            yield frame
+
+    def iter_monthly(self, schedule):
+
+        '''Stream the month-by-month EIS timeline of the schedule. Each
+        yielded DataFrame contains consecutive, completed months, indexed
+        by monthly period, with the worst EIS of each function, the number of
+        operations and the global EIS keys.'''
+
+        worst = self._iter_worst(self._iter_operation_frames(schedule), "M")
+
+        for frame in self._iter_filled(worst, "M"):
+            yield frame
+
+    def iter_yearly(self, schedule):
+
+        '''Stream the year-by-year EIS timeline of the schedule, in the same
+        format as iter_monthly.'''
+
+        return self._iter_yearly(self.iter_monthly(schedule))
+
+    def get_timelines(self, schedule):
+
+        '''Calculate the complete monthly and yearly timelines. The schedule
+        is only read once, so an iterator of chunks may be given.
+
+        Returns:
+            tuple: monthly and yearly timeline DataFrames
+
+        '''
+
+        monthly_frames = list(self.iter_monthly(schedule))
+
+        if not monthly_frames: return None, None
+
+        monthly_df = pd.concat(monthly_frames)
+        yearly_df = pd.concat(list(self._iter_yearly(monthly_frames)))
+
+        return monthly_df, yearly_df
+
+
+def _get_monthly_eis(plan, result, months):
+
+    '''Return the EIS of each assessment of a CoreAssessment in the given
+    month (0 to 11), using the worst season of the receptors present in
+    that month where available, or NaN if no receptor is present. Where the
+    protected species override has been applied, it is applied to every
+    month.'''
+
+    eis = result.eis
+
+    if result.seasons is None: return eis.astype(float)
+
+    # Seasons of each receptor in the month of each assessment, where the
+    # receptor is present. Unknown presence counts as present, as in assess.
+    seasons = result.seasons[np.arange(len(months)), :, months]
+    present = (plan.monthly[:, months] != 0).T
+    seasons = np.where(present, seasons, np.nan)
+
+    worst = np.where(eis >= 0,
+                     np.fmax.reduce(seasons, axis=1),
+                     np.fmin.reduce(seasons, axis=1))
+
+    monthly_eis = np.where(eis == -100., eis, worst)
+
+    return monthly_eis.astype(float)
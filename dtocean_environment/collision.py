@@ -0,0 +1,1092 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Spatially resolved collision risk. Trajectories are straight lines aligned
+with the current, as in functions.coll_risk, and devices are circles of
+radius equal to their maximum horizontal size. A trajectory is intercepted if
+it passes within that radius of any device centre. The raster considers
+every trajectory crossing the grid, whereas functions.coll_risk counts a
+sample of trajectories one device diameter apart, so the collision risk of
+a raster approximates that of functions.coll_risk.
+
+The collision risk of functions.coll_risk can also be found exactly
+without testing every trajectory against every device, as only the
+trajectories nearest to each device can intercept it. There, devices are
+the polygons given by shapely's Point.buffer, as in functions.coll_risk,
+so trajectories which just touch a device are counted in the same way.
+Devices laid out on a rectangular or staggered lattice can be assessed
+from the runs of the lattice, treating the devices as circles. For
+screening many layouts, the collision risk can be estimated to a target
+error and confidence by sampling the trajectories.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+from collections import namedtuple
+
+import numpy as np
+from shapely.geometry import LineString, Point
+
+from .functions import coll_risk
+
+# Ratio of the apothem to the radius of the polygon of Point.buffer, which
+# has 16 segments per quarter circle, and the relative margin within which
+# the intersection of a trajectory and a device is tested with shapely
+_APOTHEM = np.cos(np.pi / 64)
+_MARGIN = 1e-6
+
+
+class CollisionRaster(object):
+
+    '''Frequency with which each cell of a regular grid lies on a trajectory
+    intercepted by a device, and each device's share of the intersections.
+
+    Rows of the array run from north (maximum y) to south and the transform
+    follows the GDAL convention (x origin, cell width, 0, y origin, 0,
+    -cell height), giving the outer corner of the first cell.
+
+    '''
+
+    def __init__(self, array, x_origin, y_origin, cell_size, device_shares,
+                       depth_factor):
+
+        self.array = array
+        self.x_origin = x_origin
+        self.y_origin = y_origin
+        self.cell_size = cell_size
+        self.device_shares = device_shares
+        self.depth_factor = depth_factor
+
+        return
+
+    @property
+    def transform(self):
+
+        return (self.x_origin, self.cell_size, 0.,
+                self.y_origin, 0., -self.cell_size)
+
+    def get_cell_centres(self):
+
+        '''Coordinates of the cell centres, as arrays shaped like the
+        raster.'''
+
+        n_rows, n_cols = self.array.shape
+
+        x = self.x_origin + (np.arange(n_cols) + 0.5) * self.cell_size
+        y = self.y_origin - (np.arange(n_rows) + 0.5) * self.cell_size
+
+        return np.meshgrid(x, y)
+
+    def get_collision_rate(self):
+
+        '''Fraction of the trajectories crossing the grid which are
+        intercepted, weighted by their length within the grid.'''
+
+        return float(self.array.mean())
+
+    def get_impact(self):
+
+        '''Collision risk factor, for input to the CollisionRisk logigram.
+
+        This approximates the result of functions.coll_risk. The raster
+        gives the intercepted fraction of all the trajectories crossing the
+        grid, with an error of up to cell_size / extent for each group of
+        devices whose circles overlap across the current. The trajectories
+        of functions.coll_risk are one device diameter apart, so its result
+        may differ from the raster by up to about one of its trajectories
+        per group. Use get_collision_risk for the exact result of
+        functions.coll_risk.'''
+
+        return self.depth_factor * self.get_collision_rate()
+
+
+def get_collision_raster(dev_pos,
+                         dev_dim,
+                         dev_height,
+                         water_dep,
+                         cur_dir,
+                         weights=None,
+                         cell_size=10.,
+                         bounds=None,
+                         tile_size=65536):
+
+    '''Calculate a collision risk raster for a single current direction or a
+    rose of directions.
+
+    Args:
+        dev_pos: Coordinates of the devices, as [x, y]
+        dev_dim: Maximum horizontal size of the device
+        dev_height: Height of device immersed in the water
+        water_dep: Minimum water depth
+        cur_dir: Direction of the current in degrees, or a sequence of
+          directions
+        weights (optional): Frequency of each direction
+        cell_size (float, optional): Grid spacing
+        bounds (tuple, optional): Grid extent as (x_min, y_min, x_max,
+          y_max). Defaults to the device positions extended by dev_dim.
+        tile_size (int, optional): Maximum number of cells processed at once
+
+    Returns:
+        CollisionRaster
+
+    '''
+
+    x_pos = np.asarray(dev_pos[0], dtype=float)
+    y_pos = np.asarray(dev_pos[1], dtype=float)
+
+    directions = np.atleast_1d(np.asarray(cur_dir, dtype=float))
+
+    if weights is None:
+        weights = np.ones(len(directions))
+    else:
+        weights = np.asarray(weights, dtype=float)
+
+    if len(weights) != len(directions) or weights.sum() <= 0:
+        errStr = ("A positive weight must be given for each current "
+                  "direction")
+        raise ValueError(errStr)
+
+    weights = weights / weights.sum()
+
+    if bounds is None:
+        bounds = (x_pos.min() - dev_dim,
+                  y_pos.min() - dev_dim,
+                  x_pos.max() + dev_dim,
+                  y_pos.max() + dev_dim)
+
+    x_min, y_min, x_max, y_max = bounds
+    n_cols = max(int(np.ceil((x_max - x_min) / cell_size)), 1)
+    n_rows = max(int(np.ceil((y_max - y_min) / cell_size)), 1)
+
+    x_centres = x_min + (np.arange(n_cols) + 0.5) * cell_size
+    y_centres = y_max - (np.arange(n_rows) + 0.5) * cell_size
+
+    raster = np.zeros(n_rows * n_cols)
+    device_counts = np.zeros(len(x_pos))
+
+    rows_per_tile = max(tile_size // n_cols, 1)
+
+    for direction, weight in zip(directions, weights):
+
+        angle = np.deg2rad(direction % 360)
+        sin_angle = np.sin(angle)
+        cos_angle = np.cos(angle)
+
+        # Perpendicular offsets of the trajectories through each device
+        device_u = -x_pos * sin_angle + y_pos * cos_angle
+        device_order = np.argsort(device_u)
+        sorted_u = device_u[device_order]
+
+        for start in xrange(0, n_rows, rows_per_tile):
+
+            stop = min(start + rows_per_tile, n_rows)
+            cell_u = (-x_centres[np.newaxis, :] * sin_angle +
+                      y_centres[start:stop, np.newaxis] * cos_angle).ravel()
+
+            intercepted = _get_intercepted(cell_u, sorted_u, dev_dim)
+            raster[start * n_cols:stop * n_cols] += weight * intercepted
+
+            sorted_cells = np.sort(cell_u)
+            lower = np.searchsorted(sorted_cells, sorted_u - dev_dim, "left")
+            upper = np.searchsorted(sorted_cells, sorted_u + dev_dim, "right")
+            device_counts[device_order] += weight * (upper - lower)
+
+    total_counts = device_counts.sum()
+
+    if total_counts > 0:
+        device_shares = device_counts / total_counts
+    else:
+        device_shares = device_counts
+
+    depth_factor = dev_height / float(water_dep)
+
+    result = CollisionRaster(raster.reshape(n_rows, n_cols),
+                             x_min,
+                             y_max,
+                             cell_size,
+                             device_shares,
+                             depth_factor)
+
+    return result
+
+
+def _get_intercepted(cell_u, sorted_u, radius):
+
+    '''Test if the perpendicular offsets of the cells are within the given
+    radius of any of the sorted device offsets.'''
+
+    idx = np.searchsorted(sorted_u, cell_u)
+
+    above = np.minimum(idx, len(sorted_u) - 1)
+    below = np.maximum(idx - 1, 0)
+
+    distance = np.minimum(np.abs(sorted_u[above] - cell_u),
+                          np.abs(sorted_u[below] - cell_u))
+
+    return distance <= radius
+
+
+class Lattice(namedtuple("Lattice", ["x_origin",
+                                     "y_origin",
+                                     "x_spacing",
+                                     "y_spacing",
+                                     "stagger",
+                                     "rows",
+                                     "cols"])):
+
+    '''Devices laid out on the sites of a rectangular or staggered lattice
+    aligned with the x and y axes, which need not all be occupied. The
+    device at site (i, j) lies at (x_origin + j * x_spacing + stagger,
+    y_origin + i * y_spacing), where the stagger applies to odd rows only.
+
+    Attributes:
+        x_origin (float): x coordinate of column 0 of the even rows
+        y_origin (float): y coordinate of row 0
+        x_spacing (float): Spacing of the devices along a row
+        y_spacing (float): Spacing of the rows
+        stagger (float): Offset of the odd rows
+        rows (numpy.ndarray): Row of each device
+        cols (numpy.ndarray): Column of each device
+
+    '''
+
+    __slots__ = ()
+
+    def get_positions(self):
+
+        '''Coordinates of the devices, as [x, y].'''
+
+        x_pos = (self.x_origin + self.cols * self.x_spacing +
+                                            (self.rows % 2) * self.stagger)
+        y_pos = self.y_origin + self.rows * self.y_spacing
+
+        return [x_pos, y_pos]
+
+    def get_runs(self, by_rows=True):
+
+        '''Runs of adjacent devices along the rows, or along the columns.
+        With a stagger, the columns of the even and odd rows are separate.
+
+        Returns:
+            tuple: arrays of the x and y coordinates of the first device and
+              the number of devices of each run, and the (x, y) step between
+              the devices of a run
+
+        '''
+
+        if by_rows:
+            keys = [self.rows]
+            positions = self.cols
+            step = (self.x_spacing, 0.)
+        elif self.stagger == 0.:
+            keys = [self.cols]
+            positions = self.rows
+            step = (0., self.y_spacing)
+        else:
+            keys = [self.cols, self.rows % 2]
+            positions = self.rows // 2
+            step = (0., 2 * self.y_spacing)
+
+        order = np.lexsort([positions] + keys)
+        positions = positions[order]
+
+        same = np.ones(len(order) - 1, dtype=bool)
+        for key in keys: same &= np.diff(key[order]) == 0
+
+        breaks = np.where(~same | (np.diff(positions) != 1))[0] + 1
+        firsts = order[np.concatenate([[0], breaks])]
+        counts = np.diff(np.concatenate([[0], breaks, [len(order)]]))
+
+        x_pos, y_pos = self.get_positions()
+
+        return x_pos[firsts], y_pos[firsts], counts, step
+
+
+def _get_spacing(values, tolerance):
+
+    '''Smallest difference between the values larger than the tolerance,
+    or None.'''
+
+    differences = np.diff(np.sort(values))
+    differences = differences[differences > tolerance]
+
+    if not differences.size: return None
+
+    return differences.min()
+
+
+def get_lattice(dev_pos, tolerance=1e-3):
+
+    '''Detect a layout of devices on the sites of a rectangular or
+    staggered lattice, aligned with the x and y axes, with at least two rows
+    and two devices in some row. The lattice is fitted to the devices by
+    least squares.
+
+    Args:
+        dev_pos: Coordinates of the devices, as [x, y]
+        tolerance (float, optional): Largest distance of a device from its
+          lattice site
+
+    Returns:
+        Lattice, or None if the devices are not laid out on a lattice
+
+    '''
+
+    x_pos = np.asarray(dev_pos[0], dtype=float)
+    y_pos = np.asarray(dev_pos[1], dtype=float)
+
+    if len(x_pos) < 3: return None
+
+    y_spacing = _get_spacing(y_pos, tolerance)
+    if y_spacing is None: return None
+
+    rows = np.floor((y_pos - y_pos.min()) / y_spacing + 0.5).astype(int)
+    x_spacing = None
+
+    # The spacing of the devices along the rows
+    for row in np.unique(rows):
+
+        spacing = _get_spacing(x_pos[rows == row], tolerance)
+        if spacing is None: continue
+
+        if x_spacing is None or spacing < x_spacing: x_spacing = spacing
+
+    if x_spacing is None: return None
+
+    odd = rows % 2 == 1
+    x_origin = x_pos[~odd].min()
+    stagger = 0.
+
+    if odd.any(): stagger = (x_pos[odd].min() - x_origin) % x_spacing
+    if min(stagger, x_spacing - stagger) <= tolerance: stagger = 0.
+
+    cols = np.floor((x_pos - x_origin - odd * stagger) / x_spacing + 0.5)
+    cols = cols.astype(int)
+
+    if len(set(zip(rows, cols))) != len(x_pos): return None
+
+    # Refine the lattice parameters given the site of each device
+    y_origin, y_spacing = np.linalg.lstsq(
+                            np.column_stack([np.ones(len(rows)), rows]),
+                            y_pos,
+                            rcond=None)[0]
+
+    if stagger == 0.:
+        x_origin, x_spacing = np.linalg.lstsq(
+                            np.column_stack([np.ones(len(cols)), cols]),
+                            x_pos,
+                            rcond=None)[0]
+    else:
+        x_origin, x_spacing, stagger = np.linalg.lstsq(
+                            np.column_stack([np.ones(len(cols)), cols, odd]),
+                            x_pos,
+                            rcond=None)[0]
+
+    lattice = Lattice(x_origin,
+                      y_origin,
+                      x_spacing,
+                      y_spacing,
+                      stagger,
+                      rows,
+                      cols)
+
+    lattice_x, lattice_y = lattice.get_positions()
+
+    if np.hypot(lattice_x - x_pos, lattice_y - y_pos).max() > tolerance:
+        return None
+
+    return lattice
+
+
+_Family = namedtuple("_Family", ["x_origin",
+                                 "y_origin",
+                                 "x_step",
+                                 "y_step",
+                                 "n_lines",
+                                 "x_length",
+                                 "y_length",
+                                 "axis",
+                                 "low",
+                                 "high",
+                                 "end"])
+
+
+def _get_n_lines(low, high, step):
+
+    '''Number of lines started from low at intervals of step up to high,
+    counted as in functions.coll_risk.'''
+
+    if step <= 0: return 1
+
+    n = int(np.floor((high - low) / step)) + 1
+
+    while low + step * n <= high: n += 1
+    while n > 1 and low + step * (n - 1) > high: n -= 1
+
+    return n
+
+
+def _get_families(bounds, dev_dim, cur_dir):
+
+    '''The two families of parallel trajectories of functions.coll_risk.
+    Trajectories of the first family start at intervals along the x axis and
+    cross the full height of the farm, and those of the second family start
+    at intervals along the y axis and cross its full width.'''
+
+    x_min, y_min, x_max, y_max = bounds
+
+    cur_dir = cur_dir % 360
+    angle = np.deg2rad(cur_dir)
+
+    if np.sin(angle) != 0.:
+        lx = np.abs(dev_dim / np.sin(angle))
+    else:
+        lx = x_max - x_min
+
+    if np.cos(angle) != 0.:
+        ly = np.abs(dev_dim / np.cos(angle))
+    else:
+        ly = y_max - y_min
+
+    if cur_dir > 90. and cur_dir <= 270.:
+        x_start, x_end = x_max, x_min
+    else:
+        x_start, x_end = x_min, x_max
+
+    if cur_dir > 180. and cur_dir <= 360.:
+        y_start, y_end = y_max, y_min
+    else:
+        y_start, y_end = y_min, y_max
+
+    families = []
+
+    if np.tan(angle) != 0.:
+
+        families.append(_Family(x_min,
+                                y_start,
+                                2. * lx,
+                                0.,
+                                _get_n_lines(x_min, x_max, 2. * lx),
+                                (y_end - y_start) / np.tan(angle),
+                                y_end - y_start,
+                                1,
+                                y_min,
+                                y_max,
+                                y_end))
+
+    families.append(_Family(x_start,
+                            y_min,
+                            0.,
+                            2. * ly,
+                            _get_n_lines(y_min, y_max, 2. * ly),
+                            x_end - x_start,
+                            (x_end - x_start) * np.tan(angle),
+                            0,
+                            x_min,
+                            x_max,
+                            x_end))
+
+    return families
+
+
+def _get_segment_distance(x, y, family, lines):
+
+    '''Distance of points from the trajectories of a family with the given
+    indices.'''
+
+    x_start = family.x_origin + lines * family.x_step
+    y_start = family.y_origin + lines * family.y_step
+    length = family.x_length ** 2 + family.y_length ** 2
+
+    t = ((x - x_start) * family.x_length + (y - y_start) * family.y_length)
+    t = np.clip(t / length, 0., 1.) if length > 0 else np.zeros_like(t)
+
+    return np.hypot(x - x_start - t * family.x_length,
+                    y - y_start - t * family.y_length)
+
+
+def _get_trajectory(family, line):
+
+    '''The trajectory of a family with the given index, with the same
+    coordinates as in functions.coll_risk.'''
+
+    x_start = family.x_origin + line * family.x_step
+    y_start = family.y_origin + line * family.y_step
+
+    if family.axis == 1:
+        end = (x_start + family.x_length, family.end)
+    else:
+        end = (family.end, y_start + family.y_length)
+
+    return LineString([(x_start, y_start), end])
+
+
+def _get_intersects(x_pos, y_pos, family, lines, radius):
+
+    '''Test if the trajectories of a family with the given indices intersect
+    the devices at the given points, as in functions.coll_risk. Pairs which
+    are clearly apart or intersecting are decided by their distance and the
+    remainder, which includes trajectories touching a device, are tested
+    with shapely.'''
+
+    distance = _get_segment_distance(x_pos, y_pos, family, lines)
+    hits = distance < radius * _APOTHEM * (1. - _MARGIN)
+    uncertain = ~hits & (distance <= radius * (1. + _MARGIN))
+
+    for i in np.flatnonzero(uncertain):
+        device = Point(x_pos[i], y_pos[i]).buffer(radius)
+        hits[i] = device.intersects(_get_trajectory(family, lines[i]))
+
+    return hits
+
+
+def _get_normal(family):
+
+    '''Unit normal of the trajectories of a family, and the offset of the
+    first trajectory and the spacing of the trajectories along it. The
+    normal is zero for trajectories of zero length.'''
+
+    norm = np.hypot(family.x_length, family.y_length)
+
+    if norm == 0: return 0., 0., 0., 0.
+
+    x_normal = -family.y_length / norm
+    y_normal = family.x_length / norm
+
+    offset = family.x_origin * x_normal + family.y_origin * y_normal
+    spacing = family.x_step * x_normal + family.y_step * y_normal
+
+    return x_normal, y_normal, offset, spacing
+
+
+def _get_spans(starts, stops, n_lines):
+
+    '''Number of lines in the union of inclusive index ranges.'''
+
+    starts = np.maximum(starts, 0)
+    stops = np.minimum(stops, n_lines - 1)
+    valid = starts <= stops
+
+    if not valid.any(): return 0
+
+    order = np.argsort(starts[valid], kind="mergesort")
+    starts = starts[valid][order]
+    stops = stops[valid][order]
+
+    # Lines of each range not covered by a range starting earlier
+    covered = np.maximum.accumulate(stops)
+    covered = np.concatenate([[starts[0] - 1], covered[:-1]])
+
+    return int(np.maximum(stops - np.maximum(starts - 1, covered), 0).sum())
+
+
+def _get_lattice_intercepted(family, lattice, radius):
+
+    '''Number of intercepted trajectories of a family, found from the runs
+    of the lattice rather than by testing every trajectory.
+
+    Trajectories are a perpendicular distance of twice the radius apart, so
+    a device away from the ends of the trajectories intercepts the one
+    nearest to it. Along a run of adjacent devices in a row or column, the
+    index of that trajectory changes by a constant fraction per device, and
+    where the fraction is at most one, every trajectory between the ends of
+    the run is intercepted. Devices within a radius of the ends of the
+    trajectories are tested exactly.
+
+    '''
+
+    x_normal, y_normal, offset, spacing = _get_normal(family)
+
+    def get_fraction(runs):
+        step = runs[3]
+        return abs((step[0] * x_normal + step[1] * y_normal) / spacing)
+
+    # Runs along which the nearest trajectory changes slowest
+    runs = min([lattice.get_runs(True), lattice.get_runs(False)],
+               key=lambda x: (get_fraction(x) > 1., len(x[2])))
+    x_start, y_start, counts, step = runs
+
+    start_index = (x_start * x_normal + y_start * y_normal - offset) / spacing
+    fraction = (step[0] * x_normal + step[1] * y_normal) / spacing
+
+    # Devices of each run away from the ends of the trajectories
+    axis_start = x_start if family.axis == 0 else y_start
+    axis_step = step[family.axis]
+    low = family.low + radius
+    high = family.high - radius
+
+    if axis_step == 0:
+        inside = (axis_start >= low) & (axis_start <= high)
+        first = np.where(inside, 0, counts)
+        last = np.where(inside, counts - 1, -1)
+    else:
+        bounds = np.sort([(low - axis_start) / axis_step,
+                          (high - axis_start) / axis_step], axis=0)
+        first = np.maximum(np.ceil(bounds[0]), 0).astype(int)
+        last = np.minimum(np.floor(bounds[1]), counts - 1).astype(int)
+
+    starts = []
+    stops = []
+    edge_x = []
+    edge_y = []
+
+    for i in xrange(len(counts)):
+
+        if first[i] <= last[i]:
+
+            if abs(fraction) <= 1.:
+                ends = np.floor(start_index[i] + np.array([first[i],
+                                                           last[i]]) *
+                                                            fraction + 0.5)
+                starts.append(ends.min())
+                stops.append(ends.max())
+            else:
+                devices = np.arange(first[i], last[i] + 1)
+                lines = np.floor(start_index[i] + devices * fraction + 0.5)
+                starts.extend(lines)
+                stops.extend(lines)
+
+            edges = np.r_[0:min(first[i], counts[i]),
+                          max(last[i] + 1, first[i]):counts[i]]
+
+        else:
+
+            edges = np.arange(counts[i])
+
+        edge_x.extend(x_start[i] + edges * step[0])
+        edge_y.extend(y_start[i] + edges * step[1])
+
+    if edge_x:
+
+        edge_x = np.array(edge_x)
+        edge_y = np.array(edge_y)
+        nearest = np.floor((edge_x * x_normal + edge_y * y_normal - offset) /
+                                                            spacing + 0.5)
+
+        for shift in (-1, 0, 1):
+
+            lines = nearest + shift
+            valid = (lines >= 0) & (lines < family.n_lines)
+            distance = _get_segment_distance(edge_x[valid],
+                                             edge_y[valid],
+                                             family,
+                                             lines[valid])
+            hits = lines[valid][distance <= radius]
+
+            starts.extend(hits)
+            stops.extend(hits)
+
+    return _get_spans(np.array(starts, dtype=float),
+                      np.array(stops, dtype=float),
+                      family.n_lines)
+
+
+def get_lattice_collision_rate(lattice, dev_dim, cur_dir, bounds=None):
+
+    '''Fraction of the trajectories of functions.coll_risk intercepted by
+    the devices of a lattice, treating the devices as circles.
+
+    The time taken grows with the number of runs of adjacent devices along
+    the rows or columns of the lattice when the current is close to aligned
+    with them, and otherwise with the number of devices, but not with the
+    number of trajectories.
+
+    Args:
+        lattice (Lattice): Layout of the devices
+        dev_dim: Maximum horizontal size of the device
+        cur_dir: Direction of the current in degrees
+        bounds (tuple, optional): Extent of the trajectories as (x_min,
+          y_min, x_max, y_max). Defaults to the extent of the lattice.
+
+    Returns:
+        float
+
+    '''
+
+    if dev_dim <= 0:
+        errStr = "The size of the devices must be positive"
+        raise ValueError(errStr)
+
+    if bounds is None:
+        x_pos, y_pos = lattice.get_positions()
+        bounds = (x_pos.min(), y_pos.min(), x_pos.max(), y_pos.max())
+
+    n_lines = 0
+    n_intercepted = 0
+
+    for family in _get_families(bounds, dev_dim, cur_dir):
+        n_lines += family.n_lines
+        n_intercepted += _get_lattice_intercepted(family, lattice, dev_dim)
+
+    return n_intercepted / float(n_lines)
+
+
+def _get_nearest_lines(x_pos, y_pos, family):
+
+    '''Index of the trajectory of a family nearest to each device, measured
+    along the normal of the trajectories, or along the starting points of
+    trajectories of zero length.'''
+
+    x_normal, y_normal, offset, spacing = _get_normal(family)
+
+    if spacing == 0:
+
+        spacing = np.hypot(family.x_step, family.y_step)
+        if spacing == 0: return np.zeros(len(x_pos))
+
+        x_normal = family.x_step / spacing
+        y_normal = family.y_step / spacing
+        offset = family.x_origin * x_normal + family.y_origin * y_normal
+
+    return np.floor((x_pos * x_normal + y_pos * y_normal - offset) /
+                                                            spacing + 0.5)
+
+
+def _get_family_intercepted(x_pos, y_pos, family, radius):
+
+    '''Number of intercepted trajectories of a family. The trajectories are
+    a perpendicular distance of twice the radius apart, so a device can
+    only intercept the trajectory nearest to it or, where it lies halfway
+    between two trajectories, the one on either side.'''
+
+    nearest = _get_nearest_lines(x_pos, y_pos, family)
+    hit_lines = []
+
+    for shift in (-1, 0, 1):
+
+        lines = nearest + shift
+        valid = (lines >= 0) & (lines < family.n_lines)
+        hits = _get_intersects(x_pos[valid],
+                               y_pos[valid],
+                               family,
+                               lines[valid],
+                               radius)
+
+        hit_lines.append(lines[valid][hits])
+
+    return len(np.unique(np.concatenate(hit_lines)))
+
+
+def get_collision_risk(dev_pos, dev_dim, dev_height, water_dep, cur_dir):
+
+    '''Collision risk factor of functions.coll_risk, found by testing each
+    device against the trajectories nearest to it rather than every
+    trajectory against every device. The time taken grows with the number
+    of devices, but not with the number of trajectories.
+
+    Args:
+        dev_pos: Coordinates of the devices, as [x, y]
+        dev_dim: Maximum horizontal size of the device
+        dev_height: Height of device immersed in the water
+        water_dep: Minimum water depth
+        cur_dir: Direction of the current in degrees
+
+    Returns:
+        float
+
+    '''
+
+    if not dev_pos or len(dev_pos[0]) <= 1 or dev_dim <= 0:
+        return coll_risk(dev_pos, dev_dim, dev_height, water_dep, cur_dir)
+
+    x_pos = np.asarray(dev_pos[0], dtype=float)
+    y_pos = np.asarray(dev_pos[1], dtype=float)
+    bounds = (x_pos.min(), y_pos.min(), x_pos.max(), y_pos.max())
+
+    n_lines = 0
+    n_intercepted = 0
+
+    for family in _get_families(bounds, dev_dim, cur_dir):
+        n_lines += family.n_lines
+        n_intercepted += _get_family_intercepted(x_pos, y_pos, family, dev_dim)
+
+    collision_rate = n_intercepted / float(n_lines)
+    depth_factor = dev_height / float(water_dep)
+
+    return depth_factor * collision_rate
+
+
+class CollisionEstimate(object):
+
+    '''Estimate of the fraction of the trajectories of functions.coll_risk
+    which are intercepted, found by sampling the trajectories, with a bound
+    on its error which holds with the given confidence.
+
+    Attributes:
+        collision_rate (float): Estimated fraction of intercepted
+          trajectories
+        error (float): Bound on the absolute error of the collision rate,
+          zero if every trajectory was tested
+        confidence (float): Probability that the error bound holds
+        n_samples (int): Number of trajectories tested
+        n_lines (int): Total number of trajectories
+        depth_factor (float): Ratio of the immersed height of the devices to
+          the water depth
+
+    '''
+
+    def __init__(self, collision_rate,
+                       error,
+                       confidence,
+                       n_samples,
+                       n_lines,
+                       depth_factor):
+
+        self.collision_rate = collision_rate
+        self.error = error
+        self.confidence = confidence
+        self.n_samples = n_samples
+        self.n_lines = n_lines
+        self.depth_factor = depth_factor
+
+        return
+
+    def get_collision_rate(self):
+
+        return self.collision_rate
+
+    def get_bounds(self):
+
+        '''Lower and upper bounds of the collision rate.'''
+
+        return (max(self.collision_rate - self.error, 0.),
+                min(self.collision_rate + self.error, 1.))
+
+    def get_impact(self):
+
+        '''Estimated collision risk factor, as for functions.coll_risk, for
+        input to the CollisionRisk logigram.'''
+
+        return self.depth_factor * self.collision_rate
+
+
+class _Trajectories(object):
+
+    '''The trajectories of functions.coll_risk, indexed across both
+    families, with the devices sorted by their offset along the normal of
+    each family so that the devices near a trajectory can be found by
+    bisection. Intersections are tested as in functions.coll_risk.'''
+
+    def __init__(self, x_pos, y_pos, dev_dim, cur_dir):
+
+        bounds = (x_pos.min(), y_pos.min(), x_pos.max(), y_pos.max())
+
+        self.x_pos = x_pos
+        self.y_pos = y_pos
+        self.radius = dev_dim
+        self.families = _get_families(bounds, dev_dim, cur_dir)
+        self.firsts = np.cumsum([0] + [x.n_lines for x in self.families])
+        self._sorted = []
+
+        for family in self.families:
+
+            x_normal, y_normal, offset, spacing = _get_normal(family)
+            device_u = x_pos * x_normal + y_pos * y_normal
+            order = np.argsort(device_u)
+
+            self._sorted.append((order, device_u[order], offset, spacing))
+
+        return
+
+    @property
+    def n_lines(self):
+        return int(self.firsts[-1])
+
+    def get_hits(self, lines):
+
+        '''Test if the trajectories with the given indices are intercepted
+        by any device.'''
+
+        lines = np.asarray(lines)
+        hits = np.zeros(len(lines), dtype=bool)
+
+        for i, family in enumerate(self.families):
+
+            first, stop = self.firsts[i], self.firsts[i + 1]
+            in_family = (lines >= first) & (lines < stop)
+            if not in_family.any(): continue
+
+            family_lines = lines[in_family] - first
+            order, sorted_u, offset, spacing = self._sorted[i]
+
+            # Devices within a radius of each trajectory's normal offset
+            line_u = offset + family_lines * spacing
+            reach = self.radius * (1. + _MARGIN)
+            lower = np.searchsorted(sorted_u, line_u - reach, "left")
+            upper = np.searchsorted(sorted_u, line_u + reach, "right")
+            counts = upper - lower
+
+            line_index = np.repeat(np.arange(len(family_lines)), counts)
+            positions = (np.arange(counts.sum()) -
+                         np.repeat(np.cumsum(counts) - counts - lower, counts))
+            devices = order[positions]
+
+            intersects = _get_intersects(self.x_pos[devices],
+                                         self.y_pos[devices],
+                                         family,
+                                         family_lines[line_index],
+                                         self.radius)
+
+            family_hits = np.zeros(len(family_lines), dtype=bool)
+            family_hits[line_index[intersects]] = True
+            hits[in_family] = family_hits
+
+        return hits
+
+    def get_collision_rate(self, chunk_size=65536):
+
+        '''Fraction of all the trajectories which are intercepted.'''
+
+        n_hits = 0
+
+        for start in xrange(0, self.n_lines, chunk_size):
+            lines = np.arange(start, min(start + chunk_size, self.n_lines))
+            n_hits += self.get_hits(lines).sum()
+
+        return n_hits / self.n_lines
+
+
+def _get_bernstein_error(rate, n, delta):
+
+    '''Bound on the absolute error of the mean of n independent values in
+    [0, 1], with mean rate, which holds with probability 1 - delta. The
+    bound follows from Bernstein's inequality, with the variance of the
+    values bounded by mu * (1 - mu) for a true mean mu, and is the largest
+    distance from the rate to a mean which is not rejected.'''
+
+    a = np.log(2. / delta) / (3. * n)
+    variance = rate * (1. - rate)
+
+    errors = []
+
+    # Roots of d ** 2 - 2 * a * d = 6 * a * mu * (1 - mu) with mu = rate +- d
+    for sign in (1., -1.):
+
+        b = 2. * a + sign * 6. * a * (1. - 2. * rate)
+        c = 6. * a * variance
+        errors.append((b + np.sqrt(b ** 2 + 4. * (1. + 6. * a) * c)) /
+                                                        (2. * (1. + 6. * a)))
+
+    return max(min(errors[0], 1. - rate), min(errors[1], rate))
+
+
+def estimate_collision_risk(dev_pos,
+                            dev_dim,
+                            dev_height,
+                            water_dep,
+                            cur_dir,
+                            error=0.01,
+                            confidence=0.95,
+                            strata=16,
+                            seed=None):
+
+    '''Estimate the collision risk of functions.coll_risk by stratified
+    random sampling of the trajectories.
+
+    The trajectories are split into equal strata and each round of sampling
+    draws the same number of trajectories from each stratum, with the
+    number drawn growing geometrically between rounds. Sampling stops as
+    soon as a Bernstein bound on the error of the fraction of intercepted
+    trajectories meets the target. The confidence is shared between the
+    successive tests of the bound, so the final bound holds with the given
+    confidence. The number of trajectories tested depends on the target
+    error and confidence, and not on the size of the farm; if the total
+    number of trajectories is smaller, every trajectory is tested instead.
+
+    Args:
+        dev_pos: Coordinates of the devices, as [x, y]
+        dev_dim: Maximum horizontal size of the device
+        dev_height: Height of device immersed in the water
+        water_dep: Minimum water depth
+        cur_dir: Direction of the current in degrees
+        error (float, optional): Target bound on the absolute error of the
+          collision rate
+        confidence (float, optional): Probability that the bound holds
+        strata (int, optional): Number of strata
+        seed (int, optional): Random seed
+
+    Returns:
+        CollisionEstimate
+
+    '''
+
+    if error <= 0 or not 0 < confidence < 1:
+        errStr = ("The target error must be positive and the confidence "
+                  "must be between 0 and 1")
+        raise ValueError(errStr)
+
+    if dev_dim <= 0:
+        errStr = "The size of the devices must be positive"
+        raise ValueError(errStr)
+
+    depth_factor = dev_height / float(water_dep)
+
+    # As for functions.coll_risk
+    if not dev_pos or len(dev_pos[0]) <= 1:
+        return CollisionEstimate(0., 0., confidence, 0, 0, depth_factor)
+
+    x_pos = np.asarray(dev_pos[0], dtype=float)
+    y_pos = np.asarray(dev_pos[1], dtype=float)
+
+    trajectories = _Trajectories(x_pos, y_pos, dev_dim, cur_dir)
+    n_lines = trajectories.n_lines
+
+    random = np.random.RandomState(seed)
+    delta = 1. - confidence
+    edges = np.linspace(0, n_lines, strata + 1)
+
+    n_hits = 0
+    n_samples = 0
+    n_draws = 8
+    n_tests = 0
+
+    while (n_samples + n_draws * strata) < n_lines:
+
+        offsets = random.random_sample((n_draws, strata))
+        lines = np.floor(edges[:-1] + offsets * np.diff(edges)).astype(int)
+        lines = np.minimum(lines, n_lines - 1)
+
+        n_hits += trajectories.get_hits(lines.ravel()).sum()
+        n_samples += lines.size
+        rate = n_hits / n_samples
+
+        # Share the confidence between the tests as delta / (k * (k + 1))
+        n_tests += 1
+        bound = _get_bernstein_error(rate,
+                                     n_samples,
+                                     delta / (n_tests * (n_tests + 1)))
+
+        if bound <= error:
+
+            return CollisionEstimate(rate,
+                                     bound,
+                                     confidence,
+                                     n_samples,
+                                     n_lines,
+                                     depth_factor)
+
+        n_draws = max(n_draws, n_samples // (4 * strata))
+
+    return CollisionEstimate(trajectories.get_collision_rate(),
+                             0.,
+                             confidence,
+                             n_lines,
+                             n_lines,
+                             depth_factor)
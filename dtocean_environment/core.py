@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Scoring pipeline of the logigrams on NumPy arrays. The functions here take
+a compiled LogigramPlan and an array of function results and never touch
+pandas; receptor names and recommendations are returned as positions in
+the plan's receptors tuple and recommendations array.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+CoreAssessment = namedtuple("CoreAssessment", ["level",
+                                               "pressure",
+                                               "adjusted",
+                                               "recommendation",
+                                               "eis",
+                                               "receptor_scores",
+                                               "receptor_eis",
+                                               "seasons"])
+
+
+def get_pressure_scores(plan, impacts):
+
+    '''Linear interpolation of the pressure table at the given function
+    results.
+
+    Raises:
+        ValueError: if any result is outside the table
+
+    '''
+
+    levels = plan.pressure_levels
+
+    if np.any(impacts < levels[0]):
+        raise ValueError("A value in x_new is below the interpolation "
+                         "range.")
+
+    if np.any(impacts > levels[-1]):
+        raise ValueError("A value in x_new is above the interpolation "
+                         "range.")
+
+    return np.interp(impacts, levels, plan.pressure_scores)
+
+
+def get_recommendation_indices(plan, pressure):
+
+    '''Rows of the recommendations array nearest to the given pressure
+    scores.'''
+
+    distance = np.abs(plan.pressure_levels - 0.2 * pressure[:, np.newaxis])
+
+    return np.argmin(distance, axis=1)
+
+
+def get_adjusted_scores(plan, pressure):
+
+    if not plan.has_weighting: return pressure
+
+    if plan.constraint_score is None:
+
+        errStr = ("Weighting parameter '{}' has no score for function "
+                  "{}").format(plan.constraint, plan.name)
+        raise KeyError(errStr)
+
+    return pressure * plan.constraint_score
+
+
+def get_receptor_scores(plan, impacts, adjusted):
+
+    '''Receptor sensitivity scores of shape (n_impacts, n_receptors).
+    Receptors which are not observed score zero.'''
+
+    scores = np.tile(plan.receptor_scores, (len(impacts), 1))
+
+    for i, bounds in enumerate(plan.receptor_bounds):
+
+        if bounds is None or not plan.observed[i]: continue
+
+        upper_bounds, bound_scores = bounds
+        below = impacts[:, np.newaxis] < upper_bounds
+        found = below.any(axis=1)
+
+        if not found.all():
+
+            failed = impacts[~found][0]
+            errStr = ("No score was found for receptor {} corresponding to "
+                      "function result {}").format(plan.receptors[i], failed)
+            raise ValueError(errStr)
+
+        scores[:, i] = bound_scores[np.argmax(below, axis=1)]
+
+    scores[:, ~plan.observed] = 0.
+
+    return adjusted[:, np.newaxis] * scores
+
+
+def normalise_scores(sign, scores):
+
+    '''Normalise the environmental impact score
+       [-10,-90] for a negative impact
+       [10,50] for a positive impact
+    '''
+
+    if sign < 0:
+        return - 3.2 * scores - 10.
+    else:
+        return 1.6 * scores + 10.
+
+
+def get_impact_scores(plan, normalised):
+
+    '''Environmental impact scores, which are -100 for negative impacts
+    when protected species are observed.'''
+
+    if plan.protected and plan.sign < 0:
+        return np.full(normalised.shape, -100.)
+
+    return normalised
+
+
+def assess(plan, impacts, target_level=None):
+
+    '''Assess an array of function results.
+
+    Args:
+        plan (LogigramPlan): Compiled logigram
+        impacts: Function results
+        target_level (int, optional): Confidence level at which to stop
+
+    Returns:
+        CoreAssessment: arrays with a leading dimension over the impacts.
+          The receptor arrays are None below level 2 and the seasons array,
+          of shape (n_impacts, n_receptors, 12), is None below level 3.
+
+    '''
+
+    impacts = np.atleast_1d(np.asarray(impacts, dtype=float))
+
+    pressure = get_pressure_scores(plan, impacts)
+    recommendation = get_recommendation_indices(plan, pressure)
+    adjusted = get_adjusted_scores(plan, pressure)
+
+    if target_level == 1 or not plan.has_receptors:
+
+        normalised = normalise_scores(plan.sign, adjusted * 5.)
+        eis = get_impact_scores(plan, normalised)
+
+        return CoreAssessment(1,
+                              pressure,
+                              adjusted,
+                              recommendation,
+                              eis,
+                              None,
+                              None,
+                              None)
+
+    receptor_scores = get_receptor_scores(plan, impacts, adjusted)
+    normalised = normalise_scores(plan.sign, receptor_scores)
+    receptor_eis = get_impact_scores(plan, normalised)
+
+    if plan.sign > 0:
+        eis = receptor_eis.max(axis=1)
+    else:
+        eis = receptor_eis.min(axis=1)
+
+    if target_level == 2 or not plan.has_seasons:
+
+        return CoreAssessment(2,
+                              pressure,
+                              adjusted,
+                              recommendation,
+                              eis,
+                              receptor_scores,
+                              receptor_eis,
+                              None)
+
+    presence = np.where(np.isnan(plan.monthly), 1., plan.monthly)
+    seasons = normalised[:, :, np.newaxis] * presence
+
+    return CoreAssessment(3,
+                          pressure,
+                          adjusted,
+                          recommendation,
+                          eis,
+                          receptor_scores,
+                          receptor_eis,
+                          seasons)
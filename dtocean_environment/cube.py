@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Columnar results cube for large studies, holding the results of many
+scenarios for several stages in arrays with the dimensions scenario x
+stage x function (x receptor (x month)). The arrays may be memory mapped
+.npy files in a directory, which can be reopened with ResultsCube.open.
+
+The arrays are stored with the scenario dimension last, so that the results
+of a function over all scenarios are contiguous, and get_array returns
+views with the scenario dimension first.
+
+Fields:
+    eis: environmental impact score of each function
+    adjusted: adjusted pressure score of each function
+    confidence: confidence level of each function, 0 if not assessed
+    receptor_eis: environmental impact score of each receptor
+    seasons: monthly score of each receptor
+
+Scores which were not assessed are NaN.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import pickle
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+from .observations import MONTHS
+
+AXES = ["scenario", "stage", "function", "receptor", "month"]
+FIELDS = OrderedDict([("eis", 3),
+                      ("adjusted", 3),
+                      ("confidence", 3),
+                      ("receptor_eis", 4),
+                      ("seasons", 5)])
+MANIFEST = "cube.pkl"
+
+
+def get_global_eis(eis, axis=-1):
+
+    '''Global environmental impact scores of an array of function EIS,
+    reduced along the given axis or axes in the same way as Stage.__call__.
+
+    Returns:
+        dict: arrays of the reduced scores keyed as the global EIS
+
+    '''
+
+    eis = np.asarray(eis, dtype=float)
+
+    with np.errstate(invalid="ignore"):
+        negative = np.where(eis < 0, eis, np.nan)
+        positive = np.where(eis >= 0, eis, np.nan)
+
+    global_eis = {}
+
+    # Slices without scores are NaN, as for the stages
+    with warnings.catch_warnings():
+
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        global_eis["Negative Impact"] = np.nanmean(negative, axis=axis)
+        global_eis["Max Negative Impact"] = np.nanmin(negative, axis=axis)
+        global_eis["Min Negative Impact"] = np.nanmax(negative, axis=axis)
+        global_eis["Positive Impact"] = np.nanmean(positive, axis=axis)
+        global_eis["Max Positive Impact"] = np.nanmax(positive, axis=axis)
+        global_eis["Min Positive Impact"] = np.nanmin(positive, axis=axis)
+
+    return global_eis
+
+
+class ResultsCube(object):
+
+    '''Results of many scenarios for several stages.
+
+    Args:
+        scenarios (list): Scenario names
+        stages (list): Stage names
+        functions (list): Function names
+        receptors (list): Receptor names
+        dir_path (str, optional): Directory for memory mapped arrays, held
+          in memory if not given
+        dtype (optional): Floating point type of the scores
+
+    '''
+
+    def __init__(self, scenarios,
+                       stages,
+                       functions,
+                       receptors,
+                       dir_path=None,
+                       dtype=np.float32):
+
+        self.scenarios = list(scenarios)
+        self.stages = list(stages)
+        self.functions = list(functions)
+        self.receptors = list(receptors)
+        self.months = list(MONTHS)
+        self.dir_path = dir_path
+        self.dtype = np.dtype(dtype)
+        self._indices = self._init_indices()
+        self._arrays = {}
+
+        if dir_path is not None:
+
+            if not os.path.isdir(dir_path): os.makedirs(dir_path)
+
+            manifest = {"scenarios": self.scenarios,
+                        "stages": self.stages,
+                        "functions": self.functions,
+                        "receptors": self.receptors,
+                        "dtype": self.dtype.str}
+
+            with open(os.path.join(dir_path, MANIFEST), "wb") as f:
+                pickle.dump(manifest, f, pickle.HIGHEST_PROTOCOL)
+
+        for field in FIELDS:
+            self._arrays[field] = self._init_array(field)
+
+        return
+
+    def _init_indices(self):
+
+        indices = {}
+
+        for axis in AXES:
+            labels = self._get_labels(axis)
+            indices[axis] = {label: i for i, label in enumerate(labels)}
+
+        return indices
+
+    def _get_labels(self, axis):
+
+        if axis not in AXES:
+            errStr = "Unknown axis '{}'".format(axis)
+            raise ValueError(errStr)
+
+        return getattr(self, axis + "s")
+
+    def _get_shape(self, field):
+
+        # Stored with the scenario dimension last
+        axes = AXES[1:FIELDS[field]] + AXES[:1]
+
+        return tuple(len(self._get_labels(axis)) for axis in axes)
+
+    def _init_array(self, field, mode="w+"):
+
+        shape = self._get_shape(field)
+
+        if field == "confidence":
+            dtype = np.int8
+            fill = 0
+        else:
+            dtype = self.dtype
+            fill = np.nan
+
+        if self.dir_path is None: return np.full(shape, fill, dtype=dtype)
+
+        file_path = os.path.join(self.dir_path, field + ".npy")
+
+        if mode != "w+":
+            return np.load(file_path, mmap_mode=mode)
+
+        array = np.lib.format.open_memmap(file_path,
+                                          mode="w+",
+                                          dtype=dtype,
+                                          shape=shape)
+        array[:] = fill
+
+        return array
+
+    @classmethod
+    def from_stages(cls, scenarios, stages, dir_path=None, dtype=np.float32):
+
+        '''Create a cube for the functions and receptors of the given
+        stages.
+
+        Args:
+            scenarios (list): Scenario names
+            stages: OrderedDict of stages keyed by name
+
+        '''
+
+        functions = []
+        receptors = []
+
+        for stage in stages.values():
+
+            for step in stage.get_plan():
+
+                if step.name not in functions: functions.append(step.name)
+                if not step.has_receptors: continue
+
+                receptors.extend(x for x in step.receptors
+                                                    if x not in receptors)
+
+        return cls(scenarios,
+                   list(stages.keys()),
+                   functions,
+                   receptors,
+                   dir_path,
+                   dtype)
+
+    @classmethod
+    def open(cls, dir_path, mode="r"):
+
+        '''Open a cube written to the given directory, memory mapping its
+        arrays with the given mode.'''
+
+        with open(os.path.join(dir_path, MANIFEST), "rb") as f:
+            manifest = pickle.load(f)
+
+        cube = cls.__new__(cls)
+        cube.scenarios = manifest["scenarios"]
+        cube.stages = manifest["stages"]
+        cube.functions = manifest["functions"]
+        cube.receptors = manifest["receptors"]
+        cube.months = list(MONTHS)
+        cube.dir_path = dir_path
+        cube.dtype = np.dtype(manifest["dtype"])
+        cube._indices = cube._init_indices()
+        cube._arrays = {field: cube._init_array(field, mode)
+                                                        for field in FIELDS}
+
+        return cube
+
+    def get_index(self, axis, label):
+
+        '''Position of a label, or a list of positions for a list of
+        labels, along an axis.'''
+
+        self._get_labels(axis)
+        indices = self._indices[axis]
+
+        if isinstance(label, (list, tuple)):
+            return [self.get_index(axis, x) for x in label]
+
+        if label not in indices:
+            errStr = "Label '{}' not found on axis '{}'".format(label, axis)
+            raise KeyError(errStr)
+
+        return indices[label]
+
+    def fill(self, stage_name, stage, input_dicts, start=0, target_level=None):
+
+        '''Assess a batch of input dictionaries with a stage and store the
+        results from the given scenario position.'''
+
+        core_dict = stage.get_batch_core(input_dicts, target_level)
+        self.store(stage_name,
+                   stage.get_plan(),
+                   core_dict,
+                   start,
+                   len(input_dicts))
+
+        return
+
+    def store(self, stage_name, plan, core_dict, start, n_scenarios):
+
+        '''Store the results of Stage.get_batch_core for n_scenarios
+        scenarios from the given scenario position.'''
+
+        s = self.get_index("stage", stage_name)
+        rows_slice = slice(start, start + n_scenarios)
+
+        for field, array in self._arrays.iteritems():
+            array[s, ..., rows_slice] = self._get_fill(field)
+
+        for name, (rows, result) in core_dict.iteritems():
+
+            if result is None: continue
+
+            f = self.get_index("function", name)
+            rows = rows + start
+
+            self._arrays["eis"][s, f, rows] = result.eis
+            self._arrays["adjusted"][s, f, rows] = result.adjusted
+            self._arrays["confidence"][s, f, rows] = result.level
+
+            if result.receptor_eis is None: continue
+
+            step = plan[name]
+            receptors = self.get_index("receptor", list(step.receptors))
+
+            for j, r in enumerate(receptors):
+
+                self._arrays["receptor_eis"][s, f, r, rows] = \
+                                                    result.receptor_eis[:, j]
+
+                if result.seasons is None: continue
+
+                # The month axis follows the advanced indices
+                self._arrays["seasons"][s, f, r, :, rows] = \
+                                                    result.seasons[:, j, :]
+
+        return
+
+    def _get_fill(self, field):
+
+        if field == "confidence": return 0
+
+        return np.nan
+
+    def get_array(self, field):
+
+        '''View of a field with the scenario dimension first.'''
+
+        if field not in FIELDS:
+            errStr = "Unknown field '{}'".format(field)
+            raise ValueError(errStr)
+
+        return np.rollaxis(self._arrays[field], -1)
+
+    def select(self, field, **labels):
+
+        '''Slice of a field by label. Each keyword is an axis name with a
+        label or list of labels as its value, for example
+        select("eis", stage="hydrodynamics", function="Turbidity").'''
+
+        array = self.get_array(field)
+        index = [slice(None)] * array.ndim
+
+        for axis, label in labels.iteritems():
+
+            position = AXES.index(axis)
+
+            if position >= array.ndim:
+                errStr = "Field '{}' has no axis '{}'".format(field, axis)
+                raise ValueError(errStr)
+
+            index[position] = self.get_index(axis, label)
+
+        # Apply list indices one at a time to avoid broadcasting them
+        result = array
+
+        for position in reversed(range(len(index))):
+
+            item = index[position]
+            if isinstance(item, slice): continue
+
+            result = np.take(result, item, axis=position)
+
+        return result
+
+    def get_global_eis(self, axis="function"):
+
+        '''Global EIS, reducing the EIS along the given axis name or tuple
+        of axis names. Reducing along "function" reproduces the global_eis
+        of Stage.__call__ for each scenario and stage.'''
+
+        if isinstance(axis, basestring): axis = (axis,)
+
+        positions = tuple(AXES.index(x) for x in axis)
+
+        return get_global_eis(self.get_array("eis"), positions)
+
+    def get_function_seasons(self):
+
+        '''Monthly score of each function, reduced over the receptors as in
+        the seasons table of Stage.__call__.
+
+        Returns:
+            numpy.ndarray: of shape (scenario, stage, function, month)
+
+        '''
+
+        seasons = self.get_array("seasons")
+        eis = self.get_array("eis")[..., np.newaxis]
+
+        with warnings.catch_warnings():
+
+            warnings.simplefilter("ignore", RuntimeWarning)
+
+            highest = np.nanmax(seasons, axis=3)
+            lowest = np.nanmin(seasons, axis=3)
+
+        with np.errstate(invalid="ignore"):
+            function_seasons = np.where(eis >= 0, highest, lowest)
+
+        return function_seasons
+
+    def flush(self):
+
+        for array in self._arrays.values():
+            if isinstance(array, np.memmap): array.flush()
+
+        return
+
+    def _get_columns(self, field, stage=None):
+
+        array = self._arrays[field]
+        stages = self.stages if stage is None else [stage]
+
+        for stage_name in stages:
+
+            s = self.get_index("stage", stage_name)
+
+            for index in np.ndindex(*array.shape[1:-1]):
+
+                labels = [stage_name]
+
+                for axis, i in zip(AXES[2:], index):
+                    labels.append(self._get_labels(axis)[i])
+
+                yield "/".join(labels), array[(s,) + index]
+
+        return
+
+    def to_arrow(self, field="eis", stage=None):
+
+        '''Table of a field with a row for each scenario and a column for
+        each stage, function, receptor and month, named as their labels
+        joined by "/". Columns are contiguous in the cube, so pyarrow can
+        share their memory. Requires pyarrow.'''
+
+        import pyarrow as pa
+
+        names = ["scenario"]
+        arrays = [pa.array(self.scenarios)]
+
+        for name, column in self._get_columns(field, stage):
+            names.append(name)
+            arrays.append(pa.array(column))
+
+        return pa.Table.from_arrays(arrays, names)
+
+    def to_parquet(self, path, field="eis", stage=None):
+
+        '''Write a field as a Parquet file. Requires pyarrow.'''
+
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(field, stage), path)
+
+        return
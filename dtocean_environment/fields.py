@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Magnetic and induced electric fields of buried array and export cables,
+calculated on a grid of receptor points, for the MagneticFields and
+ElectricFields logigrams.
+
+Each cable is a polyline of straight segments carrying its net current at a
+constant burial depth. The magnetic field of each segment follows the
+Biot-Savart law for a finite straight conductor and the fields of all
+segments are summed as vectors. The induced electric field is the motional
+field, v x B, of the water flowing through the magnetic field.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+import numpy as np
+
+MU_0 = 4e-7 * np.pi
+
+
+def get_segments(cables, currents, burial_depths):
+
+    '''Convert cable polylines into arrays of segment start points, end
+    points and currents. Coordinates are 3D with the seabed at z = 0.'''
+
+    if not len(cables) == len(currents) == len(burial_depths):
+        errStr = ("A current and burial depth must be given for every "
+                  "cable")
+        raise ValueError(errStr)
+
+    starts = []
+    ends = []
+    segment_currents = []
+
+    for coords, current, depth in zip(cables, currents, burial_depths):
+
+        coords = np.asarray(coords, dtype=float)
+
+        if coords.ndim != 2 or len(coords) < 2:
+            errStr = "Cables must have at least two (x, y) vertices"
+            raise ValueError(errStr)
+
+        points = np.column_stack([coords[:, :2],
+                                  -depth * np.ones(len(coords))])
+
+        starts.append(points[:-1])
+        ends.append(points[1:])
+        segment_currents.append(current * np.ones(len(coords) - 1))
+
+    return (np.concatenate(starts),
+            np.concatenate(ends),
+            np.concatenate(segment_currents))
+
+
+def get_magnetic_field(starts, ends, currents, points, max_elements=2 ** 22):
+
+    '''Magnetic flux density vectors (T) at the given 3D points, summed over
+    the straight segments, processed in tiles of points so that at most
+    max_elements segment-point pairs are held at once.'''
+
+    points = np.asarray(points, dtype=float)
+    field = np.zeros(points.shape)
+
+    lx, ly, lz = [(ends - starts)[:, [i]] for i in range(3)]
+    sx, sy, sz = [starts[:, [i]] for i in range(3)]
+    ex, ey, ez = [ends[:, [i]] for i in range(3)]
+    coefficient = MU_0 * currents[:, np.newaxis] / (4 * np.pi)
+
+    tile = max(max_elements // max(len(starts), 1), 1)
+
+    for first in xrange(0, len(points), tile):
+
+        px, py, pz = [points[first:first + tile, i] for i in range(3)]
+
+        # Vectors from the segment start (a) and end (b) to the points
+        ax, ay, az = px - sx, py - sy, pz - sz
+        bx, by, bz = px - ex, py - ey, pz - ez
+
+        cx = ly * az - lz * ay
+        cy = lz * ax - lx * az
+        cz = lx * ay - ly * ax
+        cross_sq = cx * cx + cy * cy + cz * cz
+
+        a_norm = np.sqrt(ax * ax + ay * ay + az * az)
+        b_norm = np.sqrt(bx * bx + by * by + bz * bz)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+
+            scale = ((lx * ax + ly * ay + lz * az) / a_norm -
+                     (lx * bx + ly * by + lz * bz) / b_norm) / cross_sq
+
+        # Points on the conductor axis have no defined field
+        scale[~np.isfinite(scale)] = 0.
+        scale *= coefficient
+
+        field[first:first + tile, 0] = (cx * scale).sum(axis=0)
+        field[first:first + tile, 1] = (cy * scale).sum(axis=0)
+        field[first:first + tile, 2] = (cz * scale).sum(axis=0)
+
+    return field
+
+
+def get_cable_fields(cables,
+                     currents,
+                     burial_depths,
+                     x,
+                     y,
+                     height=0.,
+                     velocity=None,
+                     max_elements=2 ** 22):
+
+    '''Calculate the magnetic and induced electric field magnitudes of a
+    cable network on a grid of receptor points.
+
+    Args:
+        cables (list): Sequences of (x, y) vertices of each cable
+        currents (list): Net current (A) of each cable
+        burial_depths (list): Burial depth (m) of each cable
+        x, y: Coordinates of the receptor points
+        height (float, optional): Height of the receptors above the seabed
+        velocity (tuple, optional): Water velocity (u, v) in m/s
+        max_elements (int, optional): Maximum segment-point pairs per tile
+
+    Returns:
+        tuple: magnetic field magnitude (uT) and induced electric field
+          magnitude (uV/m), shaped as x
+
+    '''
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    starts, ends, segment_currents = get_segments(cables,
+                                                  currents,
+                                                  burial_depths)
+
+    points = np.column_stack([x.ravel(),
+                              y.ravel(),
+                              height * np.ones(x.size)])
+
+    field = get_magnetic_field(starts,
+                               ends,
+                               segment_currents,
+                               points,
+                               max_elements)
+
+    magnetic = np.sqrt((field ** 2).sum(axis=1)) * 1e6
+
+    if velocity is None:
+
+        electric = np.zeros(x.size)
+
+    else:
+
+        flow = np.array([velocity[0], velocity[1], 0.])
+        electric = np.sqrt((np.cross(flow, field) ** 2).sum(axis=1)) * 1e6
+
+    return magnetic.reshape(x.shape), electric.reshape(x.shape)
+
+
+def get_exceedance(field, threshold, weights=None, percentiles=(50, 95)):
+
+    '''Statistics of the exceedance of a threshold by a field on a grid.
+
+    Args:
+        field: Field values at the grid points
+        threshold (float): Threshold value
+        weights (optional): Weight of each point, e.g. cell area or receptor
+          density
+        percentiles (optional): Percentiles of the field to report
+
+    Returns:
+        dict: weighted fraction of points exceeding the threshold
+          ("fraction"), the maximum ("max") and the given percentiles
+          (e.g. "p95")
+
+    '''
+
+    field = np.asarray(field, dtype=float).ravel()
+
+    if weights is None:
+        weights = np.ones(field.size)
+    else:
+        weights = np.asarray(weights, dtype=float).ravel()
+
+    exceeds = field > threshold
+
+    stats = {"fraction": weights[exceeds].sum() / weights.sum(),
+             "max": field.max()}
+
+    for percentile in percentiles:
+        key = "p{:g}".format(percentile)
+        stats[key] = np.percentile(field, percentile)
+
+    return stats
+
+
+def get_field_inputs(magnetic,
+                     electric,
+                     initial_magnetic,
+                     initial_electric,
+                     percentile=100.):
+
+    '''Inputs to the MagneticFields and ElectricFields logigrams. The measured
+    fields are the initial (background) fields plus the given percentile of
+    the cable field magnitudes over the grid, by default the maximum.'''
+
+    input_dict = {
+        "Initial Magnetic Field": initial_magnetic,
+        "Measured Magnetic Field": initial_magnetic +
+                                        np.percentile(magnetic, percentile),
+        "Initial Electric Field": initial_electric,
+        "Measured Electric Field": initial_electric +
+                                        np.percentile(electric, percentile)}
+
+    return input_dict
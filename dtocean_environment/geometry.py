@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Seabed footprint of anchors, foundations and cable corridors, computed from
+their geometries without double counting overlaps.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from collections import OrderedDict
+from numbers import Integral
+
+import pandas as pd
+from shapely.ops import unary_union
+from shapely.strtree import STRtree
+
+
+def _query_tree(tree, geometry, index_map):
+
+    # Shapely 2 returns the indices of the candidate geometries, whereas
+    # earlier versions return the geometries themselves
+    for candidate in tree.query(geometry):
+
+        if isinstance(candidate, Integral):
+            yield int(candidate)
+        else:
+            yield index_map[id(candidate)]
+
+
+def get_intersecting_pairs(geometries):
+
+    '''Pairs of intersecting geometries, using an STRtree to find candidate
+    pairs rather than testing all pairs.
+
+    Returns:
+        list: (i, j) index pairs into geometries, with i < j
+
+    '''
+
+    geometries = list(geometries)
+
+    if not geometries: return []
+
+    tree = STRtree(geometries)
+    index_map = {id(geometry): i for i, geometry in enumerate(geometries)}
+    pairs = []
+
+    for i, geometry in enumerate(geometries):
+
+        for j in _query_tree(tree, geometry, index_map):
+
+            if j <= i or not geometry.intersects(geometries[j]): continue
+
+            pairs.append((i, j))
+
+    return sorted(pairs)
+
+
+def get_clusters(geometries):
+
+    '''Group geometries into clusters of mutually intersecting geometries,
+    see get_intersecting_pairs.
+
+    Returns:
+        list: lists of indices into geometries
+
+    '''
+
+    geometries = list(geometries)
+
+    if not geometries: return []
+
+    parents = range(len(geometries))
+
+    def find(i):
+
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+
+        return i
+
+    for i, j in get_intersecting_pairs(geometries):
+
+        root_i = find(i)
+        root_j = find(j)
+
+        if root_i != root_j: parents[root_j] = root_i
+
+    clusters = OrderedDict()
+
+    for i in xrange(len(geometries)):
+        clusters.setdefault(find(i), []).append(i)
+
+    return clusters.values()
+
+
+def get_union(geometries):
+
+    '''Overlap free union of the given geometries, computed as the cascaded
+    union of each cluster of intersecting geometries.
+
+    Returns:
+        list: the union of each cluster
+
+    '''
+
+    geometries = list(geometries)
+    clusters = get_clusters(geometries)
+
+    unions = []
+
+    for cluster in clusters:
+
+        if len(cluster) == 1:
+            unions.append(geometries[cluster[0]])
+        else:
+            unions.append(unary_union([geometries[i] for i in cluster]))
+
+    return unions
+
+
+def get_covered_area(geometries):
+
+    '''Area covered by the given geometries, counting overlaps once.'''
+
+    return sum(x.area for x in get_union(geometries))
+
+
+def get_footprint_areas(components, buffers=None, order=None):
+
+    '''Covered seabed area of collections of component geometries.
+
+    The marginal area of each component type depends on the order in which
+    the types are added. This is the order of the keys of components if it
+    is an OrderedDict, the given order, or otherwise the sorted order of the
+    component types.
+
+    Args:
+        components (dict): Lists of shapely geometries keyed by component
+          type, e.g. "anchors", "foundations" or "cables"
+        buffers (dict, optional): Buffer distances keyed by component type,
+          such as the half width of cable corridors for line geometries
+        order (list, optional): Component types in the order they are added
+
+    Returns:
+        tuple: total covered area and a DataFrame indexed by component type
+          giving the covered area of each type ("area") and the additional
+          area covered by each type when added in order ("marginal area")
+
+    '''
+
+    if buffers is None: buffers = {}
+
+    if order is None:
+
+        if isinstance(components, OrderedDict):
+            order = components.keys()
+        else:
+            order = sorted(components.keys())
+
+    elif sorted(order) != sorted(components.keys()):
+
+        errStr = ("The order must contain each component type once. "
+                  "Given order: {}").format(", ".join(order))
+        raise ValueError(errStr)
+
+    buffered = OrderedDict()
+
+    for component_type in order:
+
+        geometries = components[component_type]
+        distance = buffers.get(component_type)
+
+        if distance:
+            geometries = [x.buffer(distance) for x in geometries]
+        else:
+            geometries = list(geometries)
+
+        buffered[component_type] = geometries
+
+    areas = []
+    marginal_areas = []
+    previous = []
+    previous_area = 0.
+
+    for geometries in buffered.itervalues():
+
+        type_union = get_union(geometries)
+        areas.append(sum(x.area for x in type_union))
+
+        previous = get_union(previous + type_union)
+        total_area = sum(x.area for x in previous)
+        marginal_areas.append(total_area - previous_area)
+        previous_area = total_area
+
+    breakdown = pd.DataFrame({"area": areas,
+                              "marginal area": marginal_areas},
+                             index=buffered.keys(),
+                             columns=["area", "marginal area"])
+
+    return previous_area, breakdown
+
+
+def get_footprint_inputs(components, total_area, buffers=None):
+
+    '''Inputs to the Footprint logigram given component geometries and the
+    total surface area of the farm.'''
+
+    covered_area, _ = get_footprint_areas(components, buffers)
+
+    input_dict = {"Surface Area Covered": covered_area,
+                  "Total Surface Area": total_area}
+
+    return input_dict
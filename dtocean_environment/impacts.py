@@ -25,7 +25,6 @@ Created on Wed Jul 15 11:44:29 2015
 """
 
 from .functions import (footprint,
-                        coll_risk,
                         coll_risk_vessel,
                         chempoll_risk,
                         turbidity,
@@ -38,7 +37,10 @@ from .functions import (footprint,
                         reserve_eff,
                         restplace)
                         
+from .collision import get_collision_risk
+from .geometry import get_footprint_inputs
 from .logigram import Logigram
+from .noise import get_grid_noise_inputs
 
 
 class EnergyModification(Logigram):
@@ -73,13 +75,12 @@ class EnergyModification(Logigram):
         
         return ["Energy Modification"]
         
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         energy_impact = energy_mod(inputs_dict["Energy Modification"])
 
-        result = self._calculate_score(energy_impact)
-                             
-        return result
+        return energy_impact
 
 
 class Footprint(Logigram):
@@ -114,13 +115,22 @@ class Footprint(Logigram):
         
         return ["Surface Area Covered", "Total Surface Area"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         footprint_impact = footprint(inputs_dict["Surface Area Covered"],
                                      inputs_dict["Total Surface Area"])
 
-        result = self._calculate_score(footprint_impact)     
-                                                             
+        return footprint_impact
+        
+    def get_geometry_assessment(self, components, total_area, buffers=None):
+        
+        '''Assess the footprint of collections of component geometries, see
+        geometry.get_footprint_areas.'''
+        
+        inputs_dict = get_footprint_inputs(components, total_area, buffers)
+        result = self(inputs_dict)
+        
         return result
 
 
@@ -160,17 +170,34 @@ class CollisionRisk(Logigram):
                 "Water Depth",
                 "Current Direction"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
-        collision_impact = coll_risk(
+        collision_impact = get_collision_risk(
                                 inputs_dict["Coordinates of the Devices"],
                                 inputs_dict["Size of the Devices"],
                                 inputs_dict["Immersed Height of the Devices"],
                                 inputs_dict["Water Depth"],
                                 inputs_dict["Current Direction"])
 
-        result = self._calculate_score(collision_impact)     
-                                                             
+        return collision_impact
+        
+    def get_raster_assessment(self, raster):
+        
+        '''Assess a collision.CollisionRaster, reduced to its scalar
+        collision risk factor.'''
+        
+        result = self._calculate_score(raster.get_impact())
+        
+        return result
+        
+    def get_estimate_assessment(self, estimate):
+        
+        '''Assess a collision.CollisionEstimate, reduced to its estimated
+        collision risk factor.'''
+        
+        result = self._calculate_score(estimate.get_impact())
+        
         return result
 
 
@@ -208,16 +235,15 @@ class CollisionRiskVessel(Logigram):
                 "Size of Vessels",
                 "Total Surface Area"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         collision_impact = coll_risk_vessel(
                                 inputs_dict["Number of Vessels"],
                                 inputs_dict["Size of Vessels"],
                                 inputs_dict["Total Surface Area"])
 
-        result = self._calculate_score(collision_impact)     
-                                                             
-        return result
+        return collision_impact
 
 
 class ChemicalPollution(Logigram):
@@ -252,13 +278,12 @@ class ChemicalPollution(Logigram):
         
         return ["Import of Chemical Polutant"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
 
         chempollution_impact = chempoll_risk(inputs_dict["Import of Chemical Polutant"])
 
-        result = self._calculate_score(chempollution_impact)     
-                                                             
-        return result
+        return chempollution_impact
         
 class Turbidity(Logigram):
 
@@ -293,15 +318,14 @@ class Turbidity(Logigram):
         return ["Initial Turbidity",
                 "Measured Turbidity"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         turbidity_impact = turbidity(
                                 inputs_dict["Initial Turbidity"],
                                 inputs_dict["Measured Turbidity"])
 
-        result = self._calculate_score(turbidity_impact)
-                               
-        return result
+        return turbidity_impact
         
 class UnderwaterNoise(Logigram):
 
@@ -336,14 +360,23 @@ class UnderwaterNoise(Logigram):
         return ["Initial Noise dB re 1muPa",
                 "Measured Noise dB re 1muPa"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         underwaternoise_impact = undwater_noise(
                                     inputs_dict["Initial Noise dB re 1muPa"],
                                     inputs_dict["Measured Noise dB re 1muPa"])
 
-        result = self._calculate_score(underwaternoise_impact)     
-                                                             
+        return underwaternoise_impact
+        
+    def get_grid_assessment(self, levels, initial_noise, percentile=100.):
+        
+        '''Assess a grid of received noise levels, see
+        noise.get_grid_noise_inputs.'''
+        
+        inputs_dict = get_grid_noise_inputs(levels, initial_noise, percentile)
+        result = self(inputs_dict)
+        
         return result
         
 class ElectricFields(Logigram):
@@ -379,15 +412,14 @@ class ElectricFields(Logigram):
         return ["Initial Electric Field",
                 "Measured Electric Field"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         electricfield_impact = electric_imp(
                                 inputs_dict["Initial Electric Field"],
                                 inputs_dict["Measured Electric Field"])
 
-        result = self._calculate_score(electricfield_impact)     
-                                                             
-        return result
+        return electricfield_impact
 
 
 class MagneticFields(Logigram):
@@ -423,15 +455,14 @@ class MagneticFields(Logigram):
         return ["Initial Magnetic Field",
                 "Measured Magnetic Field"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         magneticfield_impact = magnetic_imp(
                                 inputs_dict["Initial Magnetic Field"],
                                 inputs_dict["Measured Magnetic Field"])
 
-        result = self._calculate_score(magneticfield_impact)     
-                                                             
-        return result
+        return magneticfield_impact
 
 
 class TemperatureModification(Logigram):
@@ -467,15 +498,14 @@ class TemperatureModification(Logigram):
         return ["Initial Temperature",
                 "Measured Temperature"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         temperaturemodificaton_impact = temperature_mod(
                                 inputs_dict["Initial Temperature"],
                                 inputs_dict["Measured Temperature"])
 
-        result = self._calculate_score(temperaturemodificaton_impact)     
-                                                             
-        return result
+        return temperaturemodificaton_impact
         
 class ReserveEffect(Logigram):
 
@@ -510,15 +540,14 @@ class ReserveEffect(Logigram):
         return ["Fishery Restriction Surface",
                 "Total Surface Area"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         reserveeffect_impact = reserve_eff(
                                 inputs_dict["Fishery Restriction Surface"],
                                 inputs_dict["Total Surface Area"])
 
-        result = self._calculate_score(reserveeffect_impact)     
-                                                             
-        return result
+        return reserveeffect_impact
         
 class ReefEffect(Logigram):
 
@@ -554,16 +583,15 @@ class ReefEffect(Logigram):
                 "Surface Area of Underwater Part",
                 "Number of Objects"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         reefeffect_impact = reef_eff(
                                 inputs_dict["Total Surface Area"],
                                 inputs_dict["Surface Area of Underwater Part"],
                                 inputs_dict["Number of Objects"])
 
-        result = self._calculate_score(reefeffect_impact)     
-                                                             
-        return result
+        return reefeffect_impact
         
 class RestingPlace(Logigram):
 
@@ -599,13 +627,12 @@ class RestingPlace(Logigram):
                 "Number of Objects",
                 "Total Surface Area"]
 
-    def __call__(self, inputs_dict):
+    @classmethod
+    def get_impact(cls, inputs_dict):
                            
         restingplace_impact = restplace(
                                 inputs_dict["Object Emerged Surface"],
                                 inputs_dict["Number of Objects"],
                                 inputs_dict["Total Surface Area"])
 
-        result = self._calculate_score(restingplace_impact)     
-                                                             
-        return result
+        return restingplace_impact
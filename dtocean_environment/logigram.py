@@ -32,17 +32,24 @@ from collections import OrderedDict
 
 import pandas as pd
 import numpy as np
-from scipy.interpolate import interp1d
 from polite.abc import abstractclassmethod
 
+from .core import (assess,
+                   get_pressure_scores,
+                   get_recommendation_indices,
+                   normalise_scores)
+from .observations import MONTHS, Observations
+from .plan import LogigramPlan, ReadOnly
 
-class Score(object):
+
+class Score(ReadOnly):
     
     __metaclass__ = abc.ABCMeta
     
     def __init__(self, data_path):
         
         self._table = self._init_table(data_path)
+        self._set_read_only()
         
         return
         
@@ -68,9 +75,13 @@ class Score(object):
         
     def get_column(self, column, idx=None):
         
+        '''Values of a column, returned as a copy so that the table can not
+        be changed once read.'''
+        
         result = self._table[column]
         
         if idx is not None: result = result.loc[idx];
+        if isinstance(result, pd.Series): result = result.copy();
             
         return result
         
@@ -144,6 +155,111 @@ class ReceptorScore(Score):
         return result
 
         
+
+def check_target_level(target_level):
+    
+    if target_level is None or target_level in (1, 2, 3): return
+    
+    errStr = ("Target confidence level must be 1, 2, 3 or None. Received "
+              "{}").format(target_level)
+    raise ValueError(errStr)
+
+
+def get_assessment(plan, impact, target_level=None):
+    
+    '''Assessment of a function result by a compiled logigram.'''
+    
+    check_target_level(target_level)
+    
+    result = assess(plan, impact, target_level)
+    assessment = get_core_assessment(plan, result)
+    
+    return assessment
+
+
+def get_core_assessment(plan, result, i=0):
+    
+    '''Assessment of the function result at position i of a CoreAssessment
+    produced by the compiled logigram.'''
+    
+    pressure_score = float(result.pressure[i])
+    adjusted_pressure_score = result.adjusted[i]
+    environmental_impact_score = result.eis[i]
+    pressure_recommendations = _get_recommendation_dict(
+                                                plan,
+                                                result.recommendation[i])
+    
+    if plan.has_weighting:
+        constraint = plan.constraint
+    else:
+        constraint = None
+    
+    # Bifurcation. Finish if there is no receptor information.
+    if result.level == 1:
+        
+        assessment = Assessment(pressure_score,
+                                adjusted_pressure_score,
+                                constraint,
+                                environmental_impact_score,
+                                pressure_recommendations)
+                
+        return assessment
+    
+    species_list = list(plan.receptors)
+    score_list = list(result.receptor_scores[i])
+    eis_list = list(result.receptor_eis[i])
+    
+    if result.seasons is None:
+        
+        seasonal_score = None
+        
+    else:
+        
+        seasonal_score = pd.DataFrame(result.seasons[i],
+                                      index=species_list,
+                                      columns=MONTHS)
+        
+    assessment = Assessment(pressure_score,
+                            adjusted_pressure_score,
+                            constraint,
+                            environmental_impact_score,
+                            pressure_recommendations,
+                            species_list,
+                            score_list,
+                            eis_list,
+                            seasonal_score)
+            
+    return assessment
+
+
+def _get_recommendation_dict(plan, idx):
+    
+    rec1, rec2, rec3 = plan.recommendations[idx]
+
+    rec_dict = {}
+    
+    rec_dict["Generic Explanation"] = rec1
+    rec_dict["General Recommendation"] = rec2
+    rec_dict["Detailed Recommendation"] = rec3
+
+    return rec_dict
+
+
+def _get_bounded_score(receptor, impact, upper_bounds, scores):
+    
+    '''Score of the first impact bound above the given impact.'''
+    
+    above = np.flatnonzero(impact < upper_bounds)
+    
+    if not above.size:
+        
+        errStr = ("No score was found for receptor {} corresponding to "
+                  "function result {}").format(receptor, impact)
+        raise ValueError(errStr)
+        
+    return scores[above[0]]
+
+        
 class Assessment(object):
     
     def __init__(self, pressure_score,
@@ -232,28 +348,43 @@ class Assessment(object):
         return self.score_history["Pressure Recommendations"]
 
 
-class Logigram(object):
+class Logigram(ReadOnly):
     
     __metaclass__ = abc.ABCMeta
     
     def __init__(self, data_dir_path,
                        protected_observations=None,
                        receptor_observations=None,
-                       weighting_parameter=None):
+                       weighting_parameter=None,
+                       observations=None,
+                       score_tables=None):
         
         self._pressure_score = None
         self._weighting_score = None
         self._receptor_score = None
-        self._protected_table = None
-        self._receptor_table = None
+        self._observations = None
+        self._receptor_index = None
         self._weighting_parameter = None
-        
-        self._pressure_score = self._init_pressure_score(data_dir_path)
-        self._weighting_score = self._init_weighting_score(data_dir_path)
-        self._receptor_score = self._init_receptor_score(data_dir_path)
-        self._protected_table = protected_observations       
-        self._receptor_table = self._init_receptor_table(receptor_observations)
+        self._plan = None
+        
+        if observations is None:
+            observations = Observations(protected_observations,
+                                        receptor_observations)
+        
+        # Score tables are read-only, so may be shared between logigrams
+        if score_tables is None:
+            score_tables = (self._init_pressure_score(data_dir_path),
+                            self._init_weighting_score(data_dir_path),
+                            self._init_receptor_score(data_dir_path))
+        
+        (self._pressure_score,
+         self._weighting_score,
+         self._receptor_score) = score_tables
+        self._observations = observations
+        self._receptor_index = self._init_receptor_index()
         self._weighting_parameter = weighting_parameter
+        self._plan = self._init_plan()
+        self._set_read_only()
         
         return
 
@@ -281,6 +412,11 @@ class Logigram(object):
     def get_required_inputs(cls):
         
         raise NotImplementedError
+    
+    @abstractclassmethod
+    def get_impact(cls, inputs_dict):
+        
+        raise NotImplementedError
         
     def _init_pressure_score(self, dir_path):
         
@@ -304,42 +440,141 @@ class Logigram(object):
                        
         return receptor_score
         
-    def _init_receptor_table(self, receptor_observations):
+    def _init_receptor_index(self):
         
-        if receptor_observations is None: return None;
+        '''Positions of the receptors of this function in the shared
+        observation arrays.'''
+        
+        if not self._observations.has_receptors(): return None;
         if self._receptor_score.is_empty(): return None;
         
-        # Check that the observations are sufficient and filter if over
-        # specified            
-        given_set = set(receptor_observations.index)
-        needed_set = set(self._receptor_score.get_index())
+        names = self._receptor_score.get_index().unique()
+        receptor_index = self._observations.get_indices(
+                                                    names,
+                                                    self.get_function_name())
+        
+        return receptor_index
+        
+    def _init_plan(self):
+        
+        '''Compile the score tables and observations into arrays.'''
+        
+        levels = np.asarray(self._pressure_score.get_index(), dtype=float)
+        order = np.argsort(levels, kind="mergesort")
+        
+        pressure_levels = levels[order]
+        pressure_scores = self._pressure_score.get_score().values.astype(
+                                                                float)[order]
+        recommendations = np.column_stack([
+                self._pressure_score.get_genericexplanation().values,
+                self._pressure_score.get_generalrecommendation().values,
+                self._pressure_score.get_detailedrecommendation().values
+                                                                ])[order]
+        
+        for array in (pressure_levels, pressure_scores, recommendations):
+            array.setflags(write=False)
+        
+        constraint = self._weighting_parameter
+        constraint_score = self._init_constraint_score()
+        
+        receptors = None
+        observed = None
+        receptor_scores = None
+        receptor_bounds = None
+        monthly = None
+        
+        if self._receptor_index is not None:
+            
+            receptors = tuple(self._observations.get_species(
+                                                        self._receptor_index))
+            observed = self._observations.get_observed(self._receptor_index)
+            monthly = self._observations.get_monthly(self._receptor_index)
+            
+            receptor_scores = np.empty(len(receptors))
+            receptor_bounds = []
+            
+            for i, receptor in enumerate(receptors):
+                
+                score = self._receptor_score.get_score(receptor)
+                
+                if isinstance(score, pd.Series):
+                    
+                    bounds = self._receptor_score.get_column("upper bound",
+                                                             receptor)
+                    receptor_scores[i] = np.nan
+                    receptor_bounds.append((bounds.values.astype(float),
+                                            score.values.astype(float)))
+                    
+                else:
                     
-        if given_set <= needed_set:
+                    receptor_scores[i] = score
+                    receptor_bounds.append(None)
             
-            missing_keys = list(needed_set - given_set)
-           
-            need_str = " ,".join(missing_keys)
-            errStr = ("Observation data for all receptors of {} must be "
-                      "given. Missing are: {}").format(
-                                                    self.get_function_name(),
-                                                    need_str)
-    
-            raise KeyError(errStr)
+            receptor_bounds = tuple(receptor_bounds)
+            
+            arrays = [observed, monthly, receptor_scores]
+            
+            for bounds in receptor_bounds:
+                if bounds is not None: arrays.extend(bounds)
+            
+            for array in arrays:
+                array.setflags(write=False)
+        
+        plan = LogigramPlan(self.get_function_name(),
+                            self.get_impact,
+                            tuple(self.get_required_inputs()),
+                            self.impact_sign,
+                            pressure_levels,
+                            pressure_scores,
+                            recommendations,
+                            constraint,
+                            constraint_score,
+                            receptors,
+                            observed,
+                            receptor_scores,
+                            receptor_bounds,
+                            monthly,
+                            self._observations.is_protected_observed())
+        
+        return plan
+        
+    def _init_constraint_score(self):
+        
+        '''Score of the weighting parameter, or None if it can not be found,
+        in which case get_adjusted_pressure_score raises its error when the
+        logigram is called.'''
+        
+        if self._weighting_parameter is None: return None;
+        
+        try:
+            adjusted = self.get_adjusted_pressure_score(1.)
+        except KeyError:
+            return None
             
-        receptor_table = receptor_observations.loc[needed_set]
+        if adjusted is None: return None;
+        
+        return adjusted[0]
+        
+    def get_plan(self):
         
-        return receptor_table
+        return self._plan
+    
+    def get_score_tables(self):
+        
+        '''The pressure, weighting and receptor score tables, which do not
+        depend on the observations and can be given to other logigrams of
+        the same class.'''
+        
+        return (self._pressure_score,
+                self._weighting_score,
+                self._receptor_score)
 
     def get_pressure_score(self, impact):
         
         '''Linear interpolation of the impact given by the corresponding
         environmental function between the scores stored in local tables'''
         
-        impact_levels = self._pressure_score.get_index()
-        impact_scores = self._pressure_score.get_score()
-
-        f1_int = interp1d(impact_levels, impact_scores)
-        f_score = f1_int(impact)
+        f_score = get_pressure_scores(self._plan, impact)
 
         return float(f_score)
     
@@ -366,23 +601,23 @@ class Logigram(object):
         '''Procedure which extracts receptor scores from the 'active' tables
         and multiplies by the weighted score giving it back.'''
         
-        if self._receptor_table is None: return None;
+        plan = self._plan
+        
+        if not plan.has_receptors: return None;
             
         receptor_sensitivity_scores = {}
                 
-        for receptor in self._receptor_score.get_index():
+        for i, receptor in enumerate(plan.receptors):
 
-            if not self._receptor_table.loc[receptor, "observed"]:
+            if not plan.observed[i]:
                 receptor_score = 0
+            elif plan.receptor_bounds[i] is None:
+                receptor_score = plan.receptor_scores[i]
             else:
-                receptor_score = self._receptor_score.get_score(receptor)
-            
-            # Modification for receptor scores modified by impact value.
-            if isinstance(receptor_score, pd.Series):
-                
-                receptor_score = self._receptor_score.get_impact_score(
-                                                                    receptor,
-                                                                    impact)
+                # Modification for receptor scores modified by impact value.
+                receptor_score = _get_bounded_score(receptor,
+                                                    impact,
+                                                    *plan.receptor_bounds[i])
             
             combined_score = pressure_score * receptor_score
             receptor_sensitivity_scores[receptor] = combined_score
@@ -395,21 +630,9 @@ class Logigram(object):
         '''Recomendations corresponding to the nearest pressure score
         '''
 
-        impact_levels = self._pressure_score.get_index()
-        
-        
-        rec1 = self._pressure_score.get_genericexplanation()
-        rec2 = self._pressure_score.get_generalrecommendation()
-        rec3 = self._pressure_score.get_detailedrecommendation()
-
         # nearest pressure score
-        idx = impact_levels[np.argmin(np.abs(impact_levels.values - 0.2*impact))]
-
-        rec_dict = {}
-        
-        rec_dict["Generic Explanation"] = rec1[idx]
-        rec_dict["General Recommendation"] = rec2[idx]
-        rec_dict["Detailed Recommendation"] = rec3[idx]
+        idx = get_recommendation_indices(self._plan, np.array([impact]))[0]
+        rec_dict = _get_recommendation_dict(self._plan, idx)
 
         return rec_dict
 
@@ -421,10 +644,7 @@ class Logigram(object):
            [10,50] for a positive impact
         '''
         
-        if self.impact_sign < 0:
-            mapped_score = - 3.2 * score - 10.
-        else:
-            mapped_score = 1.6 * score + 10.
+        mapped_score = normalise_scores(self.impact_sign, score)
             
         return mapped_score
 
@@ -433,7 +653,7 @@ class Logigram(object):
         
         '''Test for protected species'''
         
-        if any(self._protected_table["observed"]) and self.impact_sign < 0:
+        if self._plan.protected and self.impact_sign < 0:
                                 
             environmental_impact_score = -100.
             
@@ -445,13 +665,13 @@ class Logigram(object):
         
     def get_seasonal_scores(self, receptor_normal_scores):
         
-        if self._receptor_table is None: return None;
+        if not self._plan.has_receptors: return None;
+        
+        species = list(self._plan.receptors)
         
-        if (set(receptor_normal_scores.keys()) !=
-                                        set(self._receptor_table.index)):
+        if set(receptor_normal_scores.keys()) != set(species):
                                             
-            missing = (set(self._receptor_table.index) -
-                                    set(receptor_normal_scores.keys()))
+            missing = set(species) - set(receptor_normal_scores.keys())
                                             
             missing_str = " ,".join(list(missing))
             errStr = ("The keys of receptor_sensitivity_scores must "
@@ -460,121 +680,38 @@ class Logigram(object):
             raise KeyError(errStr)
 
         # Test if any subclasses have seasonal records
-        seasonal_receptors = self._receptor_table.copy()
-        seasonal_receptors = seasonal_receptors.drop("observed", 1)
+        seasonal_receptors = self._plan.monthly
         
-        if seasonal_receptors.isnull().values.all(): return None;
-            
-        # Fix the column names and order
-        column_order = [('observed january', 'january'),
-                        ('observed february', 'february'),
-                        ('observed march', 'march'),
-                        ('observed april', 'april'),
-                        ('observed may', 'may'),
-                        ('observed june', 'june'),
-                        ('observed july', 'july'),
-                        ('observed august', 'august'),
-                        ('observed september', 'september'),
-                        ('observed october', 'october'),
-                        ('observed november', 'november'),
-                        ('observed december', 'december')
-                        ]
-        new_columns = OrderedDict(column_order)
-                       
-        seasonal_receptors = seasonal_receptors.rename(columns=new_columns)
-        seasonal_receptors = seasonal_receptors.reindex(new_columns.values(),
-                                                        axis=1)
-        sensitivity_series = pd.Series(receptor_normal_scores)
-        
-        seasonal_scores = seasonal_receptors.fillna(1)
-        seasonal_scores = seasonal_scores.multiply(sensitivity_series,
-                                                   axis="index")
+        if np.isnan(seasonal_receptors).all(): return None;
+        
+        sensitivity = np.array([receptor_normal_scores[x] for x in species])
+        
+        seasonal_scores = np.where(np.isnan(seasonal_receptors),
+                                   1.,
+                                   seasonal_receptors)
+        seasonal_scores = seasonal_scores * sensitivity[:, np.newaxis]
+        seasonal_scores = pd.DataFrame(seasonal_scores,
+                                       index=species,
+                                       columns=MONTHS)
                                                    
         return seasonal_scores
         
-    def _calculate_score(self, impact):
-                                   
-        # Find the pressure score and set the sign of the function
-        pressure_score = self.get_pressure_score(impact)
-
-        pressure_recommendations = self.get_recommendations(pressure_score)
-        
-        # Check for constraint to adjust
-        if self._weighting_parameter is None:
-            
-            adjusted_pressure_score = pressure_score
-            constraint = None
-            
-        else:
-            
-            # Constraints update the signed pressure score.
-            (adjusted_pressure_score,
-             constraint) = self.get_adjusted_pressure_score(pressure_score)
-            
-        # Try for an RSS score
-        receptor_sensitivity_scores = self.get_receptor_sensitivity_scores(
-                                                    adjusted_pressure_score,
-                                                    impact)
-
-        # Bifurcation. Finish if there is no receptor information.
-        if receptor_sensitivity_scores is None:
-            
-            receptor_sensitivity_score = adjusted_pressure_score * 5.
-            normalised_score = self.normalise_score(receptor_sensitivity_score)
-            environmental_impact_score = self.get_environmental_impact_score(
-                                                            normalised_score)
-                                                                        
-            result = Assessment(pressure_score,
-                                adjusted_pressure_score,
-                                constraint,
-                                environmental_impact_score,
-                                pressure_recommendations)
-                    
-            return result
+    def _calculate_score(self, impact, target_level=None):
         
-        # Calculate per receptor scores.                                                                                                               
-        species_list = []
-        score_list = []
-        eis_list = []
-        normal_score_dict = {}
-            
-        for species, score in receptor_sensitivity_scores.iteritems():
-            
-            species_list.append(species)
-            score_list.append(score)
-
-            normalised_score = self.normalise_score(score)
-            eis = self.get_environmental_impact_score(normalised_score)
-            eis_list.append(eis)
-            
-            normal_score_dict[species] = normalised_score
-            
-        seasonal_score = self.get_seasonal_scores(normal_score_dict)
+        '''Assess the given function result. If target_level is 1, only the
+        (adjusted) pressure score is used and if it is 2 the seasonal scores
+        are skipped. The confidence level of the result is the level that
+        was computed.'''
         
-        if self.impact_sign > 0:
-            
-            environmental_impact_score = max(eis_list)
-            
-        else:
-            
-            environmental_impact_score = min(eis_list)
-            
-            
-        result = Assessment(pressure_score,
-                            adjusted_pressure_score,
-                            constraint,
-                            environmental_impact_score,
-                            pressure_recommendations,
-                            species_list,
-                            score_list,
-                            eis_list,
-                            seasonal_score)
+        result = get_assessment(self._plan, impact, target_level)
                 
         return result
     
-    @abc.abstractmethod
-    def __call__(self):
+    def __call__(self, inputs_dict, target_level=None):
         
-        raise NotImplementedError
+        impact = self.get_impact(inputs_dict)
+        result = self._calculate_score(impact, target_level)
+        
+        return result
 
         
@@ -46,25 +46,98 @@ from .impacts import (EnergyModification,
                      ReefEffect,
                      ReserveEffect,
                      RestingPlace)
+from .core import assess
+from .geometry import get_footprint_inputs
+from .logigram import (check_target_level,
+                       get_assessment,
+                       get_core_assessment)
+from .noise import get_grid_noise_inputs
+from .observations import Observations
+from .plan import ReadOnly, ReadOnlyDict, StagePlan
 
 mod_path = os.path.realpath(__file__)
 mod_dir = os.path.dirname(mod_path)
 
 
-class Stage(object):
+def _freeze(value):
+    
+    '''Convert an input value, such as a list of inputs or an input
+    dictionary, into a hashable key, returning None if this is not
+    possible.'''
+    
+    try:
+        frozen = _get_frozen(value)
+    except TypeError:
+        return None
+    
+    return frozen
+
+
+def _get_frozen(value):
+    
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tostring())
+    
+    if isinstance(value, dict):
+        return tuple(sorted((k, _get_frozen(v))
+                                            for k, v in value.iteritems()))
+        
+    if isinstance(value, (list, tuple)):
+        return tuple(_get_frozen(x) for x in value)
+    
+    # Raises TypeError if the value can not be hashed
+    hash(value)
+    
+    return value
+
+
+class Stage(ReadOnly):
+    
+    '''Observations compiled by the Observations class may be given in
+    place of the protected and species observation tables, so that stages
+    built from the same tables share them.'''
     
     __metaclass__ = abc.ABCMeta
     
     def __init__(self, protected_observations=None,
                        species_observations=None,
-                       constraint_observations=None):
+                       constraint_observations=None,
+                       score_tables=None,
+                       observations=None):
+        
+        self._observations = None
+        self._logigrams = None
+        self._plan = None
+        self._inputs = None
         
         self._logigrams = self._init_logigrams(protected_observations,
                                                species_observations,
-                                               constraint_observations)
+                                               constraint_observations,
+                                               score_tables,
+                                               observations)
+        self._plan = self._init_plan()
+        self._inputs = frozenset(self.get_inputs())
+        self._set_read_only()
         
         return
     
+    @classmethod
+    def from_plan(cls, plan):
+        
+        '''Create a stage which executes the given compiled plan, such as
+        one attached from shared files, without reading the data tables.
+        The logigrams of the stage are not available.'''
+        
+        stage = cls.__new__(cls)
+        
+        stage._observations = None
+        stage._logigrams = ReadOnlyDict()
+        stage._plan = plan
+        stage._inputs = frozenset(stage.get_inputs())
+        stage._set_read_only()
+        
+        return stage
+    
     @abc.abstractproperty 
     def data_dir_path(self):
         
@@ -82,10 +155,21 @@ class Stage(object):
         
     def _init_logigrams(self, protected_observations=None,
                               species_observations=None,
-                              constraint_observations=None):
+                              constraint_observations=None,
+                              score_tables=None,
+                              observations=None):
                                   
         logigram_dict = {}
         
+        if score_tables is None: score_tables = {}
+        
+        # Compile the observations once for all logigrams
+        if observations is None:
+            observations = Observations(protected_observations,
+                                        species_observations)
+        
+        self._observations = observations
+        
         for Logigram in self.get_logigram_classes():
             
             name = Logigram.get_function_name()
@@ -97,44 +181,84 @@ class Stage(object):
                 raise ValueError(errStr)
             
             logigram = Logigram(self.data_dir_path,
-                                protected_observations,
-                                species_observations,
-                                constraint_observations[name])
+                                weighting_parameter=
+                                            constraint_observations[name],
+                                observations=self._observations,
+                                score_tables=score_tables.get(name))
                                 
             logigram_dict[name] = logigram
             
-        return logigram_dict
+        return ReadOnlyDict(logigram_dict)
+        
+    def _init_plan(self):
+        
+        '''Compile the logigrams into a flat execution plan.'''
+        
+        steps = [logigram.get_plan()
+                            for logigram in self._logigrams.itervalues()]
+        
+        return StagePlan(steps)
+        
+    def get_plan(self):
+        
+        '''The compiled execution plan. Use StagePlan.describe for a
+        summary.'''
+        
+        return self._plan
+        
+    def get_score_tables(self):
+        
+        '''Score tables of each logigram, keyed by function name, which can
+        be given to other stages of the same class to avoid reading the
+        data tables again.'''
+        
+        score_tables = {name: logigram.get_score_tables()
+                            for name, logigram in self._logigrams.iteritems()}
+        
+        return score_tables
         
     def get_inputs(self):
         
         all_inputs = []
         
-        for logigram in self._logigrams.itervalues():
-        
-            required_inputs = logigram.get_required_inputs()
-            all_inputs.extend(required_inputs)
+        for step in self._plan:
+            all_inputs.extend(step.inputs)
             
         return all_inputs
         
-    def _can_assess(self, input_dict, logigram):
+    @staticmethod
+    def _get_available(input_dict):
         
-        input_list = [key for key, value in input_dict.iteritems()
-                                                    if value is not None]
-        input_set = set(input_list)
+        available = set(key for key, value in input_dict.iteritems()
+                                                    if value is not None)
         
-        function_set = set(logigram.get_required_inputs())
+        return available
         
-        if function_set.issubset(input_set):
-            
-            result = True
-            
-        else:
-            
-            result = False
+    def _get_assessments(self, input_dict, target_level=None):
+        
+        assessments = {}
+        available = self._get_available(input_dict)
+        
+        for step in self._plan:
             
-        return result
+            if step.can_assess(available):
+                
+                assessment = get_assessment(step,
+                                            step.kernel(input_dict),
+                                            target_level)
+                
+            else:
+                
+                assessment = None
+                
+            assessments[step.name] = assessment
+                                                    
+        return self._collect_assessments(assessments)
         
-    def _get_assessments(self, input_dict):
+    def _collect_assessments(self, assessments):
+        
+        '''Convert a dict of assessments (or None) keyed by function name
+        into the confidence, EIS, recommendation and seasons outputs.'''
         
         confidence_dict = {}
         eis_dict = {}
@@ -152,16 +276,16 @@ class Stage(object):
                                            'november',
                                            'december'])
         
-        for name, logigram in self._logigrams.iteritems():
+        for name in self._plan.get_names():
+            
+            assessment = assessments[name]
             
-            if self._can_assess(input_dict, logigram):
+            if assessment is not None:
                 
-                assessment = logigram(input_dict)
                 confidence = assessment.confidence_level
                 eis = assessment.get_EIS()
                 recommendations = assessment.get_recommendations()
                 season = assessment.receptor_seasons
-
                 
             else:
                 
@@ -185,11 +309,11 @@ class Stage(object):
             seasons_df = seasons_df.append(per_season)
                                                     
         return confidence_dict, eis_dict, recommendations_dict, seasons_df
-     
-    def __call__(self, input_dict):
+        
+    def _check_inputs(self, input_dict):
         
         given_set = set(input_dict.keys())
-        needed_set = set(self.get_inputs())
+        needed_set = self._inputs
         
         if given_set != needed_set:
             
@@ -198,13 +322,258 @@ class Stage(object):
             errStr = ("The keys of the input dictionary must contain all "
                       "required variables. Missing are: {}").format(need_str)
             raise KeyError(errStr)
+            
+        return
+        
+    def get_batch_results(self, input_dicts, target_level=None):
+        
+        '''Assess a sequence of input dictionaries in a single call to the
+        array core, see get_core_results.
+        
+        Returns:
+            list: tuples matching the output of __call__ for each input
+              dictionary
+        
+        '''
+        
+        core_dict = self.get_batch_core(input_dicts, target_level)
+        results = self.get_core_results(core_dict, len(input_dicts))
+        
+        return results
+        
+    def get_core_results(self, core_dict, n_inputs):
+        
+        '''Convert the output of get_batch_core for n_inputs input
+        dictionaries into tuples matching the output of __call__ for each
+        input dictionary.'''
+        
+        assessments_dict = {}
+        
+        for name, (rows, result) in core_dict.iteritems():
+            
+            step = self._plan[name]
+            assessments = [None] * n_inputs
+            
+            for j, i in enumerate(rows):
+                assessments[i] = get_core_assessment(step, result, j)
+            
+            assessments_dict[name] = assessments
+        
+        results = []
+        
+        for i in xrange(n_inputs):
+            
+            assessments = {name: assessments[i]
+                        for name, assessments in assessments_dict.iteritems()}
+            
+            (confidence_dict,
+             eis_dict,
+             recommendations_dict,
+             combined_seasons) = self._collect_assessments(assessments)
+            
+            global_eis = self.get_global_eis(eis_dict)
+            
+            results.append((confidence_dict,
+                            eis_dict,
+                            recommendations_dict,
+                            combined_seasons,
+                            global_eis))
+        
+        return results
+        
+    def _get_batch_impacts(self, step, input_dicts, available_list):
+        
+        '''Function results of the assessable input dictionaries, evaluating
+        the impact function once for each distinct value of its inputs.'''
+        
+        rows = []
+        impacts = []
+        impact_memo = {}
+        
+        for i, (input_dict, available) in enumerate(zip(input_dicts,
+                                                         available_list)):
+            
+            if not step.can_assess(available): continue
+            
+            input_key = _freeze([input_dict[x] for x in step.inputs])
+            
+            if input_key is not None and input_key in impact_memo:
+                impact = impact_memo[input_key]
+            else:
+                impact = step.kernel(input_dict)
+                if input_key is not None: impact_memo[input_key] = impact
+                
+            rows.append(i)
+            impacts.append(impact)
+            
+        return np.array(rows, dtype=int), np.array(impacts, dtype=float)
+        
+    def get_batch_scores(self, input_dicts, target_level=None):
+        
+        '''Calculate the environmental impact scores for a sequence of input
+        dictionaries as an array, with all functions of a batch scored in a
+        single call to the array core.
+        
+        Returns:
+            tuple: function names and an array of shape (n_inputs,
+              n_functions) of their EIS, which is NaN where a function could
+              not be assessed.
+        
+        '''
+        
+        # Seasonal scores do not change the EIS
+        if target_level is None: target_level = 2
+        
+        core_dict = self.get_batch_core(input_dicts, target_level)
+        names = self._plan.get_names()
+        scores = np.full((len(input_dicts), len(names)), np.nan)
+        
+        for j, name in enumerate(names):
+            
+            rows, result = core_dict[name]
+            if not rows.size: continue
+            
+            scores[rows, j] = result.eis
+            
+        return names, scores
+        
+    def get_batch_core(self, input_dicts, target_level=None):
+        
+        '''Array results of the scoring core for a sequence of input
+        dictionaries.
+        
+        Returns:
+            dict: (rows, CoreAssessment) tuples keyed by function name, where
+              rows are the positions of the assessed input dictionaries and
+              the CoreAssessment is None if there are none
+        
+        '''
+        
+        check_target_level(target_level)
+        
+        for input_dict in input_dicts: self._check_inputs(input_dict);
+        
+        available_list = [self._get_available(x) for x in input_dicts]
+        core_dict = {}
+        
+        for step in self._plan:
+            
+            rows, impacts = self._get_batch_impacts(step,
+                                                    input_dicts,
+                                                    available_list)
+            
+            if rows.size:
+                result = assess(step, impacts, target_level)
+            else:
+                result = None
+            
+            core_dict[step.name] = (rows, result)
+            
+        return core_dict
+        
+    def get_batch_eis(self, input_dicts, target_level=None):
+        
+        '''Calculate the environmental impact scores for a sequence of input
+        dictionaries. A target confidence level of 1 or 2 skips the receptor
+        or seasonal scoring, for cheap screening.
+        
+        Returns:
+            tuple: DataFrames of the EIS per function and of the global EIS,
+              with a row for each input dictionary.
+        
+        '''
+        
+        names, scores = self.get_batch_scores(input_dicts, target_level)
+        
+        eis_df = pd.DataFrame(scores,
+                              index=range(len(input_dicts)),
+                              columns=names)
+        
+        global_eis_list = [self.get_global_eis(row.to_dict())
+                                            for _, row in eis_df.iterrows()]
+        global_df = pd.DataFrame(global_eis_list, index=eis_df.index)
+        
+        return eis_df, global_df
+     
+    def __call__(self, input_dict, target_level=None):
+        
+        '''Assess the stage. If target_level is given (1 or 2) the scoring
+        stops at that confidence level, and the returned confidence levels
+        record the level computed for each function.'''
+        
+        check_target_level(target_level)
+        self._check_inputs(input_dict)
         
         (confidence_dict,
          eis_dict,
          recommendations_dict,
-         combined_seasons) = self._get_assessments(input_dict)
+         combined_seasons) = self._get_assessments(input_dict, target_level)
+        
+        global_eis = self.get_global_eis(eis_dict)
+
+        return confidence_dict, eis_dict, recommendations_dict, \
+            combined_seasons, global_eis
+        
+    def _get_derived_inputs(self, input_dict, Logigram, derived_dict):
+        
+        '''Copy of the input dictionary with the inputs of the given logigram
+        replaced by those derived from its raw data.'''
+        
+        name = Logigram.get_function_name()
+        
+        if name not in self._plan.get_names():
+            
+            errStr = "Function {} is not assessed by the {} stage".format(
+                                                    name,
+                                                    self.get_module_name())
+            raise ValueError(errStr)
+        
+        input_dict = dict(input_dict)
+        input_dict.update(derived_dict)
+        
+        return input_dict
+        
+    def get_grid_assessment(self, input_dict,
+                                  levels,
+                                  initial_noise,
+                                  percentile=100.,
+                                  target_level=None):
+        
+        '''Assess the stage, with the Underwater Noise inputs derived from a
+        grid of received noise levels, see noise.get_grid_noise_inputs. The
+        other inputs are given by input_dict.'''
+        
+        noise_dict = get_grid_noise_inputs(levels, initial_noise, percentile)
+        input_dict = self._get_derived_inputs(input_dict,
+                                              UnderwaterNoise,
+                                              noise_dict)
+        
+        return self(input_dict, target_level)
+        
+    def get_geometry_assessment(self, input_dict,
+                                      components,
+                                      total_area,
+                                      buffers=None,
+                                      target_level=None):
+        
+        '''Assess the stage, with the Footprint inputs derived from
+        collections of component geometries, see
+        geometry.get_footprint_inputs. The other inputs are given by
+        input_dict.'''
+        
+        footprint_dict = get_footprint_inputs(components, total_area, buffers)
+        input_dict = self._get_derived_inputs(input_dict,
+                                              Footprint,
+                                              footprint_dict)
+        
+        return self(input_dict, target_level)
+    
+    @staticmethod
+    def get_global_eis(eis_dict):
 
-        # global environmental score
+        '''Global environmental impact scores of a dict of EIS keyed by
+        function name, where functions which were not assessed are None or
+        NaN.'''
 
         negative_impacts = []
         positive_impacts = []
@@ -239,8 +608,7 @@ class Stage(object):
             global_eis["Max Positive Impact"] = np.nan
             global_eis["Min Positive Impact"] = np.nan
 
-        return confidence_dict, eis_dict, recommendations_dict, \
-            combined_seasons, global_eis
+        return global_eis
 
 
 class HydroStage(Stage):
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Received underwater noise levels across a site from many point sources, for
+the UnderwaterNoise logigram.
+
+Source contributions are summed incoherently, as powers, after applying a
+transmission loss of N log10(r) + alpha r, where r is the slant range in
+metres and alpha is the absorption coefficient in dB/km.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+import numpy as np
+
+SPREADING = {"spherical": 20.,
+             "practical": 15.,
+             "cylindrical": 10.}
+
+
+def get_transmission_loss(distance, spreading="practical", absorption=0.):
+
+    '''Transmission loss (dB) over the given distances (m), with spreading
+    given as a coefficient or the name of a standard model. Distances below
+    the 1 m reference range are treated as 1 m.'''
+
+    if spreading in SPREADING: spreading = SPREADING[spreading]
+
+    distance = np.maximum(distance, 1.)
+    loss = spreading * np.log10(distance) + absorption * distance / 1000.
+
+    return loss
+
+
+def get_received_levels(source_x,
+                        source_y,
+                        source_levels,
+                        x,
+                        y,
+                        source_depth=0.,
+                        receiver_depth=0.,
+                        spreading="practical",
+                        absorption=0.,
+                        max_elements=2 ** 22):
+
+    '''Total received level (dB re 1 uPa) at each receiver point, summing
+    the incoherent contributions of all sources. The sum is taken in power
+    space relative to the loudest source, and receivers are processed in
+    chunks so that at most max_elements source-receiver pairs are held at
+    once.
+
+    Args:
+        source_x, source_y: Coordinates of the sources
+        source_levels: Source levels (dB re 1 uPa at 1 m)
+        x, y: Coordinates of the receivers
+        source_depth (float, optional): Depth of the sources
+        receiver_depth (float, optional): Depth of the receivers
+        spreading (optional): Spreading coefficient or model name
+        absorption (float, optional): Absorption coefficient (dB/km)
+        max_elements (int, optional): Maximum pairs per chunk
+
+    Returns:
+        numpy.ndarray: received levels shaped as x
+
+    '''
+
+    source_x = np.asarray(source_x, dtype=float)[:, np.newaxis]
+    source_y = np.asarray(source_y, dtype=float)[:, np.newaxis]
+    source_levels = np.asarray(source_levels, dtype=float)[:, np.newaxis]
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    flat_x = x.ravel()
+    flat_y = y.ravel()
+
+    # Reference level avoids overflow of the powers of loud sources
+    reference = source_levels.max()
+    source_powers = 10 ** ((source_levels - reference) / 10.)
+
+    dz_sq = (source_depth - receiver_depth) ** 2
+    levels = np.empty(flat_x.size)
+    chunk = max(max_elements // len(source_levels), 1)
+
+    for first in xrange(0, flat_x.size, chunk):
+
+        dx = flat_x[first:first + chunk] - source_x
+        dy = flat_y[first:first + chunk] - source_y
+        distance = np.sqrt(dx * dx + dy * dy + dz_sq)
+
+        loss = get_transmission_loss(distance, spreading, absorption)
+        power = (source_powers * 10 ** (-loss / 10.)).sum(axis=0)
+
+        with np.errstate(divide='ignore'):
+            levels[first:first + chunk] = reference + 10 * np.log10(power)
+
+    return levels.reshape(x.shape)
+
+
+def add_levels(*levels):
+
+    '''Incoherent sum of sound pressure levels (dB).'''
+
+    powers = [10 ** (np.asarray(level, dtype=float) / 10.)
+                                                        for level in levels]
+
+    return 10 * np.log10(sum(powers))
+
+
+def get_exceedance(levels, initial_noise, cell_area=1., weights=None):
+
+    '''Area and weighted fraction of the site where the received level
+    exceeds the ambient noise level.
+
+    Args:
+        levels: Received levels on the grid
+        initial_noise (float): Ambient noise (dB re 1 uPa)
+        cell_area (float, optional): Area of each grid cell
+        weights (optional): Receptor density at each grid point
+
+    Returns:
+        dict: "area" above ambient, "fraction" of the grid above ambient
+          and "weighted fraction" above ambient
+
+    '''
+
+    levels = np.asarray(levels, dtype=float).ravel()
+
+    if weights is None:
+        weights = np.ones(levels.size)
+    else:
+        weights = np.asarray(weights, dtype=float).ravel()
+
+    exceeds = levels > initial_noise
+
+    stats = {"area": exceeds.sum() * cell_area,
+             "fraction": exceeds.mean(),
+             "weighted fraction": weights[exceeds].sum() / weights.sum()}
+
+    return stats
+
+
+def get_grid_noise_inputs(levels, initial_noise, percentile=100.):
+
+    '''Inputs to the UnderwaterNoise logigram. The measured noise is the
+    given percentile (by default the maximum) over the grid of the received
+    levels, so that, as for get_exceedance, there is an impact only where
+    the devices are louder than the ambient noise.'''
+
+    levels = np.asarray(levels, dtype=float)
+
+    input_dict = {"Initial Noise dB re 1muPa": initial_noise,
+                  "Measured Noise dB re 1muPa": np.percentile(levels,
+                                                              percentile)}
+
+    return input_dict
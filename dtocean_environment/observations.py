@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compiled protected species and receptor observations, shared by all the
+logigrams of a stage.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import numpy as np
+
+from .plan import ReadOnly
+
+MONTHS = ['january',
+          'february',
+          'march',
+          'april',
+          'may',
+          'june',
+          'july',
+          'august',
+          'september',
+          'october',
+          'november',
+          'december']
+
+
+class Observations(ReadOnly):
+
+    '''Protected species and receptor observations compiled into read-only
+    arrays. Receptors are identified by their position in the species list,
+    with a boolean vector of observed receptors and a (species x 12) array
+    of monthly presence, which is 1 where present, 0 where absent and NaN
+    where no monthly record is given.
+
+    Selections of consecutive receptors are views of these arrays, and one
+    instance may be given to all the stages built from the same tables.
+
+    Args:
+        protected_observations (pandas.DataFrame, optional): Table with an
+          "observed" column of protected species
+        receptor_observations (pandas.DataFrame, optional): Table indexed by
+          receptor subclass or group with an "observed" column and
+          "observed <month>" columns
+
+    '''
+
+    def __init__(self, protected_observations=None,
+                       receptor_observations=None):
+
+        self._protected_observed = None
+        self._species = None
+        self._positions = None
+        self._observed = None
+        self._monthly = None
+
+        self._protected_observed = self._init_protected_observed(
+                                                    protected_observations)
+
+        if receptor_observations is not None:
+
+            self._species = tuple(receptor_observations.index)
+            self._positions = {name: i
+                                    for i, name in enumerate(self._species)}
+            self._observed = self._init_observed(receptor_observations)
+            self._monthly = self._init_monthly(receptor_observations)
+
+        self._set_read_only()
+
+        return
+
+    def _init_protected_observed(self, protected_observations):
+
+        if protected_observations is None: return False
+
+        return bool(any(protected_observations["observed"]))
+
+    def _init_observed(self, receptor_observations):
+
+        observed = receptor_observations["observed"].values.astype(bool)
+        observed.setflags(write=False)
+
+        return observed
+
+    def _init_monthly(self, receptor_observations):
+
+        monthly = np.full((len(self._species), 12), np.nan)
+
+        for i, month in enumerate(MONTHS):
+
+            column = "observed {}".format(month)
+
+            if column not in receptor_observations: continue
+
+            monthly[:, i] = receptor_observations[column].astype(float).values
+
+        monthly.setflags(write=False)
+
+        return monthly
+
+    def is_protected_observed(self):
+
+        return self._protected_observed
+
+    def has_receptors(self):
+
+        return self._species is not None
+
+    def get_indices(self, names, function_name=None):
+
+        '''Positions of the given receptors in the compiled arrays.
+
+        Raises:
+            KeyError: if any of the receptors have no observations
+
+        '''
+
+        missing = [x for x in names if x not in self._positions]
+
+        if missing:
+
+            need_str = " ,".join(missing)
+            errStr = ("Observation data for all receptors of {} must be "
+                      "given. Missing are: {}").format(function_name,
+                                                       need_str)
+
+            raise KeyError(errStr)
+
+        indices = np.array([self._positions[x] for x in names], dtype=int)
+        indices.setflags(write=False)
+
+        return indices
+
+    def get_species(self, indices):
+
+        return [self._species[i] for i in indices]
+
+    def get_observed(self, indices):
+
+        return self._observed[_get_rows(indices)]
+
+    def get_monthly(self, indices):
+
+        return self._monthly[_get_rows(indices)]
+
+
+def _get_rows(indices):
+
+    '''Slice equivalent to the given positions if they are consecutive, so
+    that the selection is a read-only view of the compiled arrays rather
+    than a copy.'''
+
+    if len(indices) and (np.diff(indices) == 1).all():
+        return slice(indices[0], indices[-1] + 1)
+
+    return indices
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Execution plans compiled from the logigrams of a stage. Each step of a plan
+holds the impact kernel of a function, its input slots, its score tables as
+arrays and flags for the optional scoring steps, so that assessments need
+no further lookups of the logigram tables.
+
+Plans, and the objects they are compiled from, are read-only once built.
+Their attributes can not be rebound, their arrays are write protected and
+their mappings are ReadOnlyDict instances, so they may be shared between
+threads.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from collections import Mapping, namedtuple
+
+import numpy as np
+import pandas as pd
+
+class ReadOnly(object):
+
+    '''Base for objects whose attributes can not be set or deleted once
+    construction has finished with a call to _set_read_only.'''
+
+    _read_only = False
+
+    def _set_read_only(self):
+
+        object.__setattr__(self, "_read_only", True)
+
+        return
+
+    def __setattr__(self, name, value):
+
+        if self._read_only:
+
+            errStr = ("{} objects are read-only after "
+                      "construction").format(type(self).__name__)
+            raise AttributeError(errStr)
+
+        object.__setattr__(self, name, value)
+
+        return
+
+    def __delattr__(self, name):
+
+        if self._read_only:
+
+            errStr = ("{} objects are read-only after "
+                      "construction").format(type(self).__name__)
+            raise AttributeError(errStr)
+
+        object.__delattr__(self, name)
+
+        return
+
+
+class ReadOnlyDict(ReadOnly, Mapping):
+
+    '''Mapping which can not be changed after construction, holding a
+    private copy of the given dictionary.'''
+
+    def __init__(self, *args, **kwargs):
+
+        self._dict = dict(*args, **kwargs)
+        self._set_read_only()
+
+        return
+
+    def __getitem__(self, key):
+
+        return self._dict[key]
+
+    def __iter__(self):
+
+        return iter(self._dict)
+
+    def __len__(self):
+
+        return len(self._dict)
+
+    def __repr__(self):
+
+        return "{}({!r})".format(type(self).__name__, self._dict)
+
+
+_STEP_FIELDS = ["name",
+                "kernel",
+                "inputs",
+                "sign",
+                "pressure_levels",
+                "pressure_scores",
+                "recommendations",
+                "constraint",
+                "constraint_score",
+                "receptors",
+                "observed",
+                "receptor_scores",
+                "receptor_bounds",
+                "monthly",
+                "protected"]
+
+
+class LogigramPlan(namedtuple("LogigramPlan", _STEP_FIELDS)):
+
+    '''Compiled form of a logigram.
+
+    Attributes:
+        name (str): Function name
+        kernel: Function returning the impact from an input dictionary
+        inputs (tuple): Names of the required inputs
+        sign (int): Sign of the impact
+        pressure_levels (numpy.ndarray): Function results of the pressure
+          table, in increasing order
+        pressure_scores (numpy.ndarray): Pressure scores at each level
+        recommendations (numpy.ndarray): Generic explanation, general
+          recommendation and detailed recommendation at each level
+        constraint: Weighting parameter, or None if not given
+        constraint_score (float): Score of the weighting parameter, or None
+          if it can not be found in the weighting table
+        receptors (tuple): Receptor names, or None if there are no receptor
+          observations for the function
+        observed (numpy.ndarray): Observed flag of each receptor
+        receptor_scores (numpy.ndarray): Score of each receptor, NaN for
+          receptors scored by impact bounds
+        receptor_bounds (tuple): (upper bounds, scores) arrays for receptors
+          scored by impact bounds, otherwise None
+        monthly (numpy.ndarray): Monthly presence of each receptor
+        protected (bool): True if protected species are observed
+
+    '''
+
+    __slots__ = ()
+
+    @property
+    def has_weighting(self):
+        return self.constraint is not None
+
+    @property
+    def has_receptors(self):
+        return self.receptors is not None
+
+    @property
+    def has_seasons(self):
+        return self.has_receptors and not np.isnan(self.monthly).all()
+
+    def can_assess(self, available):
+
+        '''True if all the inputs of the step are in the given set of
+        available input names.'''
+
+        return all(x in available for x in self.inputs)
+
+
+class StagePlan(ReadOnly):
+
+    '''Flat sequence of compiled logigrams, ordered by function name.'''
+
+    def __init__(self, steps):
+
+        self._steps = tuple(sorted(steps, key=lambda x: x.name))
+        self._set_read_only()
+
+        return
+
+    def __iter__(self):
+
+        return iter(self._steps)
+
+    def __len__(self):
+
+        return len(self._steps)
+
+    def __getitem__(self, name):
+
+        for step in self._steps:
+            if step.name == name: return step
+
+        errStr = "No step found for function {}".format(name)
+        raise KeyError(errStr)
+
+    def get_names(self):
+
+        return [step.name for step in self._steps]
+
+    def describe(self):
+
+        '''Summary of the plan, for debugging.
+
+        Returns:
+            pandas.DataFrame: indexed by function name
+
+        '''
+
+        columns = ["inputs",
+                   "sign",
+                   "pressure levels",
+                   "constraint",
+                   "weighting",
+                   "receptors",
+                   "impact bounds",
+                   "seasons",
+                   "protected"]
+
+        rows = []
+
+        for step in self._steps:
+
+            if step.has_receptors:
+                n_receptors = len(step.receptors)
+                impact_bounds = any(x is not None
+                                            for x in step.receptor_bounds)
+            else:
+                n_receptors = 0
+                impact_bounds = False
+
+            rows.append([", ".join(step.inputs),
+                         step.sign,
+                         len(step.pressure_levels),
+                         step.constraint,
+                         step.has_weighting,
+                         n_receptors,
+                         impact_bounds,
+                         step.has_seasons,
+                         step.protected])
+
+        summary = pd.DataFrame(rows,
+                               index=self.get_names(),
+                               columns=columns)
+
+        return summary
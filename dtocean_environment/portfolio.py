@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Evaluation of a portfolio of sites, each with its own observations and
+table of scenarios. The score tables, which do not depend on the site, are
+read once per stage and shared by the stages of every site, and each site's
+stages are compiled once. Work is split into chunks of scenarios which are
+scheduled across a process pool in order of decreasing expected cost, and
+the results of each site are collected in a ResultsCube.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import shutil
+import multiprocessing
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .batch import STAGES, get_stage, get_input_dicts
+from .cube import ResultsCube
+from .observations import Observations
+from .shared import publish_stage, get_attached_stage
+
+
+class Site(namedtuple("Site", ["name",
+                               "scenarios",
+                               "protected",
+                               "receptors",
+                               "weighting"])):
+
+    '''A site of a portfolio.
+
+    Attributes:
+        name (str): Site name
+        scenarios (pandas.DataFrame): Inputs of each scenario, as for
+          batch.run_batch
+        protected (pandas.DataFrame): Protected species observations, or
+          None
+        receptors (pandas.DataFrame): Receptor observations, or None
+        weighting (dict): Weighting parameters keyed by function name, or
+          None
+
+    '''
+
+    __slots__ = ()
+
+Site.__new__.__defaults__ = (None, None, None)
+
+
+def get_expected_cost(input_dict):
+
+    '''Relative cost of assessing an input dictionary, counting each given
+    scalar input once and each sequence input by its length, so that, for
+    instance, CollisionRisk costs grow with the number of devices.'''
+
+    cost = 0
+
+    for value in input_dict.itervalues():
+
+        if value is None: continue
+
+        if isinstance(value, basestring):
+            cost += 1
+        elif hasattr(value, "__len__"):
+            cost += len(value)
+        else:
+            cost += 1
+
+    return cost
+
+
+def _assess_chunk(args):
+
+    index, dir_path, input_dicts, target_level = args
+    stage = get_attached_stage(dir_path)
+
+    return index, stage.get_batch_core(input_dicts, target_level)
+
+
+def _check_site_name(name):
+
+    '''Site names are used as directory names of the results cubes.'''
+
+    separators = set(["/", "\\", os.sep])
+    if os.altsep is not None: separators.add(os.altsep)
+
+    if (not name or
+        name in [os.curdir, os.pardir] or
+        any(x in name for x in separators)):
+
+        errStr = "Site name '{}' is not a valid directory name".format(name)
+        raise ValueError(errStr)
+
+    return
+
+
+class Portfolio(object):
+
+    '''Stages of each site of a portfolio.
+
+    Args:
+        sites (list): Site tuples, with unique names which are used as
+          directory names, so may not contain path separators
+        stage_names (list, optional): Names of the stages to evaluate, as
+          in batch.STAGES, defaulting to all stages
+
+    '''
+
+    def __init__(self, sites, stage_names=None):
+
+        if stage_names is None: stage_names = list(STAGES.keys())
+
+        for stage_name in stage_names:
+            if stage_name not in STAGES:
+                errStr = "Unknown stage '{}'".format(stage_name)
+                raise ValueError(errStr)
+
+        self.sites = OrderedDict()
+
+        for site in sites:
+
+            _check_site_name(site.name)
+
+            if site.name in self.sites:
+                errStr = "Site name '{}' is not unique".format(site.name)
+                raise ValueError(errStr)
+
+            self.sites[site.name] = site
+
+        self.stage_names = list(stage_names)
+        self._stages = self._init_stages()
+
+        return
+
+    def _init_stages(self):
+
+        stages = OrderedDict()
+        score_tables = {}
+
+        for site in self.sites.itervalues():
+
+            site_stages = OrderedDict()
+            observations = Observations(site.protected, site.receptors)
+
+            for stage_name in self.stage_names:
+
+                stage = get_stage(STAGES[stage_name],
+                                  weighting=site.weighting,
+                                  score_tables=score_tables.get(stage_name),
+                                  observations=observations)
+
+                if stage_name not in score_tables:
+                    score_tables[stage_name] = stage.get_score_tables()
+
+                site_stages[stage_name] = stage
+
+            stages[site.name] = site_stages
+
+        return stages
+
+    def get_stage(self, site_name, stage_name):
+
+        return self._stages[site_name][stage_name]
+
+    def get_tasks(self, chunksize=1000, cost=None):
+
+        '''Chunks of work, ordered by decreasing expected cost.
+
+        Args:
+            chunksize (int, optional): Number of scenarios per chunk
+            cost (optional): Function giving the expected cost of an input
+              dictionary, get_expected_cost by default
+
+        Returns:
+            list: (cost, site name, stage name, start, input dicts) tuples
+
+        '''
+
+        if cost is None: cost = get_expected_cost
+
+        tasks = []
+
+        for site_name, site_stages in self._stages.iteritems():
+
+            scenarios = self.sites[site_name].scenarios
+
+            for stage_name, stage in site_stages.iteritems():
+
+                input_dicts = get_input_dicts(scenarios, stage.get_inputs())
+
+                for start in xrange(0, len(input_dicts), chunksize):
+
+                    chunk = input_dicts[start:start + chunksize]
+                    chunk_cost = sum(cost(x) for x in chunk)
+
+                    tasks.append((chunk_cost,
+                                  site_name,
+                                  stage_name,
+                                  start,
+                                  chunk))
+
+        # Longest tasks first balances the load of the workers
+        tasks.sort(key=lambda x: x[0], reverse=True)
+
+        return tasks
+
+    def _get_cubes(self, dir_path, dtype):
+
+        cubes = OrderedDict()
+
+        for site_name, site_stages in self._stages.iteritems():
+
+            if dir_path is None:
+                site_path = None
+            else:
+                site_path = os.path.join(dir_path, site_name)
+
+            cubes[site_name] = ResultsCube.from_stages(
+                                        self.sites[site_name].scenarios.index,
+                                        site_stages,
+                                        site_path,
+                                        dtype)
+
+        return cubes
+
+    def run(self, processes=1,
+                  chunksize=1000,
+                  dir_path=None,
+                  cost=None,
+                  target_level=None,
+                  dtype=np.float32,
+                  progress=None):
+
+        '''Evaluate every scenario of every site.
+
+        Args:
+            processes (int, optional): Number of worker processes, or None
+              for the number of cores
+            chunksize (int, optional): Number of scenarios per task
+            dir_path (str, optional): Directory for memory mapped cubes, in
+              a subdirectory for each site
+            cost (optional): Function giving the expected cost of an input
+              dictionary
+            target_level (int, optional): Target confidence level
+            dtype (optional): Floating point type of the cubes
+            progress (optional): Function called with the number of tasks
+              completed and the total after each task
+
+        Returns:
+            OrderedDict: ResultsCube of each site
+
+        '''
+
+        cubes = self._get_cubes(dir_path, dtype)
+        tasks = self.get_tasks(chunksize, cost)
+
+        def store(task, core_dict, done):
+
+            _, site_name, stage_name, start, chunk = task
+            plan = self.get_stage(site_name, stage_name).get_plan()
+            cubes[site_name].store(stage_name,
+                                   plan,
+                                   core_dict,
+                                   start,
+                                   len(chunk))
+
+            if progress is not None: progress(done, len(tasks))
+
+            return
+
+        if processes == 1 or len(tasks) < 2:
+
+            for i, task in enumerate(tasks):
+
+                stage = self.get_stage(task[1], task[2])
+                core_dict = stage.get_batch_core(task[4], target_level)
+                store(task, core_dict, i + 1)
+
+        else:
+
+            # Workers attach to the compiled plans of each site and stage
+            published = {}
+            pool = None
+
+            try:
+
+                for site_name, site_stages in self._stages.iteritems():
+                    for stage_name, stage in site_stages.iteritems():
+                        published[(site_name, stage_name)] = \
+                                                        publish_stage(stage)
+
+                args = [(i, published[(x[1], x[2])], x[4], target_level)
+                                                for i, x in enumerate(tasks)]
+
+                pool = multiprocessing.Pool(processes)
+
+                for done, (i, core_dict) in enumerate(
+                            pool.imap_unordered(_assess_chunk, args), 1):
+                    store(tasks[i], core_dict, done)
+
+                pool.close()
+
+            except:
+
+                # Stop the workers rather than waiting for the other tasks
+                if pool is not None: pool.terminate()
+                raise
+
+            finally:
+
+                if pool is not None: pool.join()
+
+                for path in published.itervalues():
+                    shutil.rmtree(path, ignore_errors=True)
+
+        for cube in cubes.itervalues(): cube.flush()
+
+        return cubes
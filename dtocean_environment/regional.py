@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cumulative impacts of neighbouring farms which share receptor populations.
+Farms whose lease areas lie within an interaction distance of each other
+are found with an STRtree and grouped into regions, and the collision risk,
+footprint, reef effect, reserve effect and resting place impacts of each
+region are calculated for the farms combined. The combined impacts are
+scored by the compiled logigrams of a stage.
+
+Within a region, the footprint and area ratios are taken over the union of
+the lease areas, and the collision risk is calculated as for the
+CollisionRisk logigram over all devices, using the largest device size and
+immersed height and the smallest water depth of the farms. This is a
+conservative bound on the collision risk of farms with differing devices,
+and the values used are given with the results. For a region of one farm,
+it is the collision risk of that farm. An impact is calculated from the
+farms of a region which give its inputs, and is NaN if none do.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .collision import get_collision_risk
+from .core import assess
+from .functions import footprint, reef_eff, reserve_eff, restplace
+from .geometry import (get_clusters,
+                       get_covered_area,
+                       get_footprint_areas,
+                       get_intersecting_pairs)
+from .logigram import check_target_level
+
+CUMULATIVE_FUNCTIONS = ["Collision Risk",
+                        "Footprint",
+                        "Reef Effect",
+                        "Reserve Effect",
+                        "Resting Place"]
+
+# Device size, immersed height and water depth of the collision risk bound
+COLLISION_BOUND = ["collision device size",
+                   "collision immersed height",
+                   "collision water depth"]
+
+
+class Farm(namedtuple("Farm", ["name",
+                               "area",
+                               "coordinates",
+                               "device_size",
+                               "immersed_height",
+                               "water_depth",
+                               "components",
+                               "buffers",
+                               "underwater_area",
+                               "emerged_area",
+                               "n_objects",
+                               "fishery_area"])):
+
+    '''A farm of a region. Only the name and lease area are required.
+
+    Attributes:
+        name (str): Farm name
+        area: Lease area as a shapely polygon
+        coordinates: Coordinates of the devices, as [x, y]
+        device_size (float): Maximum horizontal size of the devices
+        immersed_height (float): Height of the devices immersed in the water
+        water_depth (float): Minimum water depth
+        components (dict): Lists of shapely geometries keyed by component
+          type, as for geometry.get_footprint_areas
+        buffers (dict): Buffer distances keyed by component type
+        underwater_area (float): Surface area of the underwater part of
+          each object
+        emerged_area (float): Surface area of the emerged part of each
+          object
+        n_objects (int): Number of objects
+        fishery_area (float): Fishery restriction surface
+
+    '''
+
+    __slots__ = ()
+
+Farm.__new__.__defaults__ = (None,) * 10
+
+
+def _get_search_areas(farms, distance):
+
+    return [farm.area.buffer(distance / 2.) if distance > 0 else farm.area
+                                                            for farm in farms]
+
+
+def get_interacting_pairs(farms, distance=0.):
+
+    '''Pairs of farms whose lease areas are within the given distance of
+    each other, see geometry.get_intersecting_pairs.
+
+    Returns:
+        list: (i, j) index pairs into farms, with i < j
+
+    '''
+
+    return get_intersecting_pairs(_get_search_areas(farms, distance))
+
+
+def get_regions(farms, distance=0.):
+
+    '''Groups of farms connected by chains of interacting pairs, see
+    geometry.get_clusters.
+
+    Returns:
+        list: lists of indices into farms
+
+    '''
+
+    return get_clusters(_get_search_areas(farms, distance))
+
+
+def _get_collision_impact(farms, cur_dir):
+
+    farms = [x for x in farms if x.coordinates is not None]
+    if not farms: return np.nan, np.nan, np.nan, np.nan
+
+    x_pos = np.concatenate([np.asarray(x.coordinates[0], dtype=float)
+                                                            for x in farms])
+    y_pos = np.concatenate([np.asarray(x.coordinates[1], dtype=float)
+                                                            for x in farms])
+
+    # Conservative bound over the devices of all farms
+    device_size = max(x.device_size for x in farms)
+    immersed_height = max(x.immersed_height for x in farms)
+    water_depth = min(x.water_depth for x in farms)
+
+    directions = np.atleast_1d(np.asarray(cur_dir, dtype=float))
+    impact = np.mean([get_collision_risk([x_pos, y_pos],
+                                         device_size,
+                                         immersed_height,
+                                         water_depth,
+                                         direction)
+                                                for direction in directions])
+
+    return impact, device_size, immersed_height, water_depth
+
+
+def _get_footprint_impact(farms, total_area):
+
+    farms = [x for x in farms if x.components is not None]
+    if not farms: return np.nan
+
+    components = {}
+    buffers = {}
+
+    for farm in farms:
+
+        for component_type, geometries in farm.components.iteritems():
+            components.setdefault(component_type, []).extend(geometries)
+
+        if farm.buffers is not None:
+            for component_type, distance in farm.buffers.iteritems():
+                buffers.setdefault(component_type, distance)
+
+    covered_area, _ = get_footprint_areas(components, buffers)
+
+    return footprint(covered_area, total_area)
+
+
+def _get_object_total(farms, attribute):
+
+    farms = [x for x in farms if getattr(x, attribute) is not None and
+                                                    x.n_objects is not None]
+    if not farms: return None
+
+    return sum(getattr(x, attribute) * x.n_objects for x in farms)
+
+
+def get_cumulative_impacts(farms, cur_dir=0., distance=0.):
+
+    '''Combined impacts of each region of interacting farms.
+
+    Args:
+        farms (list): Farm tuples
+        cur_dir (optional): Current direction in degrees, or a sequence of
+          directions over which the collision risk is averaged
+        distance (float, optional): Distance within which farms interact
+
+    Returns:
+        pandas.DataFrame: indexed by region, with the names of its farms,
+          the combined result of each function and the device size,
+          immersed height and water depth of the collision risk bound
+
+    '''
+
+    rows = []
+
+    for region in get_regions(farms, distance):
+
+        region_farms = [farms[i] for i in region]
+        total_area = get_covered_area([x.area for x in region_farms])
+
+        underwater = _get_object_total(region_farms, "underwater_area")
+        emerged = _get_object_total(region_farms, "emerged_area")
+        fishery = [x.fishery_area for x in region_farms
+                                            if x.fishery_area is not None]
+
+        reef = np.nan
+        resting = np.nan
+        reserve = np.nan
+
+        if underwater is not None: reef = reef_eff(total_area, underwater, 1)
+        if emerged is not None: resting = restplace(emerged, 1, total_area)
+        if fishery: reserve = reserve_eff(sum(fishery), total_area)
+
+        collision = _get_collision_impact(region_farms, cur_dir)
+
+        rows.append([tuple(x.name for x in region_farms),
+                     collision[0],
+                     _get_footprint_impact(region_farms, total_area),
+                     reef,
+                     reserve,
+                     resting] + list(collision[1:]))
+
+    impacts = pd.DataFrame(rows, columns=["farms"] +
+                                         CUMULATIVE_FUNCTIONS +
+                                         COLLISION_BOUND)
+
+    return impacts
+
+
+def assess_cumulative(stage, farms, cur_dir=0.,
+                                    distance=0.,
+                                    target_level=None):
+
+    '''Environmental impact scores of the combined impacts of each region
+    of interacting farms, for the functions of the given stage.
+
+    Returns:
+        pandas.DataFrame: indexed by region, with the names of its farms,
+          the EIS of each cumulative function of the stage, which is NaN
+          where the impact could not be calculated, and the values of the
+          collision risk bound, see get_cumulative_impacts
+
+    '''
+
+    check_target_level(target_level)
+
+    impacts = get_cumulative_impacts(farms, cur_dir, distance)
+    eis = impacts[["farms"] + COLLISION_BOUND].copy()
+
+    for step in stage.get_plan():
+
+        if step.name not in CUMULATIVE_FUNCTIONS: continue
+
+        values = impacts[step.name].values.astype(float)
+        valid = ~np.isnan(values)
+        scores = np.full(len(values), np.nan)
+
+        if valid.any():
+            scores[valid] = assess(step, values[valid], target_level).eis
+
+        eis[step.name] = scores
+
+    return eis
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Choice of the start months of operations which minimise the combined seasonal
+environmental impact score.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+import numpy as np
+import pandas as pd
+
+from .main import _freeze
+from .observations import MONTHS
+
+
+def get_window_costs(monthly_costs, durations):
+
+    '''Calculate the cost of starting each operation in each month, given the
+    monthly cost of each operation and its duration in months.
+
+    Args:
+        monthly_costs (numpy.ndarray): Costs of shape (n_operations, 12)
+        durations (list): Duration of each operation in months
+
+    Returns:
+        tuple: window costs of shape (n_operations, 12) and occupancy counts
+          of shape (n_operations, 12, 12), giving the number of times each
+          month is worked for each start month.
+
+    '''
+
+    monthly_costs = np.asarray(monthly_costs, dtype=float)
+    durations = np.asarray(durations, dtype=int)
+
+    if (durations < 1).any():
+        errStr = "Operation durations must be at least one month"
+        raise ValueError(errStr)
+
+    n_operations = len(durations)
+    steps = np.arange(durations.max())
+    starts = np.arange(12)
+
+    # Month worked at each step for each start, masked beyond the duration
+    worked = (starts[:, np.newaxis] + steps) % 12
+    active = steps[np.newaxis, :] < durations[:, np.newaxis]
+
+    occupancy = np.zeros((n_operations, 12, 12), dtype=int)
+
+    for i in xrange(n_operations):
+        rows = np.repeat(starts, active[i].sum())
+        cols = worked[:, active[i]].ravel()
+        np.add.at(occupancy[i], (rows, cols), 1)
+
+    window_costs = (occupancy * monthly_costs[:, np.newaxis, :]).sum(axis=2)
+
+    return window_costs, occupancy
+
+
+def optimise_starts(monthly_costs,
+                    durations,
+                    allowed_starts=None,
+                    max_concurrent=None,
+                    peak_weight=0.,
+                    max_iterations=100):
+
+    '''Find start months minimising the total cost of a set of operations,
+    plus an optional penalty on the most costly month, subject to an optional
+    limit on the number of operations worked in any month.
+
+    Operations are placed greedily, most costly first, and then improved by
+    moving one operation at a time until no move reduces the objective.
+    Every candidate is evaluated by indexing precomputed arrays.
+
+    Args:
+        monthly_costs (numpy.ndarray): Costs of shape (n_operations, 12)
+        durations (list): Duration of each operation in months
+        allowed_starts (list, optional): Allowed start months (0-11) for
+          each operation, None for any month
+        max_concurrent (int, optional): Maximum operations per month
+        peak_weight (float, optional): Weight of the most costly month
+        max_iterations (int, optional): Maximum improvement sweeps
+
+    Returns:
+        tuple: start month (0-11) of each operation and the monthly cost
+          profile
+
+    '''
+
+    monthly_costs = np.asarray(monthly_costs, dtype=float)
+    window_costs, occupancy = get_window_costs(monthly_costs, durations)
+    n_operations = len(window_costs)
+
+    allowed = np.ones((n_operations, 12), dtype=bool)
+
+    if allowed_starts is not None:
+        for i, months in enumerate(allowed_starts):
+            if months is None: continue
+            allowed[i] = False
+            allowed[i, list(months)] = True
+
+    if not allowed.any(axis=1).all():
+        errStr = "Every operation must have at least one allowed start month"
+        raise ValueError(errStr)
+
+    if max_concurrent is None: max_concurrent = np.inf
+
+    profiles = occupancy * monthly_costs[:, np.newaxis, :]
+    starts = -np.ones(n_operations, dtype=int)
+    profile = np.zeros(12)
+    counts = np.zeros(12, dtype=int)
+
+    def get_objectives(i):
+
+        # Objective for every start of operation i, given the others
+        objectives = window_costs[i] + \
+                            peak_weight * (profile + profiles[i]).max(axis=1)
+        feasible = allowed[i] & \
+                        ((counts + occupancy[i]) <= max_concurrent).all(axis=1)
+        objectives[~feasible] = np.inf
+
+        return objectives
+
+    order = np.argsort(-window_costs.max(axis=1), kind="mergesort")
+
+    for i in order:
+
+        objectives = get_objectives(i)
+
+        if np.isinf(objectives).all():
+            errStr = ("No feasible start month for operation {} with at most "
+                      "{} concurrent operations").format(i, max_concurrent)
+            raise ValueError(errStr)
+
+        starts[i] = np.argmin(objectives)
+        profile += profiles[i, starts[i]]
+        counts += occupancy[i, starts[i]]
+
+    for _ in xrange(max_iterations):
+
+        improved = False
+
+        for i in order:
+
+            profile -= profiles[i, starts[i]]
+            counts -= occupancy[i, starts[i]]
+
+            objectives = get_objectives(i)
+            best = np.argmin(objectives)
+
+            if objectives[best] < objectives[starts[i]] - 1e-12:
+                starts[i] = best
+                improved = True
+
+            profile += profiles[i, starts[i]]
+            counts += occupancy[i, starts[i]]
+
+        if not improved: break
+
+    return starts, profile
+
+
+class SeasonalScheduler(object):
+
+    '''Schedule operations to minimise the combined seasonal EIS of a stage,
+    typically InstallationStage. The seasons table of the stage is computed
+    once for each distinct set of operation inputs and the combined monthly
+    EIS is taken as the mean over the functions with seasonal records.
+
+    Args:
+        stage (Stage): A constructed Stage object
+        input_dict (dict): Default inputs to the stage for all operations
+
+    '''
+
+    def __init__(self, stage, input_dict):
+
+        self._stage = stage
+        self._input_dict = input_dict
+
+        return
+
+    def get_monthly_eis(self, input_dict=None):
+
+        '''Combined seasonal EIS for each month, given the stage inputs.'''
+
+        if input_dict is None: input_dict = self._input_dict
+
+        seasons = self._stage(input_dict)[3]
+
+        if seasons.empty: return np.zeros(12)
+
+        seasons = seasons.reindex(MONTHS, axis=1).astype(float)
+        monthly_eis = seasons.mean(axis=0).fillna(0.).values
+
+        return monthly_eis
+
+    def __call__(self, operations, max_concurrent=None, peak_weight=0.):
+
+        '''Find the best start months for the given operations.
+
+        Args:
+            operations (list): dicts with keys "name", "duration" (months),
+              and optionally "months" (allowed start months, 1-12) and
+              "inputs" (dict of stage inputs updating the defaults)
+            max_concurrent (int, optional): Maximum operations per month
+            peak_weight (float, optional): Weight of the worst month in the
+              objective, in addition to the total
+
+        Returns:
+            tuple: DataFrame of the start month of each operation and Series
+              of the combined EIS for each month
+
+        '''
+
+        memo = {}
+        monthly_costs = []
+        durations = []
+        allowed_starts = []
+
+        for operation in operations:
+
+            inputs = operation.get("inputs")
+
+            # Operations with unhashable inputs are not memoised
+            key = _freeze(inputs or {})
+
+            if key is None or key not in memo:
+
+                input_dict = self._input_dict.copy()
+                if inputs: input_dict.update(inputs)
+
+                monthly_eis = self.get_monthly_eis(input_dict)
+                if key is not None: memo[key] = monthly_eis
+
+            else:
+
+                monthly_eis = memo[key]
+
+            # Negative scores are costs, positive scores are ignored
+            monthly_costs.append(-np.minimum(monthly_eis, 0.))
+            durations.append(operation["duration"])
+
+            months = operation.get("months")
+            if months is not None: months = [x - 1 for x in months];
+            allowed_starts.append(months)
+
+        starts, profile = optimise_starts(monthly_costs,
+                                          durations,
+                                          allowed_starts,
+                                          max_concurrent,
+                                          peak_weight)
+
+        schedule = pd.DataFrame({"name": [x["name"] for x in operations],
+                                 "duration": durations,
+                                 "start month": starts + 1,
+                                 "start": [MONTHS[x] for x in starts]},
+                                columns=["name",
+                                         "start",
+                                         "start month",
+                                         "duration"])
+
+        monthly_profile = pd.Series(-profile, index=MONTHS)
+
+        return schedule, monthly_profile
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Global sensitivity analysis of the numeric inputs of a Stage, using either
+the Morris elementary effects method or variance based (Sobol) indices
+estimated from Saltelli samples.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def get_morris_samples(n_inputs, n_trajectories, n_levels=4, seed=None):
+
+    '''Generate Morris one-at-a-time trajectories in the unit hypercube.
+
+    Args:
+        n_inputs (int): Number of varied inputs, k
+        n_trajectories (int): Number of trajectories, r
+        n_levels (int, optional): Number of grid levels, p (must be even)
+        seed (int, optional): Random seed
+
+    Returns:
+        tuple: samples array of shape (r * (k + 1), k) and an array of shape
+          (r, k) giving the input changed at each step of each trajectory.
+
+    '''
+
+    if n_levels < 2 or n_levels % 2:
+
+        errStr = ("Argument n_levels must be an even number greater than "
+                  "zero. {} given.").format(n_levels)
+        raise ValueError(errStr)
+
+    random = np.random.RandomState(seed)
+
+    delta = n_levels / (2. * (n_levels - 1))
+    base_levels = np.arange(n_levels // 2) / (n_levels - 1)
+
+    samples = np.empty((n_trajectories * (n_inputs + 1), n_inputs))
+    orders = np.empty((n_trajectories, n_inputs), dtype=int)
+
+    for i in xrange(n_trajectories):
+
+        start = i * (n_inputs + 1)
+        point = random.choice(base_levels, n_inputs)
+        point += delta * random.randint(0, 2, n_inputs)
+        order = random.permutation(n_inputs)
+
+        samples[start] = point
+
+        for j, idx in enumerate(order):
+
+            point = point.copy()
+
+            if point[idx] + delta <= 1. + 1e-12:
+                point[idx] += delta
+            else:
+                point[idx] -= delta
+
+            samples[start + j + 1] = point
+
+        orders[i] = order
+
+    return samples, orders
+
+
+def get_saltelli_samples(n_inputs, n_samples, seed=None):
+
+    '''Generate samples in the unit hypercube for estimating first order and
+    total Sobol indices. The rows are ordered as the base matrices A and B
+    followed by the k matrices AB_i, where column i of A is taken from B.
+
+    Returns:
+        numpy.ndarray: samples array of shape (n_samples * (k + 2), k)
+
+    '''
+
+    random = np.random.RandomState(seed)
+
+    base = random.random_sample((n_samples, 2 * n_inputs))
+    A = base[:, :n_inputs]
+    B = base[:, n_inputs:]
+
+    blocks = [A, B]
+
+    for i in xrange(n_inputs):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+
+    samples = np.vstack(blocks)
+
+    return samples
+
+
+def get_morris_indices(outputs, samples, orders):
+
+    '''Calculate the mean, mean absolute and standard deviation of the
+    elementary effects for each input from the outputs of the Morris
+    trajectories. Outputs are given as an array of shape (n_rows, n_outputs)
+    and NaN outputs are ignored.
+
+    Returns:
+        tuple: mu, mu_star and sigma arrays of shape (k, n_outputs)
+
+    '''
+
+    outputs = np.asarray(outputs, dtype=float)
+    if outputs.ndim == 1: outputs = outputs[:, np.newaxis];
+
+    n_trajectories, n_inputs = orders.shape
+    effects = np.empty((n_trajectories, n_inputs, outputs.shape[1]))
+
+    for i in xrange(n_trajectories):
+
+        start = i * (n_inputs + 1)
+
+        for j, idx in enumerate(orders[i]):
+
+            step = samples[start + j + 1, idx] - samples[start + j, idx]
+            change = outputs[start + j + 1] - outputs[start + j]
+            effects[i, idx] = change / step
+
+    mu = _nan_reduce(np.nanmean, effects)
+    mu_star = _nan_reduce(np.nanmean, np.abs(effects))
+    sigma = _nan_reduce(np.nanstd, effects)
+
+    return mu, mu_star, sigma
+
+
+def get_sobol_indices(outputs, n_inputs):
+
+    '''Calculate first order (Saltelli, 2010) and total (Jansen, 1999)
+    Sobol indices from the outputs of the Saltelli samples. Outputs are given
+    as an array of shape (n_rows, n_outputs). Indices for outputs with zero
+    variance are NaN.
+
+    Returns:
+        tuple: first order and total indices arrays of shape (k, n_outputs)
+
+    '''
+
+    outputs = np.asarray(outputs, dtype=float)
+    if outputs.ndim == 1: outputs = outputs[:, np.newaxis];
+
+    n_samples = outputs.shape[0] // (n_inputs + 2)
+
+    if outputs.shape[0] != n_samples * (n_inputs + 2):
+
+        errStr = ("Number of outputs ({}) is not compatible with Saltelli "
+                  "samples for {} inputs").format(outputs.shape[0], n_inputs)
+        raise ValueError(errStr)
+
+    blocks = outputs.reshape(n_inputs + 2, n_samples, -1)
+    fA = blocks[0]
+    fB = blocks[1]
+    fAB = blocks[2:]
+
+    variance = _nan_reduce(np.nanvar, np.concatenate([fA, fB]))
+    variance[variance == 0] = np.nan
+
+    first = _nan_reduce(np.nanmean, fB * (fAB - fA), axis=1) / variance
+    total = 0.5 * _nan_reduce(np.nanmean, (fA - fAB) ** 2, axis=1) / variance
+
+    return first, total
+
+
+class Sensitivity(object):
+
+    '''Global sensitivity analysis of the EIS calculated by a Stage.
+
+    Args:
+        stage (Stage): A constructed Stage object
+        base_inputs (dict): Input dictionary for the stage, providing values
+          for inputs which are not varied
+        bounds (dict): Lower and upper bounds for each varied numeric input
+
+    '''
+
+    def __init__(self, stage, base_inputs, bounds):
+
+        self._stage = stage
+        self._base_inputs = base_inputs
+        self._bounds = self._init_bounds(bounds)
+
+        return
+
+    def _init_bounds(self, bounds):
+
+        missing = set(bounds) - set(self._stage.get_inputs())
+
+        if missing:
+
+            missing_str = ", ".join(sorted(missing))
+            errStr = ("Bounds given for variables which are not inputs of "
+                      "the stage: {}").format(missing_str)
+            raise KeyError(errStr)
+
+        ordered = OrderedDict()
+
+        for name in sorted(bounds):
+
+            lower, upper = bounds[name]
+
+            if not lower < upper:
+                errStr = ("Lower bound must be less than upper bound for "
+                          "variable '{}'").format(name)
+                raise ValueError(errStr)
+
+            ordered[name] = (float(lower), float(upper))
+
+        return ordered
+
+    def get_input_names(self):
+
+        return self._bounds.keys()
+
+    def _get_outputs(self, unit_samples):
+
+        lower = np.array([x[0] for x in self._bounds.itervalues()])
+        upper = np.array([x[1] for x in self._bounds.itervalues()])
+        samples = lower + unit_samples * (upper - lower)
+
+        names = self.get_input_names()
+        input_dicts = []
+
+        for row in samples:
+
+            input_dict = self._base_inputs.copy()
+            input_dict.update(zip(names, row))
+            input_dicts.append(input_dict)
+
+        eis_df, global_df = self._stage.get_batch_eis(input_dicts)
+        outputs = pd.concat([eis_df, global_df], axis=1)
+
+        return outputs
+
+    def morris(self, n_trajectories, n_levels=4, seed=None):
+
+        '''Morris elementary effects screening.
+
+        Returns:
+            dict: DataFrames of "mu", "mu_star" and "sigma" indexed by input,
+              with a column for each impact function and global EIS key.
+
+        '''
+
+        samples, orders = get_morris_samples(len(self._bounds),
+                                             n_trajectories,
+                                             n_levels,
+                                             seed)
+        outputs = self._get_outputs(samples)
+
+        indices = get_morris_indices(outputs.values, samples, orders)
+
+        result = {}
+
+        for key, values in zip(["mu", "mu_star", "sigma"], indices):
+            result[key] = pd.DataFrame(values,
+                                       index=self.get_input_names(),
+                                       columns=outputs.columns)
+
+        return result
+
+    def sobol(self, n_samples, seed=None):
+
+        '''Variance based first order and total sensitivity indices.
+
+        Returns:
+            dict: DataFrames of "S1" and "ST" indexed by input, with a column
+              for each impact function and global EIS key.
+
+        '''
+
+        n_inputs = len(self._bounds)
+        samples = get_saltelli_samples(n_inputs, n_samples, seed)
+        outputs = self._get_outputs(samples)
+
+        first, total = get_sobol_indices(outputs.values, n_inputs)
+
+        result = {}
+
+        for key, values in zip(["S1", "ST"], [first, total]):
+            result[key] = pd.DataFrame(values,
+                                       index=self.get_input_names(),
+                                       columns=outputs.columns)
+
+        return result
+
+
+def _nan_reduce(func, values, axis=0):
+
+    '''Apply a nan-ignoring numpy reduction, without warnings for all NaN
+    slices.'''
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+
+        mask = np.isnan(values).all(axis=axis)
+        filled = np.where(np.isnan(values).all(axis=axis, keepdims=True),
+                          0.,
+                          values)
+        result = func(filled, axis=axis)
+
+    result = np.asarray(result, dtype=float)
+    result[mask] = np.nan
+
+    return result
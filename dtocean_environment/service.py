@@ -0,0 +1,679 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Local assessment service, keeping constructed stages warm for each set of
+observations and answering JSON requests over HTTP. Concurrent requests for
+the same stage are collected into micro-batches which are scored together
+in a single call to Stage.get_batch_core.
+
+Endpoints:
+    POST /assess: body {"stage": name, "inputs": {...}, "observations":
+      name (optional), "target_level": level (optional)}
+    GET /health: status and the warm stages
+    GET /metrics: request, error and batch counts and latency percentiles
+
+The server binds to the loopback interface by default and needs no network
+access beyond it.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import print_function
+
+import sys
+import json
+import time
+import Queue
+import argparse
+import threading
+import SocketServer
+import BaseHTTPServer
+from collections import deque
+
+import numpy as np
+
+from .batch import STAGES, get_stage, read_table, read_weighting
+from .observations import Observations
+
+DEFAULT_OBSERVATIONS = "default"
+
+
+def _to_json(value):
+
+    '''Convert assessment results to JSON compatible types, with NaN as
+    null.'''
+
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.iteritems()}
+
+    if isinstance(value, (list, tuple)):
+        return [_to_json(x) for x in value]
+
+    if isinstance(value, np.generic):
+        value = value.item()
+
+    if isinstance(value, float) and np.isnan(value): return None
+
+    return value
+
+
+def get_json_result(result):
+
+    '''JSON compatible dictionary of a tuple returned by a stage.'''
+
+    (confidence_dict,
+     eis_dict,
+     recommendations_dict,
+     seasons_df,
+     global_eis) = result
+
+    seasons = {name: row.to_dict() for name, row in seasons_df.iterrows()}
+
+    json_result = {"confidence": confidence_dict,
+                   "eis": eis_dict,
+                   "recommendations": recommendations_dict,
+                   "seasons": seasons,
+                   "global_eis": global_eis}
+
+    return _to_json(json_result)
+
+
+class Metrics(object):
+
+    '''Thread safe counters and recent latencies of the service.'''
+
+    def __init__(self, max_latencies=10000):
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=max_latencies)
+        self._start = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+        return
+
+    def add_request(self, latency, error=False):
+
+        with self._lock:
+            self.requests += 1
+            if error: self.errors += 1
+            self._latencies.append(latency)
+
+        return
+
+    def add_batch(self, size):
+
+        with self._lock:
+            self.batches += 1
+            self.batched_requests += size
+
+        return
+
+    def get_metrics(self):
+
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=float)
+            requests = self.requests
+            errors = self.errors
+            batches = self.batches
+            batched_requests = self.batched_requests
+
+        if batches:
+            mean_batch = float(batched_requests) / batches
+        else:
+            mean_batch = None
+
+        metrics = {"uptime": time.time() - self._start,
+                   "requests": requests,
+                   "errors": errors,
+                   "batches": batches,
+                   "mean_batch_size": mean_batch}
+
+        for percentile in [50, 95, 99]:
+
+            key = "latency_p{}".format(percentile)
+
+            if latencies.size:
+                metrics[key] = float(np.percentile(latencies, percentile))
+            else:
+                metrics[key] = None
+
+        return metrics
+
+
+class BatcherStopped(RuntimeError):
+
+    '''Raised for a request which a closed MicroBatcher will not score.'''
+
+    pass
+
+
+class _Request(object):
+
+    def __init__(self, input_dict, target_level):
+
+        self.input_dict = input_dict
+        self.target_level = target_level
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+        return
+
+
+class MicroBatcher(object):
+
+    '''Collects requests for a stage from many threads and scores them in
+    batches. A batch is started when max_batch requests are waiting or
+    max_delay seconds after its first request arrived.'''
+
+    def __init__(self, stage, max_batch=64, max_delay=0.005, metrics=None):
+
+        self._stage = stage
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._metrics = metrics
+        self._queue = Queue.Queue()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+        return
+
+    def submit(self, input_dict, target_level=None):
+
+        '''Assess an input dictionary, blocking until its batch is
+        scored.
+
+        Returns:
+            tuple: as returned by Stage.__call__
+
+        '''
+
+        if not self._thread.is_alive():
+            raise BatcherStopped("The batcher has stopped")
+
+        request = _Request(input_dict, target_level)
+        self._queue.put(request)
+
+        # Waiting with a timeout keeps the thread interruptible
+        while not request.done.wait(1.):
+
+            if self._thread.is_alive(): continue
+            if request.done.is_set(): break
+
+            raise BatcherStopped("The batcher has stopped before scoring "
+                                 "the request")
+
+        if request.error is not None: raise request.error
+
+        return request.result
+
+    def close(self):
+
+        self._queue.put(None)
+        self._thread.join()
+
+        return
+
+    def _get_batch(self):
+
+        first = self._queue.get()
+        if first is None: return None
+
+        batch = [first]
+        deadline = time.time() + self._max_delay
+
+        while len(batch) < self._max_batch:
+
+            remaining = deadline - time.time()
+
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    request = self._queue.get_nowait()
+            except Queue.Empty:
+                break
+
+            if request is None:
+                self._queue.put(None)
+                break
+
+            batch.append(request)
+
+        return batch
+
+    def _run(self):
+
+        while True:
+
+            batch = self._get_batch()
+            if batch is None: break
+
+            levels = {}
+
+            for request in batch:
+                levels.setdefault(request.target_level, []).append(request)
+
+            for target_level, requests in levels.iteritems():
+                self._score(requests, target_level)
+
+            if self._metrics is not None: self._metrics.add_batch(len(batch))
+
+        return
+
+    def _score(self, requests, target_level):
+
+        try:
+            self._set_results(requests, target_level)
+        except Exception as e:
+            self._set_errors(requests, target_level, e)
+
+        for request in requests: request.done.set()
+
+        return
+
+    def _set_results(self, requests, target_level):
+
+        input_dicts = [x.input_dict for x in requests]
+
+        core_dict = self._stage.get_batch_core(input_dicts, target_level)
+        results = self._stage.get_core_results(core_dict, len(input_dicts))
+
+        for request, result in zip(requests, results):
+            request.result = result
+
+        return
+
+    def _set_errors(self, requests, target_level, error):
+
+        '''Find the failing requests of a batch by scoring its halves in
+        turn, so that only they see an error and the others are rescored
+        once per halving rather than individually.'''
+
+        if len(requests) == 1:
+            requests[0].error = error
+            return
+
+        middle = len(requests) // 2
+
+        for half in (requests[:middle], requests[middle:]):
+
+            try:
+                self._set_results(half, target_level)
+            except Exception as e:
+                self._set_errors(half, target_level, e)
+
+        return
+
+
+class AssessmentService(object):
+
+    '''Warm stages and their batchers for each named set of observations.
+    The "default" set, with no observations, is always available.
+
+    Args:
+        max_batch (int, optional): Maximum requests scored together
+        max_delay (float, optional): Seconds to wait for further requests
+          after the first of a batch
+
+    '''
+
+    def __init__(self, max_batch=64, max_delay=0.005):
+
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._lock = threading.Lock()
+        self._observations = {DEFAULT_OBSERVATIONS: (Observations(), None)}
+        self._batchers = {}
+        self._stages = {}
+        self.metrics = Metrics()
+
+        return
+
+    def add_observation_set(self, name,
+                                  protected_observations=None,
+                                  receptor_observations=None,
+                                  weighting=None):
+
+        '''Add or replace a named set of observations, with tables in the
+        formats used by the stages and a dict of weighting parameters keyed
+        by function name. The tables are compiled once and shared by every
+        stage of the set.'''
+
+        observations = Observations(protected_observations,
+                                    receptor_observations)
+
+        with self._lock:
+
+            self._observations[name] = (observations, weighting)
+
+            for key in list(self._batchers):
+
+                if key[1] != name: continue
+
+                self._batchers.pop(key).close()
+                del self._stages[key]
+
+        return
+
+    def get_observation_sets(self):
+
+        return sorted(self._observations)
+
+    def _get_batcher(self, stage_name, observations):
+
+        '''The stage and its batcher for the given stage and observation set
+        names, read together so that a concurrent replacement of the
+        observation set can not separate them.'''
+
+        key = (stage_name, observations)
+
+        with self._lock:
+
+            if key in self._batchers:
+                return self._stages[key], self._batchers[key]
+
+            if stage_name not in STAGES:
+                errStr = "Unknown stage '{}'".format(stage_name)
+                raise ValueError(errStr)
+
+            if observations not in self._observations:
+                errStr = "Unknown observation set '{}'".format(observations)
+                raise ValueError(errStr)
+
+            compiled, weighting = self._observations[observations]
+            stage = get_stage(STAGES[stage_name],
+                              weighting=weighting,
+                              observations=compiled)
+            batcher = MicroBatcher(stage,
+                                   self._max_batch,
+                                   self._max_delay,
+                                   self.metrics)
+
+            self._stages[key] = stage
+            self._batchers[key] = batcher
+
+        return stage, batcher
+
+    def get_stage(self, stage_name, observations=DEFAULT_OBSERVATIONS):
+
+        '''Warm stage for the given stage and observation set names,
+        constructing it on first use.'''
+
+        stage, _ = self._get_batcher(stage_name, observations)
+
+        return stage
+
+    def warm(self, stage_names=None):
+
+        '''Construct the given stages, or all stages, for every
+        observation set.'''
+
+        if stage_names is None: stage_names = list(STAGES.keys())
+
+        for observations in self.get_observation_sets():
+            for stage_name in stage_names:
+                self._get_batcher(stage_name, observations)
+
+        return
+
+    def assess(self, stage_name,
+                     inputs,
+                     observations=None,
+                     target_level=None):
+
+        '''Assess a dict of inputs, where inputs which are not given are
+        None.
+
+        Returns:
+            dict: JSON compatible confidence, EIS, recommendations, seasons
+              and global EIS
+
+        Raises:
+            KeyError: if an input is not used by the stage
+            ValueError: for inputs which are not a dict, or an unknown
+              stage, observation set or target level
+
+        '''
+
+        if observations is None: observations = DEFAULT_OBSERVATIONS
+
+        start = time.time()
+        error = True
+
+        try:
+
+            if not isinstance(inputs, dict):
+                raise ValueError("The inputs must be a dict")
+
+            # A batcher is closed if its observation set is replaced, in
+            # which case the request is submitted once more to the new one
+            for attempt in xrange(2):
+
+                stage, batcher = self._get_batcher(stage_name, observations)
+                input_names = set(stage.get_inputs())
+
+                unknown = set(inputs) - input_names
+
+                if unknown:
+                    errStr = "Unknown inputs for stage '{}': {}".format(
+                                                stage_name,
+                                                ", ".join(sorted(unknown)))
+                    raise KeyError(errStr)
+
+                input_dict = {name: inputs.get(name) for name in input_names}
+
+                try:
+                    result = batcher.submit(input_dict, target_level)
+                except BatcherStopped:
+                    if attempt: raise
+                    continue
+
+                break
+
+            error = False
+
+        finally:
+
+            self.metrics.add_request(time.time() - start, error)
+
+        return get_json_result(result)
+
+    def get_health(self):
+
+        with self._lock:
+            stages = sorted("{}/{}".format(*key) for key in self._stages)
+
+        return {"status": "ok",
+                "observations": self.get_observation_sets(),
+                "stages": stages}
+
+    def close(self):
+
+        with self._lock:
+            for batcher in self._batchers.values(): batcher.close()
+            self._batchers = {}
+            self._stages = {}
+
+        return
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def _send_json(self, status, body):
+
+        data = json.dumps(body)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+        return
+
+    def do_GET(self):
+
+        service = self.server.service
+
+        if self.path == "/health":
+            self._send_json(200, service.get_health())
+        elif self.path == "/metrics":
+            self._send_json(200, service.metrics.get_metrics())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+        return
+
+    def do_POST(self):
+
+        if self.path != "/assess":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+
+            length = int(self.headers.getheader("Content-Length", 0))
+            body = json.loads(self.rfile.read(length))
+
+            if not isinstance(body, dict) or "stage" not in body:
+                raise ValueError("Request must be an object with a 'stage' "
+                                 "member")
+
+            result = self.server.service.assess(
+                                            body["stage"],
+                                            body.get("inputs", {}),
+                                            body.get("observations"),
+                                            body.get("target_level"))
+
+        except (KeyError, ValueError) as e:
+
+            self._send_json(400, {"error": str(e)})
+            return
+
+        except Exception as e:
+
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self._send_json(200, result)
+
+        return
+
+    def log_message(self, format, *args):
+
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self,
+                                                              format,
+                                                              *args)
+
+        return
+
+
+class AssessmentServer(SocketServer.ThreadingMixIn,
+                       BaseHTTPServer.HTTPServer):
+
+    '''HTTP server for an AssessmentService, handling each connection in a
+    thread so that concurrent requests can share batches.'''
+
+    daemon_threads = True
+
+    def __init__(self, service, host="127.0.0.1", port=8080, verbose=False):
+
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), _Handler)
+        self.service = service
+        self.verbose = verbose
+
+        return
+
+
+def get_parser():
+
+    parser = argparse.ArgumentParser(
+        description="Serve environmental impact assessments over HTTP")
+
+    parser.add_argument("-p", "--protected",
+                        help="CSV table of protected species observations")
+    parser.add_argument("-r", "--receptors",
+                        help="CSV table of receptor observations")
+    parser.add_argument("-w", "--weighting",
+                        help="CSV table of function weighting parameters")
+    parser.add_argument("--host",
+                        default="127.0.0.1",
+                        help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port",
+                        type=int,
+                        default=8080,
+                        help="port to bind (default: 8080)")
+    parser.add_argument("-b", "--max-batch",
+                        type=int,
+                        default=64,
+                        help="maximum requests per batch (default: 64)")
+    parser.add_argument("-d", "--max-delay",
+                        type=float,
+                        default=0.005,
+                        help="seconds to wait for a batch to fill "
+                             "(default: 0.005)")
+    parser.add_argument("-v", "--verbose",
+                        action="store_true",
+                        help="log each request")
+
+    return parser
+
+
+def main(argv=None):
+
+    '''Entry point of the dtocean-environment-service command. Observation
+    tables given on the command line form the "default" observation
+    set.'''
+
+    args = get_parser().parse_args(argv)
+
+    protected = None
+    receptors = None
+    weighting = None
+
+    if args.protected is not None: protected = read_table(args.protected)
+    if args.receptors is not None: receptors = read_table(args.receptors)
+    if args.weighting is not None: weighting = read_weighting(args.weighting)
+
+    service = AssessmentService(args.max_batch, args.max_delay)
+    service.add_observation_set(DEFAULT_OBSERVATIONS,
+                                protected,
+                                receptors,
+                                weighting)
+    service.warm()
+
+    server = AssessmentServer(service, args.host, args.port, args.verbose)
+
+    print("Serving on http://{}:{}".format(*server.server_address),
+          file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+    return 0
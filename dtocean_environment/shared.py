@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Distribution of compiled stage plans to worker processes. A stage is
+published once as a directory of .npy files and a small manifest, and
+workers attach to it by memory mapping the arrays, so they share a single
+copy of the tables through the page cache and never read the CSV data.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import pickle
+import tempfile
+import importlib
+
+import numpy as np
+
+from .plan import LogigramPlan, StagePlan
+
+MANIFEST = "manifest.pkl"
+
+_ARRAY_FIELDS = ["pressure_levels",
+                 "pressure_scores",
+                 "observed",
+                 "receptor_scores",
+                 "monthly"]
+
+_attached = {}
+
+
+def _save_array(dir_path, file_name, array):
+
+    np.save(os.path.join(dir_path, file_name), np.asarray(array))
+
+    return file_name
+
+
+def _import_class(module_name, class_name):
+
+    module = importlib.import_module(module_name)
+
+    return getattr(module, class_name)
+
+
+def publish_stage(stage, dir_path=None):
+
+    '''Write the compiled plan of a stage to a directory, for attaching in
+    other processes with attach_stage. The manifest is written last, so a
+    directory is never attached to before it is complete. Published files
+    are never rewritten, as other processes may have them memory mapped, so
+    each publication needs a new or empty directory.
+
+    Args:
+        stage (Stage): A constructed stage
+        dir_path (str, optional): New or empty output directory, a new
+          temporary directory if not given
+
+    Returns:
+        str: path to the directory
+
+    '''
+
+    if dir_path is None:
+        dir_path = tempfile.mkdtemp(prefix="dtocean_environment_")
+    elif not os.path.isdir(dir_path):
+        os.makedirs(dir_path)
+    elif os.listdir(dir_path):
+        errStr = ("Stages can only be published to a new or empty "
+                  "directory. Given: {}").format(dir_path)
+        raise ValueError(errStr)
+
+    steps = []
+
+    for i, step in enumerate(stage.get_plan()):
+
+        arrays = {}
+
+        for field in _ARRAY_FIELDS:
+
+            array = getattr(step, field)
+            if array is None: continue
+
+            file_name = "{}_{}.npy".format(i, field)
+            arrays[field] = _save_array(dir_path, file_name, array)
+
+        if step.receptor_bounds is None:
+
+            bounds = None
+
+        else:
+
+            bounds = []
+
+            for j, pair in enumerate(step.receptor_bounds):
+
+                if pair is None:
+                    bounds.append(None)
+                    continue
+
+                file_names = tuple(
+                        _save_array(dir_path,
+                                    "{}_bounds_{}_{}.npy".format(i, j, k),
+                                    array)
+                                            for k, array in enumerate(pair))
+                bounds.append(file_names)
+
+        logigram_class = step.kernel.__self__
+
+        steps.append({"name": step.name,
+                      "kernel": (logigram_class.__module__,
+                                 logigram_class.__name__),
+                      "inputs": step.inputs,
+                      "sign": step.sign,
+                      "recommendations": step.recommendations,
+                      "constraint": step.constraint,
+                      "constraint_score": step.constraint_score,
+                      "receptors": step.receptors,
+                      "protected": step.protected,
+                      "arrays": arrays,
+                      "bounds": bounds})
+
+    stage_class = type(stage)
+    manifest = {"stage": (stage_class.__module__, stage_class.__name__),
+                "steps": steps}
+
+    manifest_path = os.path.join(dir_path, MANIFEST)
+    temp_path = manifest_path + ".tmp"
+
+    with open(temp_path, "wb") as manifest_file:
+        pickle.dump(manifest, manifest_file, pickle.HIGHEST_PROTOCOL)
+
+    os.rename(temp_path, manifest_path)
+
+    return dir_path
+
+
+def _load_step(dir_path, step_dict, mmap_mode):
+
+    def load(file_name):
+        return np.load(os.path.join(dir_path, file_name),
+                       mmap_mode=mmap_mode)
+
+    arrays = {field: None for field in _ARRAY_FIELDS}
+    arrays.update({field: load(file_name)
+                        for field, file_name in step_dict["arrays"].items()})
+
+    if step_dict["bounds"] is None:
+        bounds = None
+    else:
+        bounds = tuple(None if x is None else tuple(load(y) for y in x)
+                                                for x in step_dict["bounds"])
+
+    recommendations = step_dict["recommendations"]
+    recommendations.setflags(write=False)
+
+    logigram_class = _import_class(*step_dict["kernel"])
+
+    step = LogigramPlan(step_dict["name"],
+                        logigram_class.get_impact,
+                        step_dict["inputs"],
+                        step_dict["sign"],
+                        arrays["pressure_levels"],
+                        arrays["pressure_scores"],
+                        recommendations,
+                        step_dict["constraint"],
+                        step_dict["constraint_score"],
+                        step_dict["receptors"],
+                        arrays["observed"],
+                        arrays["receptor_scores"],
+                        bounds,
+                        arrays["monthly"],
+                        step_dict["protected"])
+
+    return step
+
+
+def attach_stage(dir_path, mmap_mode="r"):
+
+    '''Create a stage from a directory written by publish_stage, memory
+    mapping its arrays read-only.
+
+    Returns:
+        Stage: of the published type, see Stage.from_plan
+
+    '''
+
+    with open(os.path.join(dir_path, MANIFEST), "rb") as manifest_file:
+        manifest = pickle.load(manifest_file)
+
+    stage_class = _import_class(*manifest["stage"])
+    steps = [_load_step(dir_path, x, mmap_mode) for x in manifest["steps"]]
+
+    return stage_class.from_plan(StagePlan(steps))
+
+
+def _get_manifest_id(dir_path):
+
+    # Identifies the publication to a directory, which may have been
+    # removed and published to again
+    stat = os.stat(os.path.join(dir_path, MANIFEST))
+
+    return (stat.st_ino, stat.st_mtime, stat.st_size)
+
+
+def get_attached_stage(dir_path):
+
+    '''Stage attached to the given directory, attaching only once per
+    process for each publication to the directory. Suitable for use in
+    process pool workers.'''
+
+    dir_path = os.path.realpath(dir_path)
+    manifest_id = _get_manifest_id(dir_path)
+    cached = _attached.get(dir_path)
+
+    if cached is None or cached[0] != manifest_id:
+        _attached[dir_path] = (manifest_id, attach_stage(dir_path))
+
+    return _attached[dir_path][1]
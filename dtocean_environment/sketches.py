@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Streaming distributions of environmental impact scores, for Monte Carlo and
+sensitivity runs where only the distribution of the scores is needed. The
+scores are bounded, so fixed bin histograms give quantiles with an error of
+at most one bin width in constant memory, and histograms from different
+workers merge by adding their counts.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .cube import get_global_eis
+from .observations import MONTHS
+
+
+class Histogram(object):
+
+    '''Fixed bin histogram of a stream of values, with counts of values
+    outside its range and of NaN values, which are excluded from the
+    quantiles.
+
+    Args:
+        low (float, optional): Lower edge of the first bin
+        high (float, optional): Upper edge of the last bin
+        bins (int, optional): Number of bins
+
+    '''
+
+    def __init__(self, low=-100., high=50., bins=1500):
+
+        self.low = float(low)
+        self.high = float(high)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.below = 0
+        self.above = 0
+        self.missing = 0
+        self.total = 0.
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+        return
+
+    @property
+    def bins(self):
+        return len(self.counts)
+
+    @property
+    def width(self):
+        return (self.high - self.low) / self.bins
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.below + self.above
+
+    def update(self, values):
+
+        values = np.asarray(values, dtype=float).ravel()
+
+        valid = ~np.isnan(values)
+        self.missing += int(values.size - valid.sum())
+        values = values[valid]
+
+        if not values.size: return
+
+        self.total += values.sum()
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+
+        below = values < self.low
+        above = values > self.high
+        self.below += int(below.sum())
+        self.above += int(above.sum())
+
+        inside = values[~below & ~above]
+        index = ((inside - self.low) / self.width).astype(int)
+        index = np.minimum(index, self.bins - 1)
+        self.counts += np.bincount(index, minlength=self.bins)
+
+        return
+
+    def merge(self, other):
+
+        '''Add the counts of a histogram with the same bins.'''
+
+        if (other.low != self.low or
+            other.high != self.high or
+            other.bins != self.bins):
+            raise ValueError("Only histograms with the same bins can be "
+                             "merged")
+
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        self.missing += other.missing
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+        return
+
+    def mean(self):
+
+        if not self.count: return np.nan
+
+        return self.total / self.count
+
+    def quantile(self, q):
+
+        '''Quantiles of the values, interpolated linearly within bins.
+        Values outside the range are placed at the observed minimum or
+        maximum.
+
+        Args:
+            q: Quantile or array of quantiles in [0, 1]
+
+        '''
+
+        q = np.asarray(q, dtype=float)
+
+        if ((q < 0) | (q > 1)).any():
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        if not self.count: return np.full(q.shape, np.nan)
+
+        edges = np.linspace(self.low, self.high, self.bins + 1)
+
+        # Clip the occupied bins to the observed extremes
+        edges = np.clip(edges, self.minimum, self.maximum)
+        counts = np.concatenate([[self.below], self.counts, [self.above]])
+        edges = np.concatenate([[self.minimum], edges, [self.maximum]])
+
+        cumulative = np.concatenate([[0], np.cumsum(counts)])
+        target = q * cumulative[-1]
+
+        # Bin containing each target, skipping empty bins
+        index = np.searchsorted(cumulative, target, side="left")
+        index = np.clip(index, 1, len(counts))
+
+        start = cumulative[index - 1]
+        in_bin = counts[index - 1].astype(float)
+        fraction = np.where(in_bin > 0,
+                            (target - start) / np.where(in_bin > 0,
+                                                        in_bin,
+                                                        1.),
+                            0.)
+
+        lower = edges[index - 1]
+        upper = edges[index]
+
+        return lower + fraction * (upper - lower)
+
+
+def get_function_seasons(result):
+
+    '''Monthly scores of a function from an array result of the scoring
+    core, taking the highest receptor score for positive impacts and the
+    lowest for negative impacts, as in the seasons table of Stage.__call__.
+
+    Returns:
+        numpy.ndarray: of shape (n_impacts, 12), or None below confidence
+          level 3
+
+    '''
+
+    if result.seasons is None: return None
+
+    highest = result.seasons.max(axis=1)
+    lowest = result.seasons.min(axis=1)
+
+    return np.where((result.eis >= 0)[:, np.newaxis], highest, lowest)
+
+
+class EISSketch(object):
+
+    '''Streaming histograms of the EIS of each function and of the global
+    EIS per stage, and of the monthly scores of each function. Sketches
+    built in different processes can be merged.
+
+    Args:
+        low (float, optional): Lower edge of the histograms
+        high (float, optional): Upper edge of the histograms
+        bins (int, optional): Number of bins of each histogram
+
+    '''
+
+    def __init__(self, low=-100., high=50., bins=1500):
+
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.histograms = {}
+
+        return
+
+    def _update(self, key, values):
+
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(self.low, self.high, self.bins)
+
+        self.histograms[key].update(values)
+
+        return
+
+    def update(self, stage_name, stage, input_dicts, target_level=None):
+
+        '''Assess a batch of input dictionaries with a stage and add their
+        scores. Keys are (stage name, function name or global EIS name,
+        month or None).'''
+
+        n = len(input_dicts)
+        core_dict = stage.get_batch_core(input_dicts, target_level)
+        names = sorted(core_dict)
+        scores = np.full((n, len(names)), np.nan)
+
+        for j, name in enumerate(names):
+
+            rows, result = core_dict[name]
+
+            if result is None:
+                self._update((stage_name, name, None), np.full(n, np.nan))
+                continue
+
+            scores[rows, j] = result.eis
+            self._update((stage_name, name, None), scores[:, j])
+
+            seasons = get_function_seasons(result)
+            if seasons is None: continue
+
+            for k, month in enumerate(MONTHS):
+                self._update((stage_name, name, month), seasons[:, k])
+
+        global_eis = get_global_eis(scores, axis=1)
+
+        for key, values in global_eis.iteritems():
+            self._update((stage_name, key, None), values)
+
+        return
+
+    def merge(self, other):
+
+        '''Add the histograms of another sketch.'''
+
+        for key, histogram in other.histograms.iteritems():
+
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.low,
+                                                 self.high,
+                                                 self.bins)
+
+            self.histograms[key].merge(histogram)
+
+        return
+
+    def quantile(self, stage_name, name, q, month=None):
+
+        '''Quantiles of the EIS of a function or global EIS key, or of the
+        monthly scores of a function.'''
+
+        key = (stage_name, name, month)
+
+        if key not in self.histograms:
+            errStr = "No scores recorded for {}".format(key)
+            raise KeyError(errStr)
+
+        return self.histograms[key].quantile(q)
+
+    def get_quantiles(self, q=(0.05, 0.5, 0.95)):
+
+        '''Table of quantiles, the mean and counts of all histograms.
+
+        Returns:
+            pandas.DataFrame: indexed by stage, name and month, with the
+              quantile columns named as "q0.5" for the median
+
+        '''
+
+        q = list(q)
+        rows = []
+        keys = sorted(self.histograms,
+                      key=lambda x: (x[0], x[1], -1 if x[2] is None
+                                                    else MONTHS.index(x[2])))
+
+        with warnings.catch_warnings():
+
+            warnings.simplefilter("ignore", RuntimeWarning)
+
+            for key in keys:
+
+                histogram = self.histograms[key]
+                rows.append([histogram.count, histogram.missing,
+                             histogram.mean()] +
+                            list(histogram.quantile(q)))
+
+        index = pd.MultiIndex.from_tuples(keys,
+                                          names=["stage", "name", "month"])
+        columns = ["count", "missing", "mean"] + ["q{:g}".format(x)
+                                                            for x in q]
+
+        return pd.DataFrame(rows, index=index, columns=columns)
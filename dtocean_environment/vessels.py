@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2026 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Ingestion of vessel position reports, such as AIS logs, to derive the inputs
+of the CollisionRiskVessel logigram for each time window.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from __future__ import division
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point, box
+from shapely.prepared import prep
+
+
+class PolygonIndex(object):
+
+    '''Grid index for fast point in polygon tests. Cells entirely within the
+    polygon accept points without further testing, cells outside reject them
+    and only points in cells crossing the boundary are tested exactly.
+
+    Args:
+        polygon (shapely.geometry.Polygon): The area to test against
+        n_cells (int, optional): Number of grid cells along each axis
+
+    '''
+
+    OUTSIDE = 0
+    INSIDE = 1
+    BOUNDARY = 2
+
+    def __init__(self, polygon, n_cells=64):
+
+        self._polygon = prep(polygon)
+        self._bounds = polygon.bounds
+        self._n_cells = n_cells
+        self._cell_size = self._init_cell_size()
+        self._cells = self._init_cells()
+
+        return
+
+    def _init_cell_size(self):
+
+        x_min, y_min, x_max, y_max = self._bounds
+
+        dx = (x_max - x_min) / self._n_cells
+        dy = (y_max - y_min) / self._n_cells
+
+        return dx, dy
+
+    def _init_cells(self):
+
+        x_min, y_min, _, _ = self._bounds
+        dx, dy = self._cell_size
+
+        cells = np.empty((self._n_cells, self._n_cells), dtype=np.int8)
+
+        for i in xrange(self._n_cells):
+            for j in xrange(self._n_cells):
+
+                cell = box(x_min + i * dx,
+                           y_min + j * dy,
+                           x_min + (i + 1) * dx,
+                           y_min + (j + 1) * dy)
+
+                if self._polygon.contains(cell):
+                    cells[i, j] = self.INSIDE
+                elif self._polygon.intersects(cell):
+                    cells[i, j] = self.BOUNDARY
+                else:
+                    cells[i, j] = self.OUTSIDE
+
+        return cells
+
+    def contains(self, x, y):
+
+        '''Test if the given points are within the polygon.
+
+        Returns:
+            numpy.ndarray: boolean array
+
+        '''
+
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        x_min, y_min, x_max, y_max = self._bounds
+        dx, dy = self._cell_size
+
+        result = np.zeros(x.shape, dtype=bool)
+        in_bounds = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+
+        if not in_bounds.any(): return result
+
+        idx = np.flatnonzero(in_bounds)
+        i = np.minimum(((x[idx] - x_min) / dx).astype(int), self._n_cells - 1)
+        j = np.minimum(((y[idx] - y_min) / dy).astype(int), self._n_cells - 1)
+        status = self._cells[i, j]
+
+        result[idx[status == self.INSIDE]] = True
+
+        for k in idx[status == self.BOUNDARY]:
+            result[k] = self._polygon.contains(Point(x[k], y[k]))
+
+        return result
+
+
+class VesselTraffic(object):
+
+    '''Accumulate vessel position reports within a lease area into counts of
+    distinct vessels and their sizes per time window. Only a record of the
+    largest reported size of each vessel seen in each window is kept, so
+    memory does not grow with the number of reports.
+
+    Args:
+        lease_area (shapely.geometry.Polygon): The lease area
+        freq (str, optional): pandas period frequency of the time windows
+        n_cells (int, optional): Grid size of the spatial index
+
+    '''
+
+    def __init__(self, lease_area, freq="M", n_cells=64):
+
+        self._lease_area = lease_area
+        self._index = PolygonIndex(lease_area, n_cells)
+        self._freq = freq
+        self._vessels = {}
+
+        return
+
+    def add_reports(self, vessel_ids, times, x, y, sizes):
+
+        '''Add a chunk of position reports. Reports outside the lease area
+        are discarded.'''
+
+        inside = self._index.contains(x, y)
+
+        if not inside.any(): return
+
+        reports = pd.DataFrame({"vessel": np.asarray(vessel_ids)[inside],
+                                "size": np.asarray(sizes,
+                                                   dtype=float)[inside]})
+        times = pd.to_datetime(np.asarray(times)[inside])
+        reports["period"] = pd.PeriodIndex(times, freq=self._freq)
+
+        chunk_sizes = reports.groupby(["period", "vessel"])["size"].max()
+
+        for (period, vessel), size in chunk_sizes.iteritems():
+
+            period_vessels = self._vessels.setdefault(period, {})
+
+            if vessel not in period_vessels or \
+                    period_vessels[vessel] < size or \
+                        np.isnan(period_vessels[vessel]):
+                period_vessels[vessel] = size
+
+        return
+
+    def read_csv(self, path,
+                       id_column="mmsi",
+                       time_column="timestamp",
+                       x_column="x",
+                       y_column="y",
+                       size_column="length",
+                       chunksize=100000):
+
+        '''Read position reports from a delimited text file in chunks.'''
+
+        usecols = [id_column, time_column, x_column, y_column, size_column]
+        reader = pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+
+        for chunk in reader:
+            self.add_reports(chunk[id_column].values,
+                             chunk[time_column].values,
+                             chunk[x_column].values,
+                             chunk[y_column].values,
+                             chunk[size_column].values)
+
+        return
+
+    def get_periods(self):
+
+        return sorted(self._vessels.keys())
+
+    def get_vessel_inputs(self):
+
+        '''Inputs to the CollisionRiskVessel logigram for each time window.
+
+        Returns:
+            pandas.DataFrame: "Number of Vessels", "Size of Vessels" and
+              "Total Surface Area" indexed by period
+
+        '''
+
+        periods = self.get_periods()
+        n_vessels = []
+        mean_sizes = []
+
+        for period in periods:
+
+            sizes = np.array(self._vessels[period].values(), dtype=float)
+            n_vessels.append(len(sizes))
+
+            if np.isnan(sizes).all():
+                mean_sizes.append(np.nan)
+            else:
+                mean_sizes.append(np.nanmean(sizes))
+
+        inputs_df = pd.DataFrame({"Number of Vessels": n_vessels,
+                                  "Size of Vessels": mean_sizes,
+                                  "Total Surface Area":
+                                                  self._lease_area.area},
+                                 index=pd.PeriodIndex(periods,
+                                                      freq=self._freq),
+                                 columns=["Number of Vessels",
+                                          "Size of Vessels",
+                                          "Total Surface Area"])
+
+        return inputs_df
+
+    def get_size_distribution(self, bins):
+
+        '''Number of distinct vessels in each size bin for each time window.
+
+        Returns:
+            pandas.DataFrame: counts indexed by period with a column for each
+              bin
+
+        '''
+
+        periods = self.get_periods()
+        counts = []
+
+        for period in periods:
+            sizes = np.array(self._vessels[period].values(), dtype=float)
+            counts.append(np.histogram(sizes[~np.isnan(sizes)], bins)[0])
+
+        columns = pd.IntervalIndex.from_breaks(bins)
+        distribution = pd.DataFrame(np.array(counts).reshape(-1,
+                                                             len(bins) - 1),
+                                    index=pd.PeriodIndex(periods,
+                                                         freq=self._freq),
+                                    columns=columns)
+
+        return distribution
+
+    def get_assessments(self, logigram):
+
+        '''Assess each time window with a CollisionRiskVessel logigram.
+
+        Returns:
+            pandas.Series: EIS indexed by period, or None for periods where
+              no vessel sizes are known
+
+        '''
+
+        inputs_df = self.get_vessel_inputs()
+        eis = []
+
+        for _, row in inputs_df.iterrows():
+
+            if np.isnan(row["Size of Vessels"]):
+                eis.append(None)
+                continue
+
+            eis.append(logigram(row.to_dict()).get_EIS())
+
+        return pd.Series(eis, index=inputs_df.index, dtype=object)
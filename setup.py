@@ -81,12 +81,19 @@ setup(name='dtocean-environment',
       packages=find_packages(),
       package_data={'dtocean_environment': extra_files
                     },
-      install_requires=['numpy',
+      install_requires=['futures; python_version < "3"',
+                        'numpy',
                         'pandas',
                         'polite>=0.9',
                         'scipy',
                         'shapely',
                         ],
+      entry_points={
+          'console_scripts':
+              ['dtocean-environment = dtocean_environment.batch:main',
+               'dtocean-environment-service = '
+                                        'dtocean_environment.service:main'],
+          },
       zip_safe=False, # Important for reading data files
       tests_require=['pytest'],
       cmdclass = {'test': PyTest,
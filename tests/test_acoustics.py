@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on acoustics.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import wave
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.acoustics import (read_wav_info,
+                                           get_bands,
+                                           process_recording,
+                                           get_level_statistics,
+                                           get_monthly_statistics,
+                                           get_noise_inputs)
+
+
+@pytest.fixture
+def recording(tmpdir):
+
+    # 10 seconds of a 1 kHz tone at half full scale, then 10 seconds at a
+    # tenth of full scale
+    sample_rate = 8000
+    time = np.arange(20 * sample_rate) / float(sample_rate)
+    amplitude = np.where(time < 10, 0.5, 0.1)
+    signal = amplitude * np.sin(2 * np.pi * 1000. * time)
+    samples = (signal * 2 ** 15).astype("<i2")
+
+    path = str(tmpdir.join("recording.wav"))
+
+    wav_file = wave.open(path, "wb")
+    wav_file.setnchannels(1)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(sample_rate)
+    wav_file.writeframes(samples.tostring())
+    wav_file.close()
+
+    return path
+
+
+def test_read_wav_info(recording):
+
+    info = read_wav_info(recording)
+
+    assert info.sample_rate == 8000
+    assert info.n_channels == 1
+    assert info.n_frames == 160000
+    assert info.dtype == "<i2"
+
+
+def test_read_wav_info_bad(tmpdir):
+
+    path = str(tmpdir.join("bad.wav"))
+
+    with open(path, "wb") as bad_file:
+        bad_file.write(b"NOT A WAV FILE")
+
+    with pytest.raises(ValueError):
+        read_wav_info(path)
+
+
+def test_get_bands():
+
+    bands = get_bands(100., 1000., fraction=3)
+
+    assert len(bands) == 11
+    assert np.isclose(np.sqrt(bands[0][0] * bands[0][1]), 100.)
+    assert np.isclose(bands[0][1] / bands[0][0], 10 ** 0.1)
+
+
+def test_process_recording(recording):
+
+    levels = process_recording(recording,
+                               start_time="2020-01-31 23:59:50",
+                               sensitivity=-120.,
+                               bands=[(900., 1100.), (2000., 3000.)],
+                               block_windows=3)
+
+    # Full scale is 1 V, so 0.5 amplitude is 120 + 20 log10(0.5 / sqrt(2))
+    expected = 120. + 20 * np.log10(0.5 / np.sqrt(2.))
+
+    assert len(levels) == 20
+    assert np.allclose(levels["broadband"].iloc[:10], expected, atol=0.01)
+    assert np.allclose(levels["900-1100 Hz"].iloc[:10], expected, atol=0.1)
+    assert (levels["2000-3000 Hz"] < expected - 40.).all()
+    assert np.allclose(levels["broadband"].iloc[10:],
+                       expected - 20 * np.log10(5.),
+                       atol=0.01)
+
+
+def test_process_recording_processes(recording):
+
+    serial = process_recording(recording, window=0.5, block_windows=4)
+    parallel = process_recording(recording,
+                                 window=0.5,
+                                 block_windows=4,
+                                 processes=2)
+
+    assert np.allclose(serial.values, parallel.values)
+
+
+def test_process_recording_processes_error(recording):
+
+    with pytest.raises(IndexError):
+        process_recording(recording,
+                          window=0.5,
+                          channel=1,
+                          block_windows=4,
+                          processes=2)
+
+
+def test_process_recording_hop(recording):
+
+    levels = process_recording(recording, window=2., hop=0.5)
+
+    assert len(levels) == 37
+
+
+def test_statistics(recording):
+
+    levels = process_recording(recording,
+                               start_time="2020-01-31 23:59:50",
+                               sensitivity=-120.)
+
+    stats = get_level_statistics(levels)
+    monthly = get_monthly_statistics(levels)
+
+    assert list(stats.index) == ["p5", "p50", "p95"]
+    assert len(monthly) == 6
+    january = monthly.loc[pd.Period("2020-01", "M")]
+    february = monthly.loc[pd.Period("2020-02", "M")]
+
+    assert january.loc["p50", "broadband"] > february.loc["p50", "broadband"]
+
+
+def test_get_noise_inputs(recording):
+
+    levels = process_recording(recording, sensitivity=-120.)
+
+    inputs = get_noise_inputs(levels.iloc[10:], levels.iloc[:10])
+
+    assert inputs["Measured Noise dB re 1muPa"] > \
+                                        inputs["Initial Noise dB re 1muPa"]
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on analysis.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.cube import ResultsCube
+from dtocean_environment.analysis import (get_pareto_mask,
+                                          non_dominated_sort,
+                                          get_top_k,
+                                          get_worst_receptors,
+                                          TopK)
+
+
+def brute_force_ranks(values):
+
+    ranks = np.full(len(values), -1)
+    front = 0
+
+    while (ranks < 0).any():
+
+        remaining = np.where(ranks < 0)[0]
+
+        for i in remaining:
+
+            others = values[remaining]
+            dominated = ((others <= values[i]).all(axis=1) &
+                                        (others < values[i]).any(axis=1))
+
+            if not dominated.any(): ranks[i] = front
+
+        front += 1
+
+    return ranks
+
+
+@pytest.mark.parametrize("n_objectives", [2, 3, 4])
+def test_non_dominated_sort(n_objectives):
+
+    np.random.seed(n_objectives)
+
+    # Integer values give ties and duplicates
+    values = np.random.randint(0, 8, size=(300, n_objectives)).astype(float)
+
+    ranks = non_dominated_sort(values)
+
+    assert (ranks == brute_force_ranks(values)).all()
+    assert (get_pareto_mask(values) == (ranks == 0)).all()
+
+
+def test_non_dominated_sort_maximise():
+
+    values = pd.DataFrame({"Negative Impact": [-20., -30., -20., np.nan],
+                           "cost": [3., 1., 4., 0.]},
+                          columns=["Negative Impact", "cost"])
+
+    ranks = non_dominated_sort(values, maximise=[True, False])
+
+    assert list(ranks) == [0, 0, 1, 0]
+
+
+def test_non_dominated_sort_max_fronts():
+
+    values = np.array([[0., 0., 0.],
+                       [1., 1., 1.],
+                       [2., 2., 2.]])
+
+    ranks = non_dominated_sort(values, max_fronts=1)
+
+    assert list(ranks) == [0, 1, 1]
+
+
+def test_non_dominated_sort_bad_maximise():
+
+    with pytest.raises(ValueError):
+        non_dominated_sort(np.zeros((2, 2)), maximise=[True])
+
+
+@pytest.mark.parametrize("largest", [True, False])
+def test_get_top_k(largest):
+
+    np.random.seed(1)
+    values = np.random.rand(4, 20)
+    values[0, :18] = np.nan
+
+    indices, top = get_top_k(values, 3, largest=largest)
+
+    expected = np.sort(values[1:], axis=1)
+    if largest: expected = expected[:, ::-1]
+
+    assert indices.shape == (4, 3)
+    assert np.allclose(top[1:], expected[:, :3])
+    assert (~np.isnan(top[0, :2])).all()
+    assert np.isnan(top[0, 2])
+
+
+def test_top_k_stream():
+
+    np.random.seed(2)
+    values = np.random.rand(1000)
+
+    top = TopK(5)
+    other = TopK(5)
+
+    for i in range(0, 500, 100): top.update(values[i:i + 100])
+    for i in range(500, 1000, 100):
+        other.update(values[i:i + 100], range(i, i + 100))
+
+    top.merge(other)
+    result = top.get()
+
+    expected = np.argsort(values)[::-1][:5]
+
+    assert list(result.index) == list(expected)
+    assert np.allclose(result.values, values[expected])
+
+
+def test_get_worst_receptors():
+
+    cube = ResultsCube(["a", "b"],
+                       ["hydrodynamics"],
+                       ["Turbidity"],
+                       ["fish", "birds", "seals"])
+
+    receptor_eis = cube.get_array("receptor_eis")
+    receptor_eis[0, 0, 0] = [-20., -50., -30.]
+    receptor_eis[1, 0, 0, 0] = -10.
+
+    names, values = get_worst_receptors(cube, "hydrodynamics", 2)
+
+    assert names.shape == (2, 1, 2)
+    assert list(names[0, 0]) == ["birds", "seals"]
+    assert list(names[1, 0]) == ["fish", None]
+    assert np.isnan(values[1, 0, 1])
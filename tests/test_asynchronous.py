@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on asynchronous.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import threading
+from concurrent import futures
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.main import HydroStage
+from dtocean_environment.batch import get_stage
+from dtocean_environment.asynchronous import (AsyncStage,
+                                              CancelledError,
+                                              DeadlineError,
+                                              get_call_key)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+class GatedStage(object):
+
+    '''Stage stand in which blocks until released and counts its calls.'''
+
+    def __init__(self):
+
+        self.gate = threading.Event()
+        self.calls = []
+
+        return
+
+    def get_batch_results(self, input_dicts, target_level=None):
+
+        self.gate.wait(10.)
+        self.calls.extend(input_dicts)
+
+        return [x["x"] for x in input_dicts]
+
+
+@pytest.fixture
+def stage():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected = pd.read_csv(input_path, index_col=0)
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors = pd.read_csv(input_path, index_col=0)
+
+    return get_stage(HydroStage, protected, receptors)
+
+
+def get_input_dict(stage, energy):
+
+    input_dict = {name: None for name in stage.get_inputs()}
+    input_dict["Energy Modification"] = energy
+
+    return input_dict
+
+
+def test_assess(stage):
+
+    async_stage = AsyncStage(stage)
+    input_dict = get_input_dict(stage, 0.1)
+
+    future = async_stage.assess(input_dict)
+    confidence, eis, _, _, global_eis = future.result(10.)
+    expected = stage(input_dict)
+
+    async_stage.close()
+
+    assert confidence == expected[0]
+    assert eis["Energy Modification"] == expected[1]["Energy Modification"]
+    assert global_eis["Negative Impact"] == expected[4]["Negative Impact"]
+
+
+def test_assess_process_executor(stage):
+
+    input_dicts = [get_input_dict(stage, x) for x in (0.1, 0.5, 0.1)]
+    executor = futures.ProcessPoolExecutor(2)
+    async_stage = AsyncStage(stage, executor)
+
+    try:
+        results = async_stage.assess_batch(input_dicts).result(60.)
+        single = async_stage.assess(input_dicts[1]).result(60.)
+    finally:
+        async_stage.close()
+        executor.shutdown()
+
+    for input_dict, result in zip(input_dicts, results):
+        assert result[1] == stage(input_dict)[1]
+
+    assert single[1] == stage(input_dicts[1])[1]
+
+
+def test_assess_error(stage):
+
+    async_stage = AsyncStage(stage)
+    future = async_stage.assess({"Not An Input": 1.})
+
+    with pytest.raises(KeyError):
+        future.result(10.)
+
+    async_stage.close()
+
+
+def test_assess_batch(stage):
+
+    async_stage = AsyncStage(stage)
+    input_dicts = [get_input_dict(stage, x) for x in [0.1, 0.2]]
+
+    results = async_stage.assess_batch(input_dicts).result(10.)
+    expected = stage.get_batch_results(input_dicts)
+
+    async_stage.close()
+
+    assert [x[1] for x in results] == [x[1] for x in expected]
+
+
+def test_assess_batch_coalesced():
+
+    stage = GatedStage()
+    async_stage = AsyncStage(stage)
+
+    single = async_stage.assess({"x": 1})
+    batch = async_stage.assess_batch([{"x": 1}, {"x": 2}, {"x": 2}])
+
+    assert async_stage.get_in_flight() == 2
+
+    stage.gate.set()
+
+    assert batch.result(10.) == [1, 2, 2]
+    assert single.result(10.) == 1
+    assert sorted(x["x"] for x in stage.calls) == [1, 2]
+
+    async_stage.close()
+
+
+def test_assess_batch_cancel():
+
+    stage = GatedStage()
+    async_stage = AsyncStage(stage, max_workers=1)
+
+    blocking = async_stage.assess({"x": 1})
+    batch = async_stage.assess_batch([{"x": 2}, {"x": 3}])
+
+    assert batch.cancel()
+
+    stage.gate.set()
+
+    assert blocking.result(10.) == 1
+
+    async_stage.close()
+
+    assert stage.calls == [{"x": 1}]
+    assert async_stage.get_in_flight() == 0
+
+
+def test_assess_coalesced():
+
+    stage = GatedStage()
+    async_stage = AsyncStage(stage)
+
+    waiters = [async_stage.assess({"x": 1}) for _ in range(5)]
+    other = async_stage.assess({"x": 2})
+
+    assert async_stage.get_in_flight() == 2
+
+    stage.gate.set()
+
+    assert [x.result(10.) for x in waiters] == [1] * 5
+    assert other.result(10.) == 2
+    assert len(stage.calls) == 2
+    assert async_stage.get_in_flight() == 0
+
+    async_stage.close()
+
+
+def test_assess_cancel():
+
+    stage = GatedStage()
+    async_stage = AsyncStage(stage, max_workers=1)
+
+    blocking = async_stage.assess({"x": 1})
+    future = async_stage.assess({"x": 2})
+
+    assert future.cancel()
+    assert future.cancelled()
+
+    stage.gate.set()
+
+    assert blocking.result(10.) == 1
+
+    with pytest.raises(CancelledError):
+        future.result()
+
+    async_stage.close()
+
+    assert stage.calls == [{"x": 1}]
+
+
+def test_assess_deadline():
+
+    stage = GatedStage()
+    async_stage = AsyncStage(stage, max_workers=1)
+
+    blocking = async_stage.assess({"x": 1})
+    future = async_stage.assess({"x": 2}, timeout=0.05)
+
+    with pytest.raises(DeadlineError):
+        future.result()
+
+    stage.gate.set()
+    blocking.result(10.)
+    async_stage.close()
+
+    assert stage.calls == [{"x": 1}]
+
+
+def test_assess_future():
+
+    stage = GatedStage()
+    async_stage = AsyncStage(stage)
+
+    future = async_stage.assess({"x": 1})
+
+    assert isinstance(future, futures.Future)
+
+    with pytest.raises(futures.TimeoutError):
+        future.result(0.01)
+
+    assert not future.done()
+
+    stage.gate.set()
+
+    assert future.result(10.) == 1
+
+    async_stage.close()
+
+
+def test_get_call_key():
+
+    key = get_call_key({"a": np.array([1., 2.]), "b": [1, 2]}, 1)
+    same = get_call_key({"b": [1, 2], "a": np.array([1., 2.])}, 1)
+
+    assert key == same
+    assert key != get_call_key({"a": np.array([1., 2.]), "b": [1, 2]})
+    assert get_call_key({"a": None}) is not None
+    assert get_call_key({"a": set([1])}) is None
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on batch.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.main import HydroStage
+from dtocean_environment.batch import (get_stage,
+                                       get_input_dicts,
+                                       run_batch,
+                                       main)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def protected():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected_table = pd.read_csv(input_path, index_col=0)
+
+    return protected_table
+
+
+@pytest.fixture
+def receptors():
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors_table = pd.read_csv(input_path, index_col=0)
+
+    return receptors_table
+
+
+@pytest.fixture
+def scenarios():
+
+    energy = np.linspace(0., 0.3, 9)
+    scenarios = pd.DataFrame({"Energy Modification": energy,
+                              "Initial Turbidity": 50.,
+                              "Measured Turbidity": 70.},
+                             index=["scenario {}".format(i)
+                                                for i in range(len(energy))])
+    scenarios.index.name = "scenario"
+    scenarios.loc["scenario 0", "Measured Turbidity"] = np.nan
+
+    return scenarios
+
+
+def test_get_input_dicts(scenarios):
+
+    input_dicts = get_input_dicts(scenarios, ["Energy Modification",
+                                              "Measured Turbidity",
+                                              "Water Depth"])
+
+    assert len(input_dicts) == len(scenarios)
+    assert input_dicts[0]["Measured Turbidity"] is None
+    assert input_dicts[1]["Measured Turbidity"] == 70.
+    assert input_dicts[1]["Water Depth"] is None
+
+
+def test_get_stage(protected, receptors):
+
+    stage = get_stage(HydroStage,
+                      protected,
+                      receptors,
+                      {"Energy Modification": "Loose sand"})
+
+    plan = stage.get_plan()
+
+    assert plan["Energy Modification"].constraint == "Loose sand"
+    assert plan["Turbidity"].constraint is None
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_run_batch(protected, receptors, scenarios, processes):
+
+    stage = get_stage(HydroStage, protected, receptors)
+    progress = []
+
+    def record(done, total):
+        progress.append((done, total))
+
+    result = run_batch(stage,
+                       scenarios,
+                       processes=processes,
+                       chunksize=4,
+                       progress=record)
+
+    input_dicts = get_input_dicts(scenarios, stage.get_inputs())
+    eis_df, _ = stage.get_batch_eis(input_dicts)
+
+    assert (result.index == scenarios.index).all()
+    assert "Negative Impact" in result
+    assert np.isnan(result.loc["scenario 0", "Turbidity"])
+    np.testing.assert_array_equal(result["Energy Modification"].values,
+                                  eis_df["Energy Modification"].values)
+    assert progress == [(4, 9), (8, 9), (9, 9)]
+
+
+def test_run_batch_error(protected, receptors, scenarios):
+
+    stage = get_stage(HydroStage, protected, receptors)
+
+    def progress(done, total):
+        raise RuntimeError("Stop")
+
+    with pytest.raises(RuntimeError):
+        run_batch(stage,
+                  scenarios,
+                  processes=2,
+                  chunksize=4,
+                  progress=progress)
+
+
+def test_main(tmpdir, scenarios):
+
+    scenarios_path = str(tmpdir.join("scenarios.csv"))
+    weighting_path = str(tmpdir.join("weighting.csv"))
+    output_path = str(tmpdir.join("output"))
+
+    scenarios.to_csv(scenarios_path)
+    pd.DataFrame({"function": ["Energy Modification"],
+                  "weighting parameter": ["Loose sand"]}).to_csv(
+                                                            weighting_path,
+                                                            index=False)
+
+    main(["hydrodynamics",
+          scenarios_path,
+          "--protected",
+          os.path.join(test_data_dir, "species_protected.csv"),
+          "--receptors",
+          os.path.join(test_data_dir, "species_receptors.csv"),
+          "--weighting",
+          weighting_path,
+          "--output",
+          output_path,
+          "--quiet"])
+
+    result = pd.read_csv(os.path.join(output_path, "hydrodynamics.csv"),
+                         index_col=0)
+
+    assert list(result.index) == list(scenarios.index)
+    assert "Energy Modification" in result
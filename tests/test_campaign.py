@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on campaign.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+from collections import namedtuple
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.core import CoreAssessment
+from dtocean_environment.main import InstallationStage
+from dtocean_environment.campaign import Campaign, _get_monthly_eis
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def stage():
+
+    protected = pd.read_csv(os.path.join(test_data_dir,
+                                         "species_protected.csv"),
+                            index_col=0)
+    receptors = pd.read_csv(os.path.join(test_data_dir,
+                                         "species_receptors.csv"),
+                            index_col=0)
+    weighting = {"Footprint": None,
+                 "Collision Risk Vessel": None,
+                 "Chemical Pollution": None,
+                 "Turbidity": None,
+                 "Underwater Noise": None}
+
+    return InstallationStage(protected, receptors, weighting)
+
+
+@pytest.fixture
+def schedule():
+
+    n_operations = 50
+    dates = pd.date_range("2020-01-10", periods=n_operations, freq="11D")
+
+    schedule_dict = {"date": dates,
+                     "Surface Area Covered": 1000.,
+                     "Total Surface Area": 100000.,
+                     "Number of Vessels": np.arange(n_operations) % 5 + 1.,
+                     "Size of Vessels": 50.,
+                     "Import of Chemical Polutant": False,
+                     "Initial Turbidity": 50.,
+                     "Measured Turbidity": 40.,
+                     "Initial Noise dB re 1muPa": 100.,
+                     "Measured Noise dB re 1muPa": 110.}
+
+    schedule_df = pd.DataFrame(schedule_dict)
+    schedule_df.loc[::2, "Measured Noise dB re 1muPa"] = np.nan
+
+    return schedule_df
+
+
+def test_Campaign_score_operations(stage, schedule):
+
+    campaign = Campaign(stage)
+    scores = campaign.score_operations(schedule)
+
+    assert len(scores) == len(schedule)
+    assert set(scores.columns) == set(campaign.get_function_names())
+    assert np.isnan(scores["Underwater Noise"].iloc[0])
+    assert not np.isnan(scores["Underwater Noise"].iloc[1])
+
+
+def test_get_monthly_eis_absent():
+
+    Plan = namedtuple("Plan", ["monthly"])
+
+    # No receptor is present in June, and presence in July is unknown for
+    # the second receptor
+    monthly = np.ones((2, 12))
+    monthly[:, 5] = 0.
+    monthly[0, 6] = 0.
+    monthly[1, 6] = np.nan
+
+    normalised = np.tile([[-0.5, -0.2]], (3, 1))
+    presence = np.where(np.isnan(monthly), 1., monthly)
+    result = CoreAssessment(3,
+                            None,
+                            None,
+                            None,
+                            np.array([-0.5, -0.5, -0.5]),
+                            None,
+                            None,
+                            normalised[:, :, np.newaxis] * presence)
+
+    values = _get_monthly_eis(Plan(monthly), result, np.array([4, 5, 6]))
+
+    np.testing.assert_allclose(values, [-0.5, np.nan, -0.2])
+
+
+def test_Campaign_score_operations_matches_stage(stage, schedule):
+
+    campaign = Campaign(stage)
+    scores = campaign.score_operations(schedule)
+    input_dicts = campaign._get_input_dicts(schedule)
+
+    for i, input_dict in enumerate(input_dicts):
+
+        _, eis_dict, _, seasons_df, _ = stage(input_dict)
+        month = schedule["date"].iloc[i].month - 1
+
+        for name, eis in eis_dict.iteritems():
+
+            if eis is None:
+                expected = np.nan
+            elif eis != -100. and name in seasons_df.index:
+                expected = seasons_df.loc[name].iloc[month]
+            else:
+                expected = eis
+
+            assert np.isclose(scores[name].iloc[i], expected, equal_nan=True)
+
+
+def test_Campaign_get_timelines(stage, schedule):
+
+    campaign = Campaign(stage, chunksize=7)
+    monthly, yearly = campaign.get_timelines(schedule)
+
+    assert monthly["Operations"].sum() == len(schedule)
+    assert yearly["Operations"].sum() == len(schedule)
+    assert monthly.index.equals(pd.period_range(monthly.index[0],
+                                                monthly.index[-1],
+                                                freq="M"))
+    assert "Negative Impact" in monthly.columns
+    assert np.isclose(yearly["Footprint"].min(), monthly["Footprint"].min())
+
+
+def test_Campaign_iter_monthly_chunks(stage, schedule):
+
+    campaign = Campaign(stage)
+    chunks = [schedule.iloc[:13], schedule.iloc[13:31], schedule.iloc[31:]]
+
+    streamed = pd.concat(list(campaign.iter_monthly(chunks)))
+    monthly, _ = campaign.get_timelines(schedule)
+
+    assert streamed.index.equals(monthly.index)
+    assert np.allclose(streamed["Operations"], monthly["Operations"])
+
+
+def test_Campaign_unsorted(stage, schedule):
+
+    campaign = Campaign(stage)
+    chunks = [schedule.iloc[30:], schedule.iloc[:30]]
+
+    with pytest.raises(ValueError):
+        list(campaign.iter_monthly(chunks))
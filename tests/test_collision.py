@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on collision.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import pytest
+import numpy as np
+
+from dtocean_environment.functions import coll_risk
+from dtocean_environment.collision import (estimate_collision_risk,
+                                           get_collision_raster,
+                                           get_collision_risk,
+                                           get_lattice,
+                                           get_lattice_collision_rate)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def positions():
+
+    data = np.genfromtxt(os.path.join(test_data_dir, "positions.txt"))
+
+    return [data[:, 0], data[:, 1]]
+
+
+@pytest.fixture
+def staggered():
+
+    rows, cols = np.mgrid[:5, :6]
+    x_pos = 40. + cols * 150. + (rows % 2) * 60.
+    y_pos = -20. + rows * 110.
+
+    return [x_pos.ravel(), y_pos.ravel()]
+
+
+def test_get_collision_raster_single():
+
+    raster = get_collision_raster([[50.], [50.]],
+                                  10.,
+                                  5.,
+                                  10.,
+                                  0.,
+                                  cell_size=1.,
+                                  bounds=(0., 0., 100., 100.))
+
+    assert raster.array.shape == (100, 100)
+    assert np.isclose(raster.get_collision_rate(), 0.2)
+    assert np.isclose(raster.get_impact(), 0.1)
+    assert raster.array[50].all()
+    assert not raster.array[0].any()
+    assert raster.device_shares.tolist() == [1.]
+
+
+def test_get_collision_raster_transform():
+
+    raster = get_collision_raster([[50.], [50.]],
+                                  10.,
+                                  5.,
+                                  10.,
+                                  0.,
+                                  cell_size=2.,
+                                  bounds=(0., 0., 100., 100.))
+
+    x, y = raster.get_cell_centres()
+
+    assert raster.transform == (0., 2., 0., 100., 0., -2.)
+    assert x[0, 0] == 1.
+    assert y[0, 0] == 99.
+    assert (raster.array[np.abs(y - 50.) > 10.] == 0).all()
+
+
+def test_get_collision_raster_rose(positions):
+
+    raster = get_collision_raster(positions,
+                                  30.,
+                                  10.,
+                                  15.,
+                                  [0., 90.],
+                                  weights=[3., 1.],
+                                  cell_size=50.)
+
+    single = get_collision_raster(positions, 30., 10., 15., 0.,
+                                  cell_size=50.)
+
+    assert raster.array.max() <= 1.
+    assert np.isclose(raster.device_shares.sum(), 1.)
+    assert not np.allclose(raster.array, single.array)
+
+
+@pytest.mark.parametrize("cur_dir, axis", [(0., 1), (90., 0)])
+def test_get_collision_raster_exact(positions, cur_dir, axis):
+
+    cell_size = 10.
+    raster = get_collision_raster(positions, 30., 10., 15., cur_dir,
+                                  cell_size=cell_size)
+
+    n_rows, n_cols = raster.array.shape
+
+    if axis == 1:
+        low = raster.y_origin - n_rows * cell_size
+        high = raster.y_origin
+    else:
+        low = raster.x_origin
+        high = raster.x_origin + n_cols * cell_size
+
+    # The trajectories run along the other axis, so the exact collision
+    # rate is the covered fraction of the device intervals along this axis
+    offsets = np.linspace(low, high, 100001)
+    centres = np.unique(positions[axis])
+    covered = (np.abs(offsets[:, np.newaxis] - centres) <= 30.).any(axis=1)
+    n_groups = np.count_nonzero(np.diff(covered.astype(int)) == 1)
+    n_groups += int(covered[0])
+
+    tolerance = n_groups * (cell_size / (high - low) + 1e-5)
+
+    assert n_groups > 1
+    assert np.isclose(raster.get_collision_rate(),
+                      covered.mean(),
+                      rtol=0.,
+                      atol=tolerance)
+
+
+def test_get_collision_raster_coll_risk():
+
+    # coll_risk has trajectories at y = 50, 70 and 90 and the first and
+    # last are intercepted, as are two thirds of the raster
+    dev_pos = [[40., 60.], [50., 90.]]
+
+    raster = get_collision_raster(dev_pos, 10., 1., 10., 0.)
+    expected = coll_risk(dev_pos, 10., 1., 10., 0.)
+
+    assert np.isclose(expected, 0.1 * 2. / 3.)
+    assert np.isclose(raster.get_impact(), expected)
+
+
+def test_get_collision_raster_tiles(positions):
+
+    raster = get_collision_raster(positions, 30., 10., 15., 30.,
+                                  cell_size=50.)
+    tiled = get_collision_raster(positions, 30., 10., 15., 30.,
+                                 cell_size=50.,
+                                 tile_size=1000)
+
+    assert np.allclose(raster.array, tiled.array)
+    assert np.allclose(raster.device_shares, tiled.device_shares)
+
+
+def test_get_collision_raster_bad_weights(positions):
+
+    with pytest.raises(ValueError):
+        get_collision_raster(positions, 30., 10., 15., [0., 90.],
+                             weights=[1.])
+
+
+def test_get_lattice_positions(positions):
+
+    lattice = get_lattice(positions)
+
+    assert np.isclose(lattice.x_spacing, 2784.)
+    assert np.isclose(lattice.y_spacing, 696.)
+    assert np.isclose(lattice.stagger, 1392.)
+
+    x_pos, y_pos = lattice.get_positions()
+
+    assert np.allclose(x_pos, positions[0])
+    assert np.allclose(y_pos, positions[1])
+
+
+def test_get_lattice_staggered(staggered):
+
+    lattice = get_lattice(staggered)
+    x_starts, _, counts, step = lattice.get_runs()
+
+    assert np.isclose(lattice.stagger, 60.)
+    assert counts.tolist() == [6] * 5
+    assert np.allclose(x_starts, [40., 100., 40., 100., 40.])
+    assert np.allclose(step, (150., 0.))
+
+
+def test_get_lattice_tolerance(staggered):
+
+    x_pos = staggered[0].copy()
+    x_pos[7] += 0.5
+
+    assert get_lattice([x_pos, staggered[1]], tolerance=1.) is not None
+    assert get_lattice([x_pos, staggered[1]]) is None
+
+
+def test_get_lattice_none():
+
+    rng = np.random.RandomState(1)
+
+    assert get_lattice([rng.rand(20) * 1000., rng.rand(20) * 1000.]) is None
+
+
+@pytest.mark.parametrize("cur_dir", [0., 30., 45., 90., 135., 200., 300.])
+@pytest.mark.parametrize("dev_dim", [30., 333.])
+def test_get_collision_risk_lattice(positions, dev_dim, cur_dir):
+
+    result = get_collision_risk(positions, dev_dim, 10., 15., cur_dir)
+    expected = coll_risk(positions, dev_dim, 10., 15., cur_dir)
+
+    assert np.isclose(result, expected)
+
+
+@pytest.mark.parametrize("cur_dir", [0., 20., 71., 90., 160., 250.])
+def test_get_collision_risk_staggered(staggered, cur_dir):
+
+    result = get_collision_risk(staggered, 27., 10., 15., cur_dir)
+    expected = coll_risk(staggered, 27., 10., 15., cur_dir)
+
+    assert np.isclose(result, expected)
+
+
+def test_get_collision_risk_partial(staggered):
+
+    x_pos = np.delete(staggered[0], [0, 1, 13, 29])
+    y_pos = np.delete(staggered[1], [0, 1, 13, 29])
+
+    assert get_lattice([x_pos, y_pos]) is not None
+
+    result = get_collision_risk([x_pos, y_pos], 27., 10., 15., 37.)
+    expected = coll_risk([x_pos, y_pos], 27., 10., 15., 37.)
+
+    assert np.isclose(result, expected)
+
+
+def test_get_collision_risk_general():
+
+    rng = np.random.RandomState(1)
+    dev_pos = [rng.rand(10) * 1000., rng.rand(10) * 1000.]
+
+    result = get_collision_risk(dev_pos, 20., 10., 15., 30.)
+    expected = coll_risk(dev_pos, 20., 10., 15., 30.)
+
+    assert result == expected
+
+
+def _get_grid(n_cols, n_rows, x_spacing, y_spacing, stagger):
+
+    rows, cols = np.mgrid[:n_rows, :n_cols]
+    x_pos = cols * x_spacing + (rows % 2) * stagger
+    y_pos = rows * y_spacing
+
+    return [x_pos.ravel().astype(float), y_pos.ravel().astype(float)]
+
+
+@pytest.mark.parametrize("grid, dev_dim", [((8, 3, 30., 60., 15.), 5.),
+                                           ((6, 5, 50., 50., 25.), 25.),
+                                           ((6, 4, 100., 100., 0.), 12.),
+                                           ((5, 1, 20., 20., 0.), 10.)])
+@pytest.mark.parametrize("cur_dir", [0., 30., 45., 90., 135., 270.])
+def test_get_collision_risk_touching(grid, dev_dim, cur_dir):
+
+    # Trajectories touch devices of these layouts
+    dev_pos = _get_grid(*grid)
+
+    result = get_collision_risk(dev_pos, dev_dim, 10., 15., cur_dir)
+    expected = coll_risk(dev_pos, dev_dim, 10., 15., cur_dir)
+
+    assert result == expected
+
+
+def test_get_lattice_collision_rate_bad_size(staggered):
+
+    with pytest.raises(ValueError):
+        get_lattice_collision_rate(get_lattice(staggered), 0., 30.)
+
+
+@pytest.fixture
+def scattered():
+
+    rng = np.random.RandomState(1)
+
+    return [rng.rand(500) * 1e5, rng.rand(500) * 1e5]
+
+
+@pytest.mark.parametrize("cur_dir", [0., 45., 200.])
+def test_estimate_collision_risk_exact(positions, cur_dir):
+
+    # Fewer trajectories than samples needed, so all are tested
+    estimate = estimate_collision_risk(positions, 30., 10., 15., cur_dir,
+                                       error=0.001)
+    expected = coll_risk(positions, 30., 10., 15., cur_dir)
+
+    assert estimate.error == 0.
+    assert estimate.n_samples == estimate.n_lines
+    assert np.isclose(estimate.get_impact(), expected)
+
+
+@pytest.mark.parametrize("grid, dev_dim", [((8, 3, 30., 60., 15.), 5.),
+                                           ((6, 5, 50., 50., 25.), 25.)])
+@pytest.mark.parametrize("cur_dir", [30., 90., 270.])
+def test_estimate_collision_risk_touching(grid, dev_dim, cur_dir):
+
+    dev_pos = _get_grid(*grid)
+
+    estimate = estimate_collision_risk(dev_pos, dev_dim, 10., 15., cur_dir,
+                                       error=0.001)
+    expected = coll_risk(dev_pos, dev_dim, 10., 15., cur_dir)
+
+    assert estimate.n_samples == estimate.n_lines
+    assert np.isclose(estimate.get_impact(), expected)
+
+
+def test_estimate_collision_risk_bound(scattered):
+
+    exact = estimate_collision_risk(scattered, 5., 10., 15., 37.,
+                                    error=1e-9)
+
+    for seed in range(10):
+
+        estimate = estimate_collision_risk(scattered, 5., 10., 15., 37.,
+                                           error=0.02,
+                                           seed=seed)
+
+        assert 0 < estimate.error <= 0.02
+        assert estimate.n_samples < estimate.n_lines
+        assert abs(estimate.collision_rate -
+                                exact.collision_rate) <= estimate.error
+
+
+def test_estimate_collision_risk_samples(scattered):
+
+    estimate = estimate_collision_risk(scattered, 1., 10., 15., 37.,
+                                       error=0.02,
+                                       seed=1)
+    larger = estimate_collision_risk([x * 10. for x in scattered],
+                                     1., 10., 15., 37.,
+                                     error=0.02,
+                                     seed=1)
+
+    assert larger.n_lines > 5 * estimate.n_lines
+    assert larger.n_samples < 2 * estimate.n_samples
+
+
+def test_estimate_collision_risk_bounds():
+
+    estimate = estimate_collision_risk([[0., 100.], [0., 0.]], 10., 10., 15.,
+                                       90.)
+    low, high = estimate.get_bounds()
+
+    assert low <= estimate.get_collision_rate() <= high
+    assert estimate.depth_factor == 10. / 15.
+
+
+def test_estimate_collision_risk_single():
+
+    estimate = estimate_collision_risk([[1.], [1.]], 10., 10., 15., 0.)
+
+    assert estimate.get_impact() == 0.
+
+
+@pytest.mark.parametrize("error, confidence", [(0., 0.95),
+                                               (0.01, 1.),
+                                               (0.01, 0.)])
+def test_estimate_collision_risk_bad_target(positions, error, confidence):
+
+    with pytest.raises(ValueError):
+        estimate_collision_risk(positions, 30., 10., 15., 0.,
+                                error=error,
+                                confidence=confidence)
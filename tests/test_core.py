@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on core.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import pytest
+import numpy as np
+
+from dtocean_environment.core import assess
+from dtocean_environment.plan import LogigramPlan
+
+
+def get_plan(sign=-1,
+             constraint=None,
+             constraint_score=None,
+             receptors=False,
+             bounds=False,
+             monthly=False,
+             protected=False):
+
+    recommendations = np.array([["low", "a", "b"],
+                                ["mid", "c", "d"],
+                                ["high", "e", "f"]], dtype=object)
+
+    plan_args = ["Test",
+                 None,
+                 ("Test",),
+                 sign,
+                 np.array([0., 1., 2.]),
+                 np.array([0., 2., 5.]),
+                 recommendations,
+                 constraint,
+                 constraint_score,
+                 None,
+                 None,
+                 None,
+                 None,
+                 None,
+                 protected]
+
+    if not receptors: return LogigramPlan(*plan_args)
+
+    receptor_bounds = [None, None, None]
+
+    if bounds:
+        receptor_scores = np.array([1., 3., np.nan])
+        receptor_bounds[2] = (np.array([1., 3.]), np.array([2., 4.]))
+    else:
+        receptor_scores = np.array([1., 3., 2.])
+
+    presence = np.full((3, 12), np.nan)
+
+    if monthly:
+        presence[0, :] = 0.
+        presence[0, 5] = 1.
+
+    plan_args[9] = ("fish", "birds", "mammals")
+    plan_args[10] = np.array([True, False, True])
+    plan_args[11] = receptor_scores
+    plan_args[12] = tuple(receptor_bounds)
+    plan_args[13] = presence
+
+    return LogigramPlan(*plan_args)
+
+
+def test_assess_pressure():
+
+    result = assess(get_plan(), [0.5, 2.])
+
+    assert result.level == 1
+    assert np.isclose(result.pressure, [1., 5.]).all()
+    assert np.isclose(result.eis, [-26., -90.]).all()
+    assert (result.recommendation == [0, 1]).all()
+    assert result.receptor_scores is None
+
+
+def test_assess_positive():
+
+    result = assess(get_plan(sign=1), 1.)
+
+    assert np.isclose(result.eis, [26.]).all()
+
+
+@pytest.mark.parametrize("impact", [-0.1, 2.1])
+def test_assess_out_of_range(impact):
+
+    with pytest.raises(ValueError):
+        assess(get_plan(), impact)
+
+
+def test_assess_weighting():
+
+    result = assess(get_plan(constraint="sand", constraint_score=0.5), 2.)
+
+    assert np.isclose(result.adjusted, [2.5]).all()
+
+
+def test_assess_weighting_missing():
+
+    with pytest.raises(KeyError):
+        assess(get_plan(constraint="sand"), 2.)
+
+
+def test_assess_protected():
+
+    result = assess(get_plan(protected=True), 1.)
+
+    assert (result.eis == -100.).all()
+
+
+def test_assess_receptors():
+
+    result = assess(get_plan(receptors=True), [1., 2.])
+
+    assert result.level == 2
+    assert result.receptor_scores.shape == (2, 3)
+    assert (result.receptor_scores[:, 1] == 0.).all()
+    assert np.isclose(result.receptor_scores[:, 2], [4., 10.]).all()
+    assert np.isclose(result.eis, result.receptor_eis.min(axis=1)).all()
+    assert result.seasons is None
+
+
+def test_assess_receptor_bounds():
+
+    result = assess(get_plan(receptors=True, bounds=True), [0.5, 2.])
+
+    assert np.isclose(result.receptor_scores[:, 2], [1. * 2., 5. * 4.]).all()
+
+
+def test_assess_receptor_bounds_missing():
+
+    plan = get_plan(receptors=True, bounds=True)
+    plan = plan._replace(receptor_bounds=(None,
+                                          None,
+                                          (np.array([1.]), np.array([2.]))))
+
+    with pytest.raises(ValueError):
+        assess(plan, [0.5, 2.])
+
+
+def test_assess_seasons():
+
+    plan = get_plan(receptors=True, monthly=True)
+    result = assess(plan, [1., 2.])
+
+    assert result.level == 3
+    assert result.seasons.shape == (2, 3, 12)
+    assert (result.seasons[:, 0, 0] == 0.).all()
+    assert np.isclose(result.seasons[:, 1, :], -10.).all()
+
+
+@pytest.mark.parametrize("target_level", [1, 2, 3])
+def test_assess_target_level(target_level):
+
+    plan = get_plan(receptors=True, monthly=True)
+    result = assess(plan, [1., 2.], target_level)
+
+    assert result.level == target_level
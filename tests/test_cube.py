@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on cube.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+from collections import OrderedDict
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.main import HydroStage, MooringStage
+from dtocean_environment.batch import get_stage
+from dtocean_environment.cube import ResultsCube, get_global_eis
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture(scope="module")
+def stages():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected = pd.read_csv(input_path, index_col=0)
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors = pd.read_csv(input_path, index_col=0)
+
+    stages = OrderedDict()
+    stages["hydrodynamics"] = get_stage(HydroStage, protected, receptors)
+    stages["moorings"] = get_stage(MooringStage, protected, receptors)
+
+    return stages
+
+
+def get_input_dicts(stage, n):
+
+    input_dicts = []
+
+    for i in range(n):
+
+        input_dict = {name: None for name in stage.get_inputs()}
+        input_dict["Energy Modification"] = 0.05 * i
+        input_dict["Footprint"] = 0.1 * i
+        input_dict["Measured Turbidity"] = 50. + 5. * i
+        input_dict["Initial Turbidity"] = 50.
+
+        input_dicts.append({k: v for k, v in input_dict.iteritems()
+                                                if k in stage.get_inputs()})
+
+    return input_dicts
+
+
+@pytest.fixture(scope="module", params=[False, True])
+def cube(request, stages, tmpdir_factory):
+
+    if request.param:
+        dir_path = str(tmpdir_factory.mktemp("cube"))
+    else:
+        dir_path = None
+
+    n = 5
+    cube = ResultsCube.from_stages(["scenario {}".format(i)
+                                                        for i in range(n)],
+                                   stages,
+                                   dir_path,
+                                   np.float64)
+
+    for name, stage in stages.iteritems():
+        cube.fill(name, stage, get_input_dicts(stage, n))
+
+    return cube
+
+
+def test_fill(cube, stages):
+
+    stage = stages["hydrodynamics"]
+    input_dicts = get_input_dicts(stage, 5)
+
+    for i, input_dict in enumerate(input_dicts):
+
+        confidence, eis, _, seasons, _ = stage(input_dict)
+
+        for name, value in eis.iteritems():
+
+            result = cube.select("eis",
+                                 scenario="scenario {}".format(i),
+                                 stage="hydrodynamics",
+                                 function=name)
+
+            if value is None:
+                assert np.isnan(result)
+                assert cube.select("confidence",
+                                   scenario="scenario {}".format(i),
+                                   stage="hydrodynamics",
+                                   function=name) == 0
+            else:
+                assert np.isclose(result, value)
+
+        function_seasons = cube.get_function_seasons()
+
+        for name, row in seasons.iterrows():
+
+            f = cube.get_index("function", name)
+            s = cube.get_index("stage", "hydrodynamics")
+
+            assert np.allclose(function_seasons[i, s, f], row.values)
+
+
+def test_get_global_eis(cube, stages):
+
+    global_eis = cube.get_global_eis()
+
+    for s, (name, stage) in enumerate(stages.iteritems()):
+
+        input_dicts = get_input_dicts(stage, 5)
+
+        for i, input_dict in enumerate(input_dicts):
+
+            expected = stage(input_dict)[4]
+
+            for key, value in expected.iteritems():
+                assert np.allclose(global_eis[key][i, s],
+                                   value,
+                                   equal_nan=True)
+
+
+def test_get_global_eis_axes(cube):
+
+    global_eis = cube.get_global_eis(("scenario", "function"))
+
+    assert global_eis["Negative Impact"].shape == (2,)
+
+
+def test_get_global_eis_empty():
+
+    global_eis = get_global_eis(np.full((2, 3), np.nan))
+
+    assert np.isnan(global_eis["Negative Impact"]).all()
+
+
+def test_select(cube):
+
+    result = cube.select("seasons",
+                         stage=["hydrodynamics", "moorings"],
+                         month="june")
+
+    assert result.shape == (5, 2, len(cube.functions), len(cube.receptors))
+
+    with pytest.raises(ValueError):
+        cube.select("eis", month="june")
+
+    with pytest.raises(KeyError):
+        cube.select("eis", stage="electrical")
+
+
+def test_open(cube):
+
+    if cube.dir_path is None: return
+
+    cube.flush()
+    opened = ResultsCube.open(cube.dir_path)
+
+    assert opened.functions == cube.functions
+    np.testing.assert_array_equal(opened.get_array("seasons"),
+                                  cube.get_array("seasons"))
+
+
+def test_to_arrow(cube):
+
+    pytest.importorskip("pyarrow")
+
+    table = cube.to_arrow(stage="hydrodynamics")
+
+    assert table.num_rows == 5
+    assert table.num_columns == len(cube.functions) + 1
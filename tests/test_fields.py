@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on fields.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import pytest
+import numpy as np
+
+from dtocean_environment.functions import electric_imp, magnetic_imp
+from dtocean_environment.fields import (get_segments,
+                                        get_cable_fields,
+                                        get_exceedance,
+                                        get_field_inputs)
+
+
+def test_get_segments():
+
+    cables = [[(0, 0), (10, 0), (10, 10)], [(0, 5), (5, 5)]]
+
+    starts, ends, currents = get_segments(cables, [100., 50.], [1., 2.])
+
+    assert starts.shape == (3, 3)
+    assert (ends[:, 2] == [-1., -1., -2.]).all()
+    assert (currents == [100., 100., 50.]).all()
+
+
+def test_get_segments_mismatch():
+
+    with pytest.raises(ValueError):
+        get_segments([[(0, 0), (10, 0)]], [100., 50.], [1.])
+
+
+def test_get_cable_fields_infinite():
+
+    # A long straight cable approximates B = mu_0 I / (2 pi r)
+    magnetic, electric = get_cable_fields([[(-1e5, 0), (1e5, 0)]],
+                                          [1000.],
+                                          [1.],
+                                          np.array([0., 0.]),
+                                          np.array([0., 2.]),
+                                          velocity=(0., 1.))
+
+    assert np.allclose(magnetic, [200., 200. / np.sqrt(5.)])
+    assert np.isclose(electric[0], 0.)
+    assert np.isclose(electric[1], 80.)
+
+
+def test_get_cable_fields_tiles():
+
+    x, y = np.meshgrid(np.linspace(0, 100, 20), np.linspace(0, 100, 20))
+    cables = [[(0, 50), (50, 60), (100, 50)], [(50, 0), (50, 100)]]
+
+    magnetic, electric = get_cable_fields(cables, [200., 100.], [1., 1.5],
+                                          x, y, velocity=(1., 0.5))
+    tiled_magnetic, tiled_electric = get_cable_fields(cables,
+                                                      [200., 100.],
+                                                      [1., 1.5],
+                                                      x,
+                                                      y,
+                                                      velocity=(1., 0.5),
+                                                      max_elements=7)
+
+    assert magnetic.shape == x.shape
+    assert np.allclose(magnetic, tiled_magnetic)
+    assert np.allclose(electric, tiled_electric)
+
+
+def test_get_exceedance():
+
+    field = np.arange(10.)
+    weights = np.ones(10)
+    weights[-1] = 11.
+
+    stats = get_exceedance(field, 7.5, weights)
+
+    assert np.isclose(stats["fraction"], 12. / 20.)
+    assert stats["max"] == 9.
+    assert np.isclose(stats["p50"], 4.5)
+
+
+def test_get_field_inputs():
+
+    magnetic = np.array([0., 0.5, 2.])
+    electric = np.zeros(3)
+
+    inputs = get_field_inputs(magnetic, electric, 50., 1.)
+
+    assert inputs["Measured Magnetic Field"] == 52.
+    assert magnetic_imp(inputs["Initial Magnetic Field"],
+                        inputs["Measured Magnetic Field"]) == 1.
+    assert electric_imp(inputs["Initial Electric Field"],
+                        inputs["Measured Electric Field"]) == 0.
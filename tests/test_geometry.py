@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on geometry.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+from collections import OrderedDict
+
+import pytest
+import numpy as np
+from shapely.geometry import Point, LineString, box
+from shapely.ops import unary_union
+
+from dtocean_environment.functions import footprint
+from dtocean_environment.geometry import (get_clusters,
+                                          get_covered_area,
+                                          get_footprint_areas,
+                                          get_footprint_inputs,
+                                          get_intersecting_pairs)
+
+
+def test_get_intersecting_pairs():
+
+    random = np.random.RandomState(2)
+    geometries = [Point(x, y).buffer(5)
+                            for x, y in random.uniform(0, 100, (50, 2))]
+
+    expected = [(i, j) for i in xrange(len(geometries))
+                       for j in xrange(i + 1, len(geometries))
+                               if geometries[i].intersects(geometries[j])]
+
+    assert get_intersecting_pairs(geometries) == expected
+
+
+def test_get_clusters():
+
+    geometries = [box(0, 0, 1, 1),
+                  box(10, 10, 11, 11),
+                  box(0.5, 0, 2, 1),
+                  box(1.5, 0, 3, 1)]
+
+    clusters = get_clusters(geometries)
+
+    assert sorted(sorted(x) for x in clusters) == [[0, 2, 3], [1]]
+
+
+def test_get_clusters_empty():
+
+    assert get_clusters([]) == []
+
+
+def test_get_covered_area():
+
+    random = np.random.RandomState(1)
+    geometries = [Point(x, y).buffer(5)
+                            for x, y in random.uniform(0, 200, (200, 2))]
+
+    expected = unary_union(geometries).area
+
+    assert np.isclose(get_covered_area(geometries), expected)
+
+
+def test_get_footprint_areas():
+
+    components = OrderedDict([("foundations", [box(0, 0, 2, 2),
+                                               box(1, 1, 3, 3)]),
+                              ("cables", [LineString([(1, 1), (10, 1)])])])
+
+    total, breakdown = get_footprint_areas(components, {"cables": 0.5})
+
+    assert np.isclose(breakdown.loc["foundations", "area"], 7.)
+    assert np.isclose(breakdown.loc["foundations", "marginal area"], 7.)
+    assert breakdown.loc["cables", "marginal area"] < \
+                                            breakdown.loc["cables", "area"]
+    assert np.isclose(total, breakdown["marginal area"].sum())
+
+
+def test_get_footprint_areas_order():
+
+    components = {"foundations": [box(0, 0, 2, 2)],
+                  "cables": [box(1, 0, 4, 2)]}
+
+    _, breakdown = get_footprint_areas(components)
+
+    assert list(breakdown.index) == ["cables", "foundations"]
+    assert np.isclose(breakdown.loc["foundations", "marginal area"], 2.)
+
+    _, breakdown = get_footprint_areas(components,
+                                       order=["foundations", "cables"])
+
+    assert list(breakdown.index) == ["foundations", "cables"]
+    assert np.isclose(breakdown.loc["cables", "marginal area"], 4.)
+
+
+def test_get_footprint_areas_bad_order():
+
+    components = {"foundations": [box(0, 0, 2, 2)],
+                  "cables": [box(1, 0, 4, 2)]}
+
+    with pytest.raises(ValueError):
+        get_footprint_areas(components, order=["cables"])
+
+
+def test_get_footprint_inputs():
+
+    components = {"anchors": [box(0, 0, 10, 10), box(5, 5, 15, 15)]}
+
+    inputs = get_footprint_inputs(components, 1000.)
+
+    assert np.isclose(footprint(inputs["Surface Area Covered"],
+                                inputs["Total Surface Area"]),
+                      0.175)
@@ -7,9 +7,14 @@
 import os
 
 import pytest
+import numpy as np
 import pandas as pd
 
-from dtocean_environment.impacts import (EnergyModification)
+from dtocean_environment.impacts import (EnergyModification,
+                                         CollisionRisk,
+                                         UnderwaterNoise)
+from dtocean_environment.collision import (get_collision_raster,
+                                           estimate_collision_risk)
 #                                         CollisionRisk,
 #                                         Turbidity,
 #                                         UnderwaterNoise,
@@ -84,6 +89,85 @@ def test_energy_impact_one(protected, receptors):
     assert result.get_EIS() == -74.0
     assert result.confidence_level == 3
     
+def test_collision_raster_assessment(protected, receptors):
+    
+    data_path = os.path.join(data_dir, "hydrodynamics")
+    
+    collision_logigram = CollisionRisk(data_path,
+                                       protected,
+                                       receptors,
+                                       None)
+    
+    # A layout where the raster and coll_risk agree, see test_collision.py
+    input_dict = {"Coordinates of the Devices"      : [[40., 60.],
+                                                       [50., 90.]],
+                  "Size of the Devices"             : 10.,
+                  "Immersed Height of the Devices"  : 1.,
+                  "Water Depth"                     : 10.,
+                  "Current Direction"               : 0.}
+    
+    raster = get_collision_raster(input_dict["Coordinates of the Devices"],
+                                  10.,
+                                  1.,
+                                  10.,
+                                  0.)
+    
+    result = collision_logigram.get_raster_assessment(raster)
+    expected = collision_logigram(input_dict)
+    
+    assert np.isclose(raster.get_impact(),
+                      CollisionRisk.get_impact(input_dict))
+    assert np.isclose(result.get_EIS(), expected.get_EIS())
+    
+def test_collision_estimate_assessment(protected, receptors):
+    
+    data_path = os.path.join(data_dir, "hydrodynamics")
+    
+    collision_logigram = CollisionRisk(data_path,
+                                       protected,
+                                       receptors,
+                                       None)
+    
+    input_dict = {"Coordinates of the Devices"      : [[0., 100., 300.],
+                                                       [0., 50., 80.]],
+                  "Size of the Devices"             : 10.,
+                  "Immersed Height of the Devices"  : 5.,
+                  "Water Depth"                     : 10.,
+                  "Current Direction"               : 30.}
+    
+    dev_pos = input_dict["Coordinates of the Devices"]
+    estimate = estimate_collision_risk(dev_pos,
+                                       10.,
+                                       5.,
+                                       10.,
+                                       30.,
+                                       seed=1)
+    
+    result = collision_logigram.get_estimate_assessment(estimate)
+    expected = collision_logigram(input_dict)
+    
+    # Few enough trajectories that all are tested
+    assert estimate.error == 0.
+    assert np.isclose(estimate.get_impact(),
+                      CollisionRisk.get_impact(input_dict))
+    assert np.isclose(result.get_EIS(), expected.get_EIS())
+    
+@pytest.mark.parametrize("levels, pressure_score", [
+                                ([[90., 95.], [100., 80.]], 0.),
+                                ([[90., 95.], [101., 80.]], 5.)])
+def test_noise_grid_assessment(protected, receptors, levels, pressure_score):
+    
+    data_path = os.path.join(data_dir, "hydrodynamics")
+    
+    noise_logigram = UnderwaterNoise(data_path,
+                                     protected,
+                                     receptors,
+                                     None)
+    
+    result = noise_logigram.get_grid_assessment(levels, 100.)
+    
+    assert result.score_history["Pressure Score"] == pressure_score
+    
 #def test_energy_impact_two(energy_logigram):
 #    
 #    IE=100
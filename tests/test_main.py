@@ -5,13 +5,19 @@
 """
 
 import os
+import time
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 
 import pytest
 import pandas as pd
 
 import numpy as np
+from shapely.geometry import box
 
-from dtocean_environment.main import HydroStage
+from dtocean_environment.core import assess
+from dtocean_environment.main import HydroStage, MooringStage
+from dtocean_environment.observations import Observations
 
 mod_path = os.path.realpath(__file__)
 mod_dir = os.path.dirname(mod_path)
@@ -100,3 +106,392 @@ def test_HydroStage(protected, weighting, receptors):
     assert len(seasons.columns) == 12
     assert "Energy Modification" in seasons.index
 
+
+def test_HydroStage_shared_observations(protected, weighting, receptors):
+    
+    observations = Observations(protected, receptors)
+    first = HydroStage(constraint_observations=weighting,
+                       observations=observations)
+    second = HydroStage(constraint_observations=weighting,
+                        observations=observations)
+    expected = HydroStage(protected,
+                          receptors,
+                          weighting)
+    
+    first_step = first.get_plan()["Underwater Noise"]
+    second_step = second.get_plan()["Underwater Noise"]
+    expected_step = expected.get_plan()["Underwater Noise"]
+    
+    assert np.may_share_memory(first_step.monthly, second_step.monthly)
+    assert not np.may_share_memory(first_step.monthly,
+                                   expected_step.monthly)
+    assert (first_step.observed == expected_step.observed).all()
+    np.testing.assert_array_equal(first_step.monthly, expected_step.monthly)
+
+
+def test_HydroStage_get_batch_eis(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    input_dict = {"Energy Modification"             : 0.3,
+                  "Coordinates of the Devices"      : None,
+                  "Size of the Devices"             : None,
+                  "Immersed Height of the Devices"  : None,
+                  "Water Depth"                     : None,
+                  "Current Direction"               : None,
+                  "Initial Turbidity"               : 50.,
+                  "Measured Turbidity"              : 70.,
+                  "Initial Noise dB re 1muPa"       : 60.,
+                  "Measured Noise dB re 1muPa"      : 150.,
+                  "Fishery Restriction Surface"     : 1000.,
+                  "Total Surface Area"              : 94501467.,
+                  "Number of Objects"               : 50,
+                  "Object Emerged Surface"          : 20.,
+                  "Surface Area of Underwater Part" : 60.
+                  }
+    
+    other_dict = input_dict.copy()
+    other_dict["Energy Modification"] = 0.1
+    
+    input_dicts = [input_dict, other_dict, input_dict]
+    eis_df, global_df = test_hydro.get_batch_eis(input_dicts)
+    
+    assert len(eis_df) == 3
+    assert np.isnan(eis_df["Collision Risk"]).all()
+    
+    for i, test_dict in enumerate(input_dicts):
+        
+        _, eis_dict, _, _, global_eis = test_hydro(test_dict)
+        
+        assert eis_df.loc[i, "Energy Modification"] == \
+                                            eis_dict["Energy Modification"]
+        assert np.isclose(global_df.loc[i, "Negative Impact"],
+                          global_eis["Negative Impact"])
+
+
+def test_HydroStage_get_plan(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    plan = test_hydro.get_plan()
+    summary = plan.describe()
+    
+    assert len(plan) == len(HydroStage.get_logigram_classes())
+    assert set(summary.index) == set(weighting.keys())
+    assert summary.loc["Energy Modification", "weighting"]
+    assert not summary.loc["Collision Risk", "weighting"]
+    assert summary.loc["Energy Modification", "seasons"]
+    assert plan["Energy Modification"].inputs == ("Energy Modification",)
+    assert set(test_hydro.get_inputs()) == set(
+                            x for step in plan for x in step.inputs)
+
+
+@pytest.mark.parametrize("target_level", [1, 2])
+def test_HydroStage_target_level(protected,
+                                 weighting,
+                                 receptors,
+                                 target_level):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    input_dict = {"Energy Modification"             : 0.3,
+                  "Coordinates of the Devices"      : None,
+                  "Size of the Devices"             : None,
+                  "Immersed Height of the Devices"  : None,
+                  "Water Depth"                     : None,
+                  "Current Direction"               : None,
+                  "Initial Turbidity"               : 50.,
+                  "Measured Turbidity"              : 70.,
+                  "Initial Noise dB re 1muPa"       : 60.,
+                  "Measured Noise dB re 1muPa"      : 150.,
+                  "Fishery Restriction Surface"     : 1000.,
+                  "Total Surface Area"              : 94501467.,
+                  "Number of Objects"               : 50,
+                  "Object Emerged Surface"          : 20.,
+                  "Surface Area of Underwater Part" : 60.
+                  }
+    
+    (confidence_dict,
+     eis_dict,
+     _,
+     seasons,
+     _) = test_hydro(input_dict, target_level=target_level)
+    
+    full_confidence, full_eis, _, _, _ = test_hydro(input_dict)
+    
+    assert confidence_dict["Energy Modification"] == target_level
+    assert full_confidence["Energy Modification"] == 3
+    assert seasons.empty
+    
+    if target_level == 2:
+        assert eis_dict == full_eis
+    
+    eis_df, _ = test_hydro.get_batch_eis([input_dict],
+                                         target_level=target_level)
+    
+    assert eis_df.loc[0, "Energy Modification"] == \
+                                            eis_dict["Energy Modification"]
+
+
+def test_HydroStage_target_level_bad(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    with pytest.raises(ValueError):
+        test_hydro({}, target_level=4)
+
+
+def test_HydroStage_get_grid_assessment(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    input_dict = {name: None for name in test_hydro.get_inputs()}
+    input_dict["Energy Modification"] = 0.3
+    
+    levels = np.array([[90., 95.], [120., 80.]])
+    
+    _, eis_dict, _, _, _ = test_hydro.get_grid_assessment(input_dict,
+                                                          levels,
+                                                          100.)
+    
+    input_dict["Initial Noise dB re 1muPa"] = 100.
+    input_dict["Measured Noise dB re 1muPa"] = 120.
+    _, expected, _, _, _ = test_hydro(input_dict)
+    
+    assert eis_dict["Underwater Noise"] is not None
+    assert eis_dict == expected
+
+
+def test_MooringStage_get_geometry_assessment(protected, receptors):
+    
+    weighting = {"Footprint": None,
+                 "Collision Risk": None,
+                 "Underwater Noise": None,
+                 "Reef Effect": None}
+    
+    test_mooring = MooringStage(protected,
+                                receptors,
+                                weighting)
+    
+    input_dict = {name: None for name in test_mooring.get_inputs()}
+    components = {"anchors": [box(0, 0, 10, 10), box(5, 5, 15, 15)]}
+    
+    _, eis_dict, _, _, _ = test_mooring.get_geometry_assessment(input_dict,
+                                                                components,
+                                                                1000.)
+    
+    input_dict["Surface Area Covered"] = 175.
+    input_dict["Total Surface Area"] = 1000.
+    _, expected, _, _, _ = test_mooring(input_dict)
+    
+    assert eis_dict["Footprint"] is not None
+    assert eis_dict == expected
+
+
+def test_HydroStage_get_geometry_assessment_bad(protected,
+                                                weighting,
+                                                receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    input_dict = {name: None for name in test_hydro.get_inputs()}
+    components = {"anchors": [box(0, 0, 10, 10)]}
+    
+    with pytest.raises(ValueError):
+        test_hydro.get_geometry_assessment(input_dict, components, 1000.)
+
+
+def test_HydroStage_get_batch_scores(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    input_dict = {"Energy Modification"             : 0.3,
+                  "Coordinates of the Devices"      : None,
+                  "Size of the Devices"             : None,
+                  "Immersed Height of the Devices"  : None,
+                  "Water Depth"                     : None,
+                  "Current Direction"               : None,
+                  "Initial Turbidity"               : 50.,
+                  "Measured Turbidity"              : 70.,
+                  "Initial Noise dB re 1muPa"       : 60.,
+                  "Measured Noise dB re 1muPa"      : 150.,
+                  "Fishery Restriction Surface"     : 1000.,
+                  "Total Surface Area"              : 94501467.,
+                  "Number of Objects"               : 50,
+                  "Object Emerged Surface"          : 20.,
+                  "Surface Area of Underwater Part" : 60.
+                  }
+    
+    names, scores = test_hydro.get_batch_scores([input_dict])
+    _, eis_dict, _, _, _ = test_hydro(input_dict)
+    
+    assert isinstance(scores, np.ndarray)
+    assert scores.shape == (1, len(names))
+    
+    for name, score in zip(names, scores[0]):
+        
+        if eis_dict[name] is None:
+            assert np.isnan(score)
+        else:
+            assert score == eis_dict[name]
+
+
+def test_HydroStage_read_only(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    with pytest.raises(AttributeError):
+        test_hydro._plan = None
+    
+    with pytest.raises(TypeError):
+        test_hydro._logigrams["Energy Modification"] = None
+    
+    logigram = test_hydro._logigrams["Energy Modification"]
+    
+    with pytest.raises(AttributeError):
+        logigram._weighting_parameter = None
+    
+    pressure_score = logigram.get_score_tables()[0]
+    scores = pressure_score.get_score()
+    scores.iloc[0] = -1.
+    
+    assert pressure_score.get_score().iloc[0] != -1.
+    
+    step = test_hydro.get_plan()["Energy Modification"]
+    
+    with pytest.raises(ValueError):
+        step.pressure_scores[0] = 1.
+    
+    with pytest.raises(ValueError):
+        step.monthly[0, 0] = 1.
+
+
+def test_HydroStage_threads(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    input_dict = {"Energy Modification"             : 0.3,
+                  "Coordinates of the Devices"      : None,
+                  "Size of the Devices"             : None,
+                  "Immersed Height of the Devices"  : None,
+                  "Water Depth"                     : None,
+                  "Current Direction"               : None,
+                  "Initial Turbidity"               : 50.,
+                  "Measured Turbidity"              : 70.,
+                  "Initial Noise dB re 1muPa"       : 60.,
+                  "Measured Noise dB re 1muPa"      : 150.,
+                  "Fishery Restriction Surface"     : 1000.,
+                  "Total Surface Area"              : 94501467.,
+                  "Number of Objects"               : 50,
+                  "Object Emerged Surface"          : 20.,
+                  "Surface Area of Underwater Part" : 60.
+                  }
+    
+    input_dicts = []
+    
+    for energy in np.linspace(0., 0.3, 20):
+        
+        test_dict = input_dict.copy()
+        test_dict["Energy Modification"] = energy
+        input_dicts.append(test_dict)
+    
+    def get_eis(test_dict):
+        _, eis_dict, _, seasons, _ = test_hydro(test_dict)
+        return eis_dict, seasons.sort_index().values.tolist()
+    
+    expected = [get_eis(x) for x in input_dicts]
+    
+    pool = ThreadPool(8)
+    
+    try:
+        results = pool.map(get_eis, input_dicts * 10)
+    finally:
+        pool.close()
+        pool.join()
+    
+    assert results == expected * 10
+
+
+def test_core_threads(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    step = test_hydro.get_plan()["Energy Modification"]
+    impacts = np.random.RandomState(0).uniform(0., 0.3, 500000)
+    
+    def run(_):
+        return assess(step, impacts).eis.sum()
+    
+    serial = [run(x) for x in range(4)]
+    
+    pool = ThreadPool(4)
+    
+    try:
+        threaded = pool.map(run, range(4))
+    finally:
+        pool.close()
+        pool.join()
+    
+    assert threaded == serial
+
+
+@pytest.mark.skipif("DTOCEAN_BENCHMARK" not in os.environ or
+                                            multiprocessing.cpu_count() < 2,
+                    reason="Benchmark run when DTOCEAN_BENCHMARK is set, "
+                           "on two or more cores")
+def test_core_thread_scaling(protected, weighting, receptors):
+    
+    test_hydro = HydroStage(protected,
+                            receptors,
+                            weighting)
+    
+    step = test_hydro.get_plan()["Energy Modification"]
+    impacts = np.random.RandomState(0).uniform(0., 0.3, 2000000)
+    n_threads = min(multiprocessing.cpu_count(), 4)
+    
+    def run(_):
+        return assess(step, impacts).eis.sum()
+    
+    def get_time(function):
+        
+        # Best of three, to reduce the noise of other processes
+        times = []
+        
+        for _ in range(3):
+            start = time.time()
+            function()
+            times.append(time.time() - start)
+        
+        return min(times)
+    
+    pool = ThreadPool(n_threads)
+    
+    try:
+        serial = get_time(lambda: [run(x) for x in range(n_threads)])
+        threaded = get_time(lambda: pool.map(run, range(n_threads)))
+    finally:
+        pool.close()
+        pool.join()
+    
+    # Loose bound on linear scaling: at least half the ideal speed up
+    assert serial / threaded > n_threads / 2.
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on noise.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import numpy as np
+import pytest
+
+from dtocean_environment.functions import undwater_noise
+from dtocean_environment.noise import (get_transmission_loss,
+                                       get_received_levels,
+                                       add_levels,
+                                       get_exceedance,
+                                       get_grid_noise_inputs)
+
+
+def test_get_transmission_loss():
+
+    loss = get_transmission_loss(np.array([0.5, 10., 1000.]),
+                                 "spherical",
+                                 absorption=1.)
+
+    assert np.allclose(loss, [0.001, 20.01, 61.])
+
+
+def test_get_received_levels_single():
+
+    levels = get_received_levels([0.], [0.], [180.],
+                                 np.array([10., 100.]),
+                                 np.array([0., 0.]),
+                                 spreading=20.)
+
+    assert np.allclose(levels, [160., 140.])
+
+
+def test_get_received_levels_sum():
+
+    # Two equal sources at the same range add 3 dB
+    levels = get_received_levels([-10., 10.], [0., 0.], [150., 150.],
+                                 np.array([0.]),
+                                 np.array([0.]),
+                                 spreading=20.)
+
+    assert np.isclose(levels[0], 130. + 10 * np.log10(2.))
+
+
+def test_get_received_levels_chunks():
+
+    random = np.random.RandomState(1)
+    source_x, source_y = random.uniform(0, 1000, (2, 20))
+    source_levels = random.uniform(150, 220, 20)
+    x, y = np.meshgrid(np.linspace(0, 1000, 30), np.linspace(0, 1000, 30))
+
+    levels = get_received_levels(source_x, source_y, source_levels, x, y,
+                                 absorption=0.5)
+    chunked = get_received_levels(source_x, source_y, source_levels, x, y,
+                                  absorption=0.5,
+                                  max_elements=50)
+
+    assert levels.shape == x.shape
+    assert np.allclose(levels, chunked)
+
+
+def test_add_levels():
+
+    assert np.isclose(add_levels(100., 100.), 100. + 10 * np.log10(2.))
+
+
+def test_get_exceedance():
+
+    levels = np.array([[90., 110.], [120., 95.]])
+    weights = np.array([[1., 1.], [2., 4.]])
+
+    stats = get_exceedance(levels, 100., cell_area=25., weights=weights)
+
+    assert stats["area"] == 50.
+    assert stats["fraction"] == 0.5
+    assert np.isclose(stats["weighted fraction"], 3. / 8.)
+
+
+def test_get_grid_noise_inputs():
+
+    inputs = get_grid_noise_inputs(np.array([10., 120.]), 100.)
+
+    assert inputs["Initial Noise dB re 1muPa"] == 100.
+    assert inputs["Measured Noise dB re 1muPa"] == 120.
+    assert undwater_noise(inputs["Initial Noise dB re 1muPa"],
+                          inputs["Measured Noise dB re 1muPa"]) == 1.
+
+
+@pytest.mark.parametrize("levels", [[10., 100.],
+                                    [[90., 95.], [99., 80.]],
+                                    [100., 100.]])
+def test_get_grid_noise_inputs_below_ambient(levels):
+
+    inputs = get_grid_noise_inputs(np.array(levels), 100.)
+
+    assert inputs["Measured Noise dB re 1muPa"] <= 100.
+    assert undwater_noise(inputs["Initial Noise dB re 1muPa"],
+                          inputs["Measured Noise dB re 1muPa"]) == 0.
+    assert get_exceedance(levels, 100.)["fraction"] == 0.
+
+
+def test_get_grid_noise_inputs_percentile():
+
+    levels = np.array([90., 92., 94., 96., 150.])
+
+    inputs = get_grid_noise_inputs(levels, 100., percentile=50.)
+
+    assert inputs["Measured Noise dB re 1muPa"] == 94.
+    assert undwater_noise(inputs["Initial Noise dB re 1muPa"],
+                          inputs["Measured Noise dB re 1muPa"]) == 0.
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on observations.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.observations import Observations
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def protected():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected_table = pd.read_csv(input_path, index_col=0)
+
+    return protected_table
+
+
+@pytest.fixture
+def receptors():
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors_table = pd.read_csv(input_path, index_col=0)
+
+    return receptors_table
+
+
+def test_observations_empty():
+
+    test = Observations()
+
+    assert not test.is_protected_observed()
+    assert not test.has_receptors()
+
+
+def test_observations_protected(protected):
+
+    test = Observations(protected)
+    assert not test.is_protected_observed()
+
+    protected["observed"] = True
+    test = Observations(protected)
+    assert test.is_protected_observed()
+
+
+def test_observations_receptors(receptors):
+
+    test = Observations(receptor_observations=receptors)
+    names = list(receptors.index[[3, 0]])
+    indices = test.get_indices(names)
+
+    assert test.has_receptors()
+    assert test.get_species(indices) == names
+    assert (test.get_observed(indices) ==
+                        receptors.loc[names, "observed"].values).all()
+
+
+def test_observations_monthly(receptors):
+
+    receptors.iloc[1, 1:] = 0.
+    receptors.iloc[1, 4] = 1.
+
+    test = Observations(receptor_observations=receptors)
+    monthly = test.get_monthly(test.get_indices(receptors.index[:2]))
+
+    assert monthly.shape == (2, 12)
+    assert np.isnan(monthly[0]).all()
+    assert monthly[1].sum() == 1.
+    assert monthly[1, 3] == 1.
+
+
+def test_observations_views(receptors):
+
+    test = Observations(receptor_observations=receptors)
+    consecutive = test.get_indices(receptors.index[2:5])
+    scattered = test.get_indices(receptors.index[[4, 2, 3]])
+
+    assert np.may_share_memory(test.get_observed(consecutive),
+                               test._observed)
+    assert np.may_share_memory(test.get_monthly(consecutive),
+                               test._monthly)
+    assert (test.get_observed(scattered) ==
+                        receptors["observed"].values[[4, 2, 3]]).all()
+
+    with pytest.raises(ValueError):
+        test.get_observed(consecutive)[0] = False
+
+
+def test_observations_read_only(receptors):
+
+    test = Observations(receptor_observations=receptors)
+    indices = test.get_indices(receptors.index[:2])
+
+    with pytest.raises(ValueError):
+        test._monthly[0, 0] = 1.
+
+    with pytest.raises(ValueError):
+        indices[0] = 1
+
+
+def test_observations_missing(receptors):
+
+    test = Observations(receptor_observations=receptors)
+
+    with pytest.raises(KeyError) as excinfo:
+        test.get_indices(["Not a receptor"], "Test")
+
+    assert "Not a receptor" in str(excinfo.value)
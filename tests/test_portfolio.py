@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on portfolio.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.batch import get_input_dicts
+from dtocean_environment.portfolio import (Site,
+                                           Portfolio,
+                                           get_expected_cost)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture(scope="module")
+def sites():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected = pd.read_csv(input_path, index_col=0)
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors = pd.read_csv(input_path, index_col=0)
+
+    energy = np.linspace(0., 0.3, 7)
+    scenarios = pd.DataFrame({"Energy Modification": energy,
+                              "Initial Turbidity": 50.,
+                              "Measured Turbidity": 70.},
+                             index=["scenario {}".format(i)
+                                                for i in range(len(energy))])
+
+    sites = [Site("north", scenarios, protected, receptors),
+             Site("south",
+                  scenarios.iloc[:4],
+                  weighting={"Energy Modification": "Loose sand"})]
+
+    return sites
+
+
+@pytest.fixture(scope="module")
+def portfolio(sites):
+
+    return Portfolio(sites, ["hydrodynamics", "moorings"])
+
+
+def test_portfolio_shared_tables(portfolio):
+
+    north = portfolio.get_stage("north", "hydrodynamics").get_score_tables()
+    south = portfolio.get_stage("south", "hydrodynamics").get_score_tables()
+
+    assert north["Turbidity"][0] is south["Turbidity"][0]
+
+
+def test_portfolio_bad_args(sites):
+
+    with pytest.raises(ValueError):
+        Portfolio(sites, ["hydro"])
+
+    with pytest.raises(ValueError):
+        Portfolio([sites[0], sites[0]])
+
+
+@pytest.mark.parametrize("name", ["", "..", "north/south", "north\\south"])
+def test_portfolio_bad_site_name(sites, name):
+
+    with pytest.raises(ValueError):
+        Portfolio([sites[0]._replace(name=name)])
+
+
+def test_get_tasks(portfolio):
+
+    def cost(input_dict):
+        return input_dict.get("Energy Modification") or 0.
+
+    tasks = portfolio.get_tasks(chunksize=3, cost=cost)
+    costs = [x[0] for x in tasks]
+
+    assert len(tasks) == 2 * (3 + 2)
+    assert costs == sorted(costs, reverse=True)
+
+
+def test_get_expected_cost():
+
+    input_dict = {"Coordinates of the Devices": [(0., 0.), (1., 0.)],
+                  "Water Depth": 30.,
+                  "Current Direction": None}
+
+    assert get_expected_cost(input_dict) == 3
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_portfolio_run(portfolio, sites, processes, tmpdir):
+
+    done = []
+
+    def progress(n, total):
+        done.append((n, total))
+
+    cubes = portfolio.run(processes=processes,
+                          chunksize=3,
+                          dir_path=str(tmpdir),
+                          dtype=np.float64,
+                          progress=progress)
+
+    assert list(cubes) == ["north", "south"]
+    assert done[-1] == (10, 10)
+
+    for site in sites:
+
+        cube = cubes[site.name]
+        stage = portfolio.get_stage(site.name, "hydrodynamics")
+        input_dicts = get_input_dicts(site.scenarios, stage.get_inputs())
+        eis_df, global_df = stage.get_batch_eis(input_dicts)
+
+        assert cube.scenarios == list(site.scenarios.index)
+
+        result = cube.select("eis",
+                             stage="hydrodynamics",
+                             function=list(eis_df.columns))
+        np.testing.assert_allclose(result, eis_df.values)
+
+        global_eis = cube.get_global_eis()
+        s = cube.get_index("stage", "hydrodynamics")
+
+        np.testing.assert_allclose(global_eis["Negative Impact"][:, s],
+                                   global_df["Negative Impact"].values)
+
+
+def test_portfolio_run_error(portfolio):
+
+    def progress(n, total):
+        raise RuntimeError("Stop")
+
+    with pytest.raises(RuntimeError):
+        portfolio.run(processes=2, chunksize=3, progress=progress)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on regional.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import itertools
+
+import pytest
+import numpy as np
+from shapely.geometry import Point, box
+
+from dtocean_environment.main import HydroStage, MooringStage
+from dtocean_environment.batch import get_stage
+from dtocean_environment.functions import coll_risk
+from dtocean_environment.impacts import CollisionRisk
+from dtocean_environment.logigram import get_assessment
+from dtocean_environment.regional import (COLLISION_BOUND,
+                                          Farm,
+                                          get_interacting_pairs,
+                                          get_regions,
+                                          get_cumulative_impacts,
+                                          assess_cumulative)
+
+
+@pytest.fixture
+def farms():
+
+    north = Farm("north",
+                 box(0., 0., 100., 100.),
+                 coordinates=[[20., 50., 80.], [50., 50., 50.]],
+                 device_size=5.,
+                 immersed_height=10.,
+                 water_depth=40.,
+                 components={"anchors": [Point(20., 50.).buffer(2.)]},
+                 underwater_area=20.,
+                 emerged_area=2.,
+                 n_objects=3,
+                 fishery_area=5000.)
+    south = Farm("south",
+                 box(150., 0., 250., 100.),
+                 coordinates=[[180., 220.], [40., 60.]],
+                 device_size=8.,
+                 immersed_height=12.,
+                 water_depth=30.,
+                 components={"anchors": [Point(180., 40.).buffer(3.)]},
+                 underwater_area=10.,
+                 n_objects=2)
+    remote = Farm("remote",
+                  box(10000., 0., 10100., 100.),
+                  fishery_area=1000.)
+
+    return [north, south, remote]
+
+
+def test_get_interacting_pairs(farms):
+
+    assert get_interacting_pairs(farms) == []
+    assert get_interacting_pairs(farms, 60.) == [(0, 1)]
+
+
+def test_get_interacting_pairs_random():
+
+    np.random.seed(1)
+    corners = np.random.uniform(0., 1000., size=(100, 2))
+    farms = [Farm(str(i), box(x, y, x + 50., y + 50.))
+                                        for i, (x, y) in enumerate(corners)]
+
+    pairs = get_interacting_pairs(farms, 10.)
+    expected = [(i, j) for i, j in itertools.combinations(range(100), 2)
+                        if farms[i].area.distance(farms[j].area) <= 10.]
+
+    assert pairs == expected
+
+
+def test_get_regions(farms):
+
+    assert sorted(get_regions(farms, 60.)) == [[0, 1], [2]]
+
+
+def test_get_cumulative_impacts(farms):
+
+    impacts = get_cumulative_impacts(farms, 0., 60.)
+
+    combined = impacts.iloc[0]
+    remote = impacts.iloc[1]
+    total_area = 2 * 100. * 100.
+
+    expected = coll_risk([[20., 50., 80., 180., 220.],
+                          [50., 50., 50., 40., 60.]],
+                         8.,
+                         12.,
+                         30.,
+                         0.)
+
+    assert combined["farms"] == ("north", "south")
+    assert np.isclose(combined["Collision Risk"], expected)
+    assert np.isclose(combined["Footprint"],
+                      (np.pi * 4. + np.pi * 9.) / total_area,
+                      rtol=0.01)
+    assert np.isclose(combined["Reef Effect"], (60. + 20.) / total_area)
+    assert np.isclose(combined["Resting Place"], 6. / total_area)
+    assert np.isclose(combined["Reserve Effect"], 5000. / total_area)
+    assert combined[COLLISION_BOUND].tolist() == [8., 12., 30.]
+    assert np.isnan(remote["Collision Risk"])
+    assert remote[COLLISION_BOUND].isnull().all()
+    assert np.isclose(remote["Reserve Effect"], 0.1)
+
+
+@pytest.mark.parametrize("dev_dim, cur_dir", [(12., 90.), (5., 30.)])
+def test_get_cumulative_impacts_single(dev_dim, cur_dir):
+
+    rows, cols = np.mgrid[:4, :6]
+    coordinates = [cols.ravel() * 100., rows.ravel() * 100.]
+    farm = Farm("single",
+                box(-50., -50., 550., 350.),
+                coordinates=coordinates,
+                device_size=dev_dim,
+                immersed_height=10.,
+                water_depth=40.)
+
+    impacts = get_cumulative_impacts([farm], cur_dir)
+    expected = CollisionRisk.get_impact(
+                            {"Coordinates of the Devices": coordinates,
+                             "Size of the Devices": dev_dim,
+                             "Immersed Height of the Devices": 10.,
+                             "Water Depth": 40.,
+                             "Current Direction": cur_dir})
+
+    assert impacts.loc[0, "Collision Risk"] == expected
+
+
+def test_assess_cumulative(farms):
+
+    stage = get_stage(HydroStage)
+    eis = assess_cumulative(stage, farms, 0., 60.)
+    impacts = get_cumulative_impacts(farms, 0., 60.)
+
+    assert "Footprint" not in eis
+    assert eis.loc[0, COLLISION_BOUND].tolist() == [8., 12., 30.]
+    assert np.isnan(eis.loc[1, "Reef Effect"])
+
+    for name in ["Collision Risk", "Reef Effect", "Reserve Effect"]:
+
+        expected = get_assessment(stage.get_plan()[name],
+                                  impacts.loc[0, name]).get_EIS()
+
+        assert np.isclose(eis.loc[0, name], expected)
+
+
+def test_assess_cumulative_footprint(farms):
+
+    stage = get_stage(MooringStage)
+    eis = assess_cumulative(stage, farms, 0., 60.)
+
+    assert eis["Footprint"].notnull().tolist() == [True, False]
+
+
+def test_assess_cumulative_bad_target_level(farms):
+
+    with pytest.raises(ValueError):
+        assess_cumulative(get_stage(HydroStage), farms, target_level=4)
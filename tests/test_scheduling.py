@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on scheduling.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.observations import MONTHS
+from dtocean_environment.scheduling import (get_window_costs,
+                                            optimise_starts,
+                                            SeasonalScheduler)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def monthly_costs():
+
+    costs = np.array([5, 5, 5, 1, 1, 1, 5, 5, 5, 0, 3, 5.])
+
+    return np.tile(costs, (4, 1))
+
+
+def test_get_window_costs(monthly_costs):
+
+    window_costs, occupancy = get_window_costs(monthly_costs, [2, 2, 3, 1])
+
+    assert window_costs.shape == (4, 12)
+    assert window_costs[0, 0] == 10.
+    assert window_costs[0, 11] == 10.
+    assert window_costs[2, 3] == 3.
+    assert (occupancy.sum(axis=2) == [[2], [2], [3], [1]]).all()
+
+
+def test_get_window_costs_bad_duration(monthly_costs):
+
+    with pytest.raises(ValueError):
+        get_window_costs(monthly_costs, [2, 0, 3, 1])
+
+
+def test_optimise_starts(monthly_costs):
+
+    starts, profile = optimise_starts(monthly_costs, [2, 2, 3, 1])
+
+    assert (starts == [3, 3, 3, 9]).all()
+    assert profile.sum() == 7.
+
+
+def test_optimise_starts_allowed(monthly_costs):
+
+    starts, _ = optimise_starts(monthly_costs,
+                                [2, 2, 3, 1],
+                                allowed_starts=[None, [0, 1], None, None])
+
+    assert starts[1] in [0, 1]
+
+
+def test_optimise_starts_concurrent(monthly_costs):
+
+    starts, profile = optimise_starts(monthly_costs,
+                                      [2, 2, 3, 1],
+                                      max_concurrent=1)
+
+    _, occupancy = get_window_costs(monthly_costs, [2, 2, 3, 1])
+    counts = occupancy[np.arange(4), starts].sum(axis=0)
+
+    assert counts.max() == 1
+    assert profile.sum() > 7.
+
+
+def test_optimise_starts_infeasible(monthly_costs):
+
+    with pytest.raises(ValueError):
+        optimise_starts(monthly_costs,
+                        [12, 12, 3, 1],
+                        max_concurrent=1)
+
+
+def test_SeasonalScheduler():
+
+    from dtocean_environment.main import InstallationStage
+
+    protected = pd.read_csv(os.path.join(test_data_dir,
+                                         "species_protected.csv"),
+                            index_col=0)
+    receptors = pd.read_csv(os.path.join(test_data_dir,
+                                         "species_receptors.csv"),
+                            index_col=0)
+    weighting = {"Footprint": None,
+                 "Collision Risk Vessel": None,
+                 "Chemical Pollution": None,
+                 "Turbidity": None,
+                 "Underwater Noise": None}
+
+    stage = InstallationStage(protected, receptors, weighting)
+
+    input_dict = {"Surface Area Covered": 1000.,
+                  "Total Surface Area": 100000.,
+                  "Number of Vessels": 5.,
+                  "Size of Vessels": 50.,
+                  "Import of Chemical Polutant": False,
+                  "Initial Turbidity": 50.,
+                  "Measured Turbidity": 60.,
+                  "Initial Noise dB re 1muPa": 100.,
+                  "Measured Noise dB re 1muPa": 110.}
+
+    operations = [{"name": "cable lay", "duration": 2},
+                  {"name": "piling",
+                   "duration": 3,
+                   "months": [4, 5, 6],
+                   "inputs": {"Measured Noise dB re 1muPa": 200.}}]
+
+    scheduler = SeasonalScheduler(stage, input_dict)
+    schedule, profile = scheduler(operations)
+
+    assert list(schedule["name"]) == ["cable lay", "piling"]
+    assert schedule["start month"].iloc[1] in [4, 5, 6]
+    assert len(profile) == 12
+    assert (profile <= 0).all()
+
+
+def test_SeasonalScheduler_unhashable_inputs():
+
+    class MockStage(object):
+
+        def __init__(self):
+            self.n_calls = 0
+
+        def __call__(self, input_dict):
+            self.n_calls += 1
+            seasons = pd.DataFrame([-np.ones(12)], columns=MONTHS)
+            return None, None, None, seasons, None
+
+    stage = MockStage()
+    coords = np.array([[0., 0.], [10., 10.]])
+
+    operations = [{"name": "a", "duration": 1, "inputs": {"xy": coords}},
+                  {"name": "b", "duration": 1, "inputs": {"xy": coords}},
+                  {"name": "c", "duration": 1, "inputs": {"xy": [1, 2]}},
+                  {"name": "d", "duration": 1, "inputs": {"xy": {1, 2}}},
+                  {"name": "e", "duration": 1, "inputs": {"xy": {1, 2}}}]
+
+    scheduler = SeasonalScheduler(stage, {})
+    schedule, profile = scheduler(operations)
+
+    assert len(schedule) == 5
+    assert stage.n_calls == 4
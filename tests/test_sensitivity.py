@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on sensitivity.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.sensitivity import (get_morris_samples,
+                                             get_saltelli_samples,
+                                             get_morris_indices,
+                                             get_sobol_indices,
+                                             Sensitivity)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def protected():
+
+    protected_table = pd.read_csv(os.path.join(test_data_dir,
+                                               "species_protected.csv"),
+                                  index_col=0)
+
+    return protected_table
+
+
+@pytest.fixture
+def receptors():
+
+    table_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors_table = pd.read_csv(table_path, index_col=0)
+
+    return receptors_table
+
+
+def test_get_morris_samples():
+
+    samples, orders = get_morris_samples(3, 5, seed=1)
+
+    assert samples.shape == (20, 3)
+    assert orders.shape == (5, 3)
+    assert samples.min() >= 0.
+    assert samples.max() <= 1.
+
+    # Each step changes exactly one input
+    for i in range(5):
+        steps = np.diff(samples[i * 4:(i + 1) * 4], axis=0)
+        assert ((steps != 0).sum(axis=1) == 1).all()
+
+
+def test_get_morris_samples_odd_levels():
+
+    with pytest.raises(ValueError):
+        get_morris_samples(3, 5, n_levels=3)
+
+
+def test_get_morris_indices():
+
+    samples, orders = get_morris_samples(3, 10, seed=1)
+    outputs = 2. * samples[:, 0] + samples[:, 1] ** 2
+
+    mu, mu_star, sigma = get_morris_indices(outputs, samples, orders)
+
+    assert np.isclose(mu[0, 0], 2.)
+    assert np.isclose(sigma[0, 0], 0.)
+    assert mu_star[1, 0] > 0.
+    assert np.isclose(mu_star[2, 0], 0.)
+
+
+def test_get_sobol_indices():
+
+    samples = get_saltelli_samples(3, 20000, seed=1)
+    outputs = samples[:, 0] + 2. * samples[:, 1]
+
+    first, total = get_sobol_indices(outputs, 3)
+
+    assert np.allclose(first[:, 0], [0.2, 0.8, 0.], atol=0.05)
+    assert np.allclose(total[:, 0], [0.2, 0.8, 0.], atol=0.03)
+
+
+def test_get_sobol_indices_constant():
+
+    samples = get_saltelli_samples(2, 10, seed=1)
+    outputs = np.ones(len(samples))
+
+    first, total = get_sobol_indices(outputs, 2)
+
+    assert np.isnan(first).all()
+    assert np.isnan(total).all()
+
+
+def test_Sensitivity_sobol(protected, receptors):
+
+    from dtocean_environment.main import InstallationStage
+
+    weighting = {"Footprint": None,
+                 "Collision Risk Vessel": None,
+                 "Chemical Pollution": None,
+                 "Turbidity": None,
+                 "Underwater Noise": None}
+
+    stage = InstallationStage(protected, receptors, weighting)
+
+    base_inputs = {"Surface Area Covered": 1000.,
+                   "Total Surface Area": 100000.,
+                   "Number of Vessels": 5.,
+                   "Size of Vessels": 50.,
+                   "Import of Chemical Polutant": False,
+                   "Initial Turbidity": 50.,
+                   "Measured Turbidity": 40.,
+                   "Initial Noise dB re 1muPa": 100.,
+                   "Measured Noise dB re 1muPa": 110.}
+
+    bounds = {"Surface Area Covered": (0., 30000.),
+              "Number of Vessels": (1., 10.)}
+
+    test = Sensitivity(stage, base_inputs, bounds)
+    result = test.sobol(64, seed=1)
+
+    assert set(result.keys()) == set(["S1", "ST"])
+    assert list(result["S1"].index) == ["Number of Vessels",
+                                        "Surface Area Covered"]
+    assert "Footprint" in result["ST"].columns
+    assert "Negative Impact" in result["ST"].columns
+    assert np.isnan(result["ST"].loc["Number of Vessels", "Footprint"]) or \
+           np.isclose(result["ST"].loc["Number of Vessels", "Footprint"], 0.)
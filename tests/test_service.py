@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on service.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import json
+import httplib
+import threading
+
+import pytest
+import pandas as pd
+
+from dtocean_environment.main import HydroStage
+from dtocean_environment.batch import get_stage
+from dtocean_environment.service import (AssessmentService,
+                                         AssessmentServer,
+                                         BatcherStopped,
+                                         MicroBatcher,
+                                         get_json_result)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def protected():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected_table = pd.read_csv(input_path, index_col=0)
+
+    return protected_table
+
+
+@pytest.fixture
+def receptors():
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors_table = pd.read_csv(input_path, index_col=0)
+
+    return receptors_table
+
+
+@pytest.fixture
+def service(protected, receptors):
+
+    service = AssessmentService(max_delay=0.05)
+    service.add_observation_set("site", protected, receptors)
+
+    yield service
+
+    service.close()
+
+
+@pytest.fixture
+def server(service):
+
+    server = AssessmentServer(service, port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+
+    connection = httplib.HTTPConnection(*server.server_address)
+
+    if body is not None: body = json.dumps(body)
+
+    connection.request(method, path, body)
+    response = connection.getresponse()
+    result = json.loads(response.read())
+    connection.close()
+
+    return response.status, result
+
+
+def test_assess(service, protected, receptors):
+
+    inputs = {"Energy Modification": 0.1}
+    result = service.assess("hydrodynamics", inputs, "site")
+
+    stage = get_stage(HydroStage, protected, receptors)
+    input_dict = {name: None for name in stage.get_inputs()}
+    input_dict.update(inputs)
+    expected = get_json_result(stage(input_dict))
+
+    assert result == expected
+    assert result["eis"]["Turbidity"] is None
+    assert json.dumps(result)
+
+
+def test_assess_replaced(monkeypatch, service, protected, receptors):
+
+    # The batcher of a request is closed by replacing its observation set
+    stale = service._get_batcher("hydrodynamics", "site")
+    service.add_observation_set("site", protected, receptors)
+
+    calls = []
+    get_batcher = service._get_batcher
+
+    def get_stale_batcher(*args):
+        calls.append(args)
+        if len(calls) == 1: return stale
+        return get_batcher(*args)
+
+    monkeypatch.setattr(service, "_get_batcher", get_stale_batcher)
+
+    result = service.assess("hydrodynamics",
+                            {"Energy Modification": 0.1},
+                            "site")
+
+    assert len(calls) == 2
+    assert result["eis"]["Energy Modification"] is not None
+
+
+def test_assess_bad_inputs(service):
+
+    with pytest.raises(ValueError):
+        service.assess("hydrodynamics", [1.])
+
+
+def test_assess_unknown_input(service):
+
+    with pytest.raises(KeyError):
+        service.assess("hydrodynamics", {"Not An Input": 1.})
+
+
+@pytest.mark.parametrize("stage_name, observations", [("hydro", None),
+                                                      ("electrical", "x")])
+def test_assess_unknown(service, stage_name, observations):
+
+    with pytest.raises(ValueError):
+        service.assess(stage_name, {}, observations)
+
+
+def test_assess_batched(service):
+
+    values = [0.01 * i for i in range(16)]
+    results = [None] * len(values)
+
+    def run(i):
+        results[i] = service.assess("hydrodynamics",
+                                    {"Energy Modification": values[i]},
+                                    "site")
+
+    threads = [threading.Thread(target=run, args=(i,))
+                                                for i in range(len(values))]
+
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+
+    stage = service.get_stage("hydrodynamics", "site")
+
+    for value, result in zip(values, results):
+
+        input_dict = {name: None for name in stage.get_inputs()}
+        input_dict["Energy Modification"] = value
+
+        assert result == get_json_result(stage(input_dict))
+
+    metrics = service.metrics.get_metrics()
+
+    assert metrics["requests"] == len(values)
+    assert metrics["batches"] < len(values)
+
+
+def test_micro_batcher_errors(protected, receptors):
+
+    stage = get_stage(HydroStage, protected, receptors)
+    batcher = MicroBatcher(stage, max_delay=0.05)
+
+    # Energy modifications outside [0, 1] are outside the pressure table
+    values = [0., 0.1, 1.5, 0.2, 0.3, -0.1, 0.15, 1.]
+    results = [None] * len(values)
+    errors = [None] * len(values)
+
+    def run(i):
+        input_dict = {name: None for name in stage.get_inputs()}
+        input_dict["Energy Modification"] = values[i]
+        try:
+            results[i] = batcher.submit(input_dict)
+        except ValueError as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,))
+                                                for i in range(len(values))]
+
+    try:
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+    finally:
+        batcher.close()
+
+    for value, result, error in zip(values, results, errors):
+
+        if not 0. <= value <= 1.:
+            assert result is None
+            assert error is not None
+            continue
+
+        input_dict = {name: None for name in stage.get_inputs()}
+        input_dict["Energy Modification"] = value
+
+        assert error is None
+        assert get_json_result(result) == get_json_result(stage(input_dict))
+
+
+def test_micro_batcher_closed(protected, receptors):
+
+    stage = get_stage(HydroStage, protected, receptors)
+    batcher = MicroBatcher(stage)
+    batcher.close()
+
+    input_dict = {name: None for name in stage.get_inputs()}
+
+    with pytest.raises(BatcherStopped):
+        batcher.submit(input_dict)
+
+
+def test_server_assess(server):
+
+    status, result = request(server,
+                             "POST",
+                             "/assess",
+                             {"stage": "hydrodynamics",
+                              "observations": "site",
+                              "inputs": {"Energy Modification": 0.1},
+                              "target_level": 1})
+
+    assert status == 200
+    assert result["confidence"]["Energy Modification"] == 1
+
+
+@pytest.mark.parametrize("body", [{"inputs": {}},
+                                  {"stage": "hydrodynamics",
+                                   "inputs": {"Not An Input": 1.}},
+                                  {"stage": "hydrodynamics",
+                                   "target_level": 4},
+                                  {"stage": "hydrodynamics",
+                                   "inputs": [1.]}])
+def test_server_assess_bad_request(server, body):
+
+    status, result = request(server, "POST", "/assess", body)
+
+    assert status == 400
+    assert "error" in result
+
+
+def test_server_health_metrics(server):
+
+    request(server,
+            "POST",
+            "/assess",
+            {"stage": "hydrodynamics",
+             "inputs": {"Energy Modification": 0.1}})
+
+    status, health = request(server, "GET", "/health")
+
+    assert status == 200
+    assert health["status"] == "ok"
+    assert "hydrodynamics/default" in health["stages"]
+
+    status, metrics = request(server, "GET", "/metrics")
+
+    assert status == 200
+    assert metrics["requests"] == 1
+    assert metrics["latency_p50"] > 0.
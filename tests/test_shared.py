@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on shared.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import shutil
+import multiprocessing
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.main import HydroStage
+from dtocean_environment.shared import (publish_stage,
+                                        attach_stage,
+                                        get_attached_stage)
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture
+def stage():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected = pd.read_csv(input_path, index_col=0)
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors = pd.read_csv(input_path, index_col=0)
+
+    weighting = {"Energy Modification": "Loose sand",
+                 "Collision Risk": None,
+                 "Turbidity": None,
+                 "Underwater Noise": None,
+                 "Reserve Effect": None,
+                 "Reef Effect": None,
+                 "Resting Place": None}
+
+    return HydroStage(protected, receptors, weighting)
+
+
+@pytest.fixture
+def input_dicts():
+
+    input_dict = {"Energy Modification": 0.3,
+                  "Coordinates of the Devices": None,
+                  "Size of the Devices": None,
+                  "Immersed Height of the Devices": None,
+                  "Water Depth": None,
+                  "Current Direction": None,
+                  "Initial Turbidity": 50.,
+                  "Measured Turbidity": 70.,
+                  "Initial Noise dB re 1muPa": 60.,
+                  "Measured Noise dB re 1muPa": 150.,
+                  "Fishery Restriction Surface": 1000.,
+                  "Total Surface Area": 94501467.,
+                  "Number of Objects": 50,
+                  "Object Emerged Surface": 20.,
+                  "Surface Area of Underwater Part": 60.}
+
+    input_dicts = []
+
+    for energy in np.linspace(0., 0.3, 7):
+
+        test_dict = input_dict.copy()
+        test_dict["Energy Modification"] = energy
+        input_dicts.append(test_dict)
+
+    return input_dicts
+
+
+def _get_worker_scores(args):
+
+    dir_path, input_dicts = args
+    stage = get_attached_stage(dir_path)
+    _, scores = stage.get_batch_scores(input_dicts)
+
+    return scores
+
+
+def test_attach_stage(tmpdir, stage, input_dicts):
+
+    dir_path = publish_stage(stage, str(tmpdir))
+    attached = attach_stage(dir_path)
+
+    assert isinstance(attached, HydroStage)
+    assert attached.get_plan().get_names() == stage.get_plan().get_names()
+
+    step = attached.get_plan()["Energy Modification"]
+
+    assert isinstance(step.monthly, np.memmap)
+
+    with pytest.raises(ValueError):
+        step.monthly[0, 0] = 1.
+
+    for input_dict in input_dicts:
+
+        expected = stage(input_dict)
+        result = attached(input_dict)
+
+        assert result[0] == expected[0]
+        assert result[1] == expected[1]
+        assert result[3].equals(expected[3])
+
+        for name, recommendations in expected[2].items():
+
+            if recommendations is None:
+                assert result[2][name] is None
+            else:
+                assert pd.Series(result[2][name]).equals(
+                                            pd.Series(recommendations))
+
+
+def test_publish_stage_not_empty(tmpdir, stage):
+
+    publish_stage(stage, str(tmpdir))
+
+    with pytest.raises(ValueError):
+        publish_stage(stage, str(tmpdir))
+
+
+def test_get_attached_stage(tmpdir, stage):
+
+    dir_path = publish_stage(stage, str(tmpdir))
+
+    assert get_attached_stage(dir_path) is get_attached_stage(dir_path)
+
+
+@pytest.mark.skipif(os.name == "nt",
+                    reason="Memory mapped files can not be removed")
+def test_get_attached_stage_republished(tmpdir, stage):
+
+    dir_path = str(tmpdir.join("stage"))
+    publish_stage(stage, dir_path)
+    attached = get_attached_stage(dir_path)
+
+    shutil.rmtree(dir_path)
+    publish_stage(stage, dir_path)
+
+    assert get_attached_stage(dir_path) is not attached
+
+
+def test_attached_stage_pool(tmpdir, stage, input_dicts):
+
+    dir_path = publish_stage(stage, str(tmpdir))
+    _, expected = stage.get_batch_scores(input_dicts)
+
+    pool = multiprocessing.Pool(2)
+
+    try:
+        results = pool.map(_get_worker_scores,
+                           [(dir_path, input_dicts[:4]),
+                            (dir_path, input_dicts[4:])])
+    finally:
+        pool.close()
+        pool.join()
+
+    np.testing.assert_array_equal(np.concatenate(results), expected)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on sketches.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+import pickle
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dtocean_environment.main import HydroStage
+from dtocean_environment.batch import get_stage
+from dtocean_environment.sketches import Histogram, EISSketch
+
+mod_path = os.path.realpath(__file__)
+mod_dir = os.path.dirname(mod_path)
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+@pytest.fixture(scope="module")
+def stage():
+
+    input_path = os.path.join(test_data_dir, "species_protected.csv")
+    protected = pd.read_csv(input_path, index_col=0)
+
+    input_path = os.path.join(test_data_dir, "species_receptors.csv")
+    receptors = pd.read_csv(input_path, index_col=0)
+
+    return get_stage(HydroStage, protected, receptors)
+
+
+def get_input_dicts(stage, energy):
+
+    input_dicts = []
+
+    for value in energy:
+
+        input_dict = {name: None for name in stage.get_inputs()}
+        input_dict["Energy Modification"] = value
+        input_dict["Initial Turbidity"] = 50.
+        input_dict["Measured Turbidity"] = 50. + 100. * value
+        input_dicts.append(input_dict)
+
+    return input_dicts
+
+
+def test_histogram_quantile():
+
+    np.random.seed(1)
+    values = np.random.uniform(-95., 45., 10000)
+    values[:10] = np.nan
+
+    histogram = Histogram()
+    histogram.update(values)
+
+    q = [0., 0.1, 0.5, 0.9, 1.]
+    expected = np.nanpercentile(values, np.array(q) * 100.)
+
+    assert histogram.count == 9990
+    assert histogram.missing == 10
+    assert np.allclose(histogram.quantile(q), expected, atol=histogram.width)
+    assert np.isclose(histogram.mean(), np.nanmean(values))
+
+
+def test_histogram_out_of_range():
+
+    histogram = Histogram(0., 1., 10)
+    histogram.update([-1., 0.5, 2.])
+
+    assert histogram.below == 1
+    assert histogram.above == 1
+    assert histogram.quantile(0.) == -1.
+    assert histogram.quantile(1.) == 2.
+
+
+def test_histogram_merge():
+
+    np.random.seed(2)
+    values = np.random.uniform(-95., 45., 1000)
+
+    whole = Histogram()
+    whole.update(values)
+
+    first = Histogram()
+    second = Histogram()
+    first.update(values[:300])
+    second.update(values[300:])
+    first.merge(pickle.loads(pickle.dumps(second)))
+
+    assert (first.counts == whole.counts).all()
+    assert np.allclose(first.quantile([0.2, 0.7]), whole.quantile([0.2, 0.7]))
+
+    with pytest.raises(ValueError):
+        first.merge(Histogram(bins=10))
+
+
+def test_histogram_bad_quantile():
+
+    with pytest.raises(ValueError):
+        Histogram().quantile(1.5)
+
+
+def test_eis_sketch(stage):
+
+    energy = np.linspace(0., 0.3, 40)
+    input_dicts = get_input_dicts(stage, energy)
+
+    sketch = EISSketch()
+    other = EISSketch()
+    sketch.update("hydrodynamics", stage, input_dicts[:25])
+    other.update("hydrodynamics", stage, input_dicts[25:])
+    sketch.merge(other)
+
+    eis_df, global_df = stage.get_batch_eis(input_dicts)
+    width = sketch.histograms.values()[0].width
+
+    for name in ["Energy Modification", "Turbidity"]:
+
+        median = sketch.quantile("hydrodynamics", name, 0.5)
+        lower = np.percentile(eis_df[name], 50., interpolation="lower")
+        higher = np.percentile(eis_df[name], 50., interpolation="higher")
+
+        assert lower - width <= median <= higher + width
+
+    assert np.isclose(sketch.quantile("hydrodynamics", "Negative Impact", 1.),
+                      global_df["Negative Impact"].max())
+
+    seasons = [stage(x)[3].loc["Energy Modification", "june"]
+                                                        for x in input_dicts]
+
+    assert np.isclose(sketch.quantile("hydrodynamics",
+                                      "Energy Modification",
+                                      0.,
+                                      "june"),
+                      min(seasons))
+
+    with pytest.raises(KeyError):
+        sketch.quantile("hydrodynamics", "Not A Function", 0.5)
+
+
+def test_eis_sketch_get_quantiles(stage):
+
+    sketch = EISSketch()
+    sketch.update("hydrodynamics", stage, get_input_dicts(stage, [0.1, 0.2]))
+
+    quantiles = sketch.get_quantiles([0.5])
+
+    row = quantiles.loc[("hydrodynamics", "Collision Risk", None)]
+
+    assert row["count"] == 0
+    assert row["missing"] == 2
+    assert np.isnan(row["q0.5"])
+    assert quantiles.loc[("hydrodynamics", "Turbidity", None), "count"] == 2
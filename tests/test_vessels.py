@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""py.test tests on vessels.py
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point, Polygon
+
+from dtocean_environment.impacts import CollisionRiskVessel
+from dtocean_environment.vessels import PolygonIndex, VesselTraffic
+
+mod_dir = os.path.dirname(os.path.realpath(__file__))
+data_dir = os.path.join(mod_dir, "..", "dtocean_environment", "data")
+test_data_dir = os.path.join(mod_dir, "..", "test_data")
+
+
+def test_PolygonIndex_contains():
+
+    polygon = Polygon([(0, 0), (100, 0), (100, 100), (50, 150), (0, 100)])
+    index = PolygonIndex(polygon, n_cells=8)
+
+    random = np.random.RandomState(1)
+    x = random.uniform(-20, 120, 2000)
+    y = random.uniform(-20, 170, 2000)
+
+    expected = [polygon.contains(Point(a, b)) for a, b in zip(x, y)]
+
+    assert (index.contains(x, y) == np.array(expected)).all()
+
+
+def test_VesselTraffic_read_csv(tmpdir):
+
+    lease_area = Polygon([(0, 0), (1000, 0), (1000, 1000), (0, 1000)])
+
+    reports = pd.DataFrame(
+                {"mmsi": [1, 1, 2, 3, 2, 4, 1],
+                 "timestamp": ["2020-01-01 10:00",
+                               "2020-01-02 10:00",
+                               "2020-01-05 10:00",
+                               "2020-01-05 11:00",
+                               "2020-02-01 10:00",
+                               "2020-02-01 10:00",
+                               "2020-03-01 10:00"],
+                 "x": [10., 20., 500., 2000., 600., 100., 5000.],
+                 "y": [10., 20., 500., 500., 600., 100., 5000.],
+                 "length": [50., 60., 100., 20., 100., np.nan, 50.]})
+
+    path = str(tmpdir.join("positions.csv"))
+    reports.to_csv(path, index=False)
+
+    traffic = VesselTraffic(lease_area)
+    traffic.read_csv(path, chunksize=2)
+
+    inputs = traffic.get_vessel_inputs()
+
+    assert len(inputs) == 2
+    assert list(inputs["Number of Vessels"]) == [2, 2]
+    assert list(inputs["Size of Vessels"]) == [80., 100.]
+    assert (inputs["Total Surface Area"] == 1e6).all()
+
+    distribution = traffic.get_size_distribution([0, 75, 150])
+
+    assert distribution.values.tolist() == [[1, 1], [0, 1]]
+
+
+def test_VesselTraffic_get_assessments(tmpdir):
+
+    lease_area = Polygon([(0, 0), (1000, 0), (1000, 1000), (0, 1000)])
+
+    reports = pd.DataFrame(
+                {"mmsi": [1, 2, 3],
+                 "timestamp": ["2020-01-01 10:00",
+                               "2020-01-05 10:00",
+                               "2020-02-01 10:00"],
+                 "x": [10., 500., 100.],
+                 "y": [10., 500., 100.],
+                 "length": [50., 100., np.nan]})
+
+    path = str(tmpdir.join("positions.csv"))
+    reports.to_csv(path, index=False)
+
+    traffic = VesselTraffic(lease_area)
+    traffic.read_csv(path)
+
+    receptors = pd.read_csv(os.path.join(test_data_dir,
+                                         "species_receptors.csv"),
+                            index_col=0)
+    logigram = CollisionRiskVessel(os.path.join(data_dir, "installation"),
+                                   receptor_observations=receptors)
+
+    eis = traffic.get_assessments(logigram)
+    expected = logigram({"Number of Vessels": 2,
+                         "Size of Vessels": 75.,
+                         "Total Surface Area": 1e6}).get_EIS()
+
+    assert len(eis) == 2
+    assert eis.iloc[0] == expected
+    assert eis.iloc[1] is None